@@ -1,3 +1,3 @@
-from .embeddings import get_embedding, batch_embedding
+from .embeddings import get_embedding, get_embedding_async, batch_embedding, batch_embedding_async
 
-__all__ = ["get_embedding", "batch_embedding"]
\ No newline at end of file
+__all__ = ["get_embedding", "get_embedding_async", "batch_embedding", "batch_embedding_async"]
\ No newline at end of file
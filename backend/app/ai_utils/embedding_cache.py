@@ -0,0 +1,310 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.config.settings import Settings
+from app.utils.cache import LRUCache
+from app.utils.logger import setup_logger
+
+settings = Settings()
+
+logger = setup_logger("embedding_cache")
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize a query so trivially different spellings share a cache entry.
+    Applies unicode normalization, lower-casing and whitespace collapsing.
+
+    Args:
+        text (str): The query text
+
+    Returns:
+        str: The normalized query text
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache for query embeddings keyed on the normalized text and the model name.
+    The first tier is a bounded in-process LRU with TTL. The optional second tier is a SQLite
+    file shared by all uvicorn workers on the host.
+
+    Attributes:
+        memory (LRUCache): The in-process tier, holding float32 arrays
+        disk_path (Optional[str]): Path of the SQLite file, None to disable the shared tier
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: Optional[float],
+        disk_path: Optional[str] = None,
+        disk_max_size: int = 100_000,
+    ):
+        """
+        Constructor for EmbeddingCache class.
+
+        Args:
+            max_size (int): Maximum number of embeddings kept in memory
+            ttl_seconds (Optional[float]): Seconds an embedding stays valid, None for no expiry
+            disk_path (Optional[str]): Path of the SQLite file, None to disable the shared tier
+            disk_max_size (int): Maximum number of embeddings kept on disk
+        """
+        self.memory = LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self.disk_max_size = disk_max_size
+
+        self.disk_hits = 0
+        self.disk_writes = 0
+        self.disk_evictions = 0
+        self.disk_errors = 0
+
+        self._disk_conn: Optional[sqlite3.Connection] = None
+        self._disk_lock = threading.Lock()
+        if disk_path:
+            self._open_disk_tier()
+
+    def _open_disk_tier(self) -> None:
+        """
+        Open the SQLite file in WAL mode so several processes can read while one writes.
+        """
+        try:
+            self._disk_conn = sqlite3.connect(
+                self.disk_path, timeout=1.0, check_same_thread=False, isolation_level=None
+            )
+            self._disk_conn.execute("PRAGMA journal_mode=WAL")
+            self._disk_conn.execute("PRAGMA synchronous=NORMAL")
+            self._disk_conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS query_embeddings (
+                    cache_key   TEXT PRIMARY KEY,
+                    vector      BLOB NOT NULL,
+                    created_at  REAL NOT NULL
+                )
+                """
+            )
+            self._disk_conn.execute(
+                "CREATE INDEX IF NOT EXISTS query_embeddings_created_at_idx "
+                "ON query_embeddings (created_at)"
+            )
+        except sqlite3.Error as e:
+            logger.error("Failed to open the embedding cache file", extra={
+                "error": str(e),
+                "path": self.disk_path
+            })
+            self._disk_conn = None
+
+    @staticmethod
+    def make_key(text: str, model: str) -> str:
+        """
+        Build the cache key of a query.
+
+        Args:
+            text (str): The query text
+            model (str): The embedding model name
+
+        Returns:
+            str: The cache key
+        """
+        digest = hashlib.sha256(normalize_query(text).encode("utf-8")).hexdigest()
+        return f"{model}:{digest}"
+
+    def get(self, text: str, model: str) -> Optional[list[float]]:
+        """
+        Get a cached embedding, checking memory first and then the shared file.
+
+        Args:
+            text (str): The query text
+            model (str): The embedding model name
+
+        Returns:
+            Optional[list[float]]: The embedding, or None on a miss
+        """
+        key = self.make_key(text, model)
+
+        vector = self.memory.get(key)
+        if vector is not None:
+            return vector.tolist()
+
+        return self._promote(key, self._disk_get(key))
+
+    async def get_async(self, text: str, model: str) -> Optional[list[float]]:
+        """
+        Get a cached embedding like get, reading the shared file in a worker thread so the
+        event loop is not blocked.
+
+        Args:
+            text (str): The query text
+            model (str): The embedding model name
+
+        Returns:
+            Optional[list[float]]: The embedding, or None on a miss
+        """
+        key = self.make_key(text, model)
+
+        vector = self.memory.get(key)
+        if vector is not None:
+            return vector.tolist()
+
+        if self._disk_conn is None:
+            return None
+        return self._promote(key, await asyncio.to_thread(self._disk_get, key))
+
+    def _promote(self, key: str, row: Optional[tuple[np.ndarray, float]]) -> Optional[list[float]]:
+        """
+        Copy an embedding read from the shared file to memory for the rest of its lifetime.
+        """
+        if row is None:
+            return None
+        vector, created_at = row
+        self.disk_hits += 1
+        ttl_seconds = None
+        if self.ttl_seconds is not None:
+            ttl_seconds = max(created_at + self.ttl_seconds - time.time(), 0.0)
+        self.memory.set(key, vector, ttl_seconds=ttl_seconds)
+        return vector.tolist()
+
+    def set(self, text: str, model: str, embedding: list[float]) -> None:
+        """
+        Store an embedding in both tiers.
+
+        Args:
+            text (str): The query text
+            model (str): The embedding model name
+            embedding (list[float]): The embedding
+        """
+        key = self.make_key(text, model)
+        vector = np.asarray(embedding, dtype=np.float32)
+        self.memory.set(key, vector)
+        self._disk_set(key, vector)
+
+    async def set_async(self, text: str, model: str, embedding: list[float]) -> None:
+        """
+        Store an embedding in both tiers like set, writing the shared file in a worker thread.
+
+        Args:
+            text (str): The query text
+            model (str): The embedding model name
+            embedding (list[float]): The embedding
+        """
+        key = self.make_key(text, model)
+        vector = np.asarray(embedding, dtype=np.float32)
+        self.memory.set(key, vector)
+        if self._disk_conn is not None:
+            await asyncio.to_thread(self._disk_set, key, vector)
+
+    def _disk_get(self, key: str) -> Optional[tuple[np.ndarray, float]]:
+        if self._disk_conn is None:
+            return None
+
+        try:
+            with self._disk_lock:
+                row = self._disk_conn.execute(
+                    "SELECT vector, created_at FROM query_embeddings WHERE cache_key = ?",
+                    (key,),
+                ).fetchone()
+        except sqlite3.Error as e:
+            self.disk_errors += 1
+            logger.error("Embedding cache read failed", extra={"error": str(e)})
+            return None
+
+        if row is None:
+            return None
+
+        blob, created_at = row
+        if self.ttl_seconds is not None and created_at + self.ttl_seconds < time.time():
+            return None
+
+        return np.frombuffer(blob, dtype=np.float32).copy(), created_at
+
+    def _disk_set(self, key: str, vector: np.ndarray) -> None:
+        if self._disk_conn is None:
+            return
+
+        try:
+            with self._disk_lock:
+                self._disk_conn.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (cache_key, vector, created_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, vector.tobytes(), time.time()),
+                )
+                self.disk_writes += 1
+
+                # Trim the oldest entries once in a while instead of on every write
+                if self.disk_writes % 100 == 0:
+                    self._disk_trim()
+        except sqlite3.Error as e:
+            self.disk_errors += 1
+            logger.error("Embedding cache write failed", extra={"error": str(e)})
+
+    def _disk_trim(self) -> None:
+        if self.ttl_seconds is not None:
+            cursor = self._disk_conn.execute(
+                "DELETE FROM query_embeddings WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+            self.disk_evictions += cursor.rowcount
+
+        cursor = self._disk_conn.execute(
+            """
+            DELETE FROM query_embeddings WHERE cache_key IN (
+                SELECT cache_key FROM query_embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.disk_max_size,),
+        )
+        self.disk_evictions += cursor.rowcount
+
+    def clear(self) -> None:
+        """
+        Remove all entries from both tiers.
+        """
+        self.memory.clear()
+        if self._disk_conn is not None:
+            with self._disk_lock:
+                self._disk_conn.execute("DELETE FROM query_embeddings")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dict[str, Any]: Counters of the memory and disk tiers
+        """
+        return {
+            "misses": self.memory.misses - self.disk_hits,
+            "memory": self.memory.stats(),
+            "disk": {
+                "enabled": self._disk_conn is not None,
+                "hits": self.disk_hits,
+                "writes": self.disk_writes,
+                "evictions": self.disk_evictions,
+                "errors": self.disk_errors,
+            },
+        }
+
+
+@lru_cache(maxsize=1)
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Initialize the process-wide embedding cache and save it in the cache.
+
+    Returns:
+        EmbeddingCache: The embedding cache.
+    """
+    return EmbeddingCache(
+        max_size=settings.EMBEDDING_CACHE_MAX_SIZE,
+        ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+        disk_path=settings.EMBEDDING_CACHE_PATH or None,
+        disk_max_size=settings.EMBEDDING_CACHE_DISK_MAX_SIZE,
+    )
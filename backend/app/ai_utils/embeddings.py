@@ -3,7 +3,8 @@ import os
 import numpy as np
 from typing import List
 import multiprocessing
-from app.clients import get_openai_client
+from app.clients import get_openai_client, get_async_openai_client
+from app.ai_utils.embedding_cache import get_embedding_cache
 
 from app.config.settings import Settings
 
@@ -11,6 +12,8 @@ settings = Settings()
 
 logger = setup_logger("embeddings")
 client = get_openai_client()
+async_client = get_async_openai_client()
+embedding_cache = get_embedding_cache()
 
 def get_embedding(text: str) -> list[float]:
     """
@@ -22,6 +25,12 @@ def get_embedding(text: str) -> list[float]:
     Returns:
         list[float]: The embedding of the text
     """
+    if settings.EMBEDDING_CACHE_ENABLED:
+        cached_embedding = embedding_cache.get(text, settings.EMBEDDING_MODEL_NAME)
+        if cached_embedding is not None:
+            logger.info("Embedding served from cache", extra={"text_length": len(text)})
+            return cached_embedding
+
     try:
         logger.info("Generating embedding for text", extra={
             "text_length": len(text),
@@ -31,6 +40,51 @@ def get_embedding(text: str) -> list[float]:
         response = client.embeddings.create(model=settings.EMBEDDING_MODEL_NAME, input=text)
         embedding = np.array(response.data[0].embedding, dtype=np.float32).tolist()
 
+        if settings.EMBEDDING_CACHE_ENABLED:
+            embedding_cache.set(text, settings.EMBEDDING_MODEL_NAME, embedding)
+
+        logger.info("Embedding generated successfully", extra={
+            "embedding_length": len(embedding)
+        })
+
+        return embedding
+
+    except Exception as e:
+        logger.error("Failed to generate embedding", extra={
+            "error": str(e),
+            "error_type": type(e).__name__,
+            "text_length": len(text)
+        })
+        raise
+
+async def get_embedding_async(text: str) -> list[float]:
+    """
+    Embed a text string into a vector of floats without blocking the event loop.
+
+    Args:
+        text (str): The text to embed
+
+    Returns:
+        list[float]: The embedding of the text
+    """
+    if settings.EMBEDDING_CACHE_ENABLED:
+        cached_embedding = await embedding_cache.get_async(text, settings.EMBEDDING_MODEL_NAME)
+        if cached_embedding is not None:
+            logger.info("Embedding served from cache", extra={"text_length": len(text)})
+            return cached_embedding
+
+    try:
+        logger.info("Generating embedding for text", extra={
+            "text_length": len(text),
+            "model": settings.EMBEDDING_MODEL_NAME
+        })
+
+        response = await async_client.embeddings.create(model=settings.EMBEDDING_MODEL_NAME, input=text)
+        embedding = np.array(response.data[0].embedding, dtype=np.float32).tolist()
+
+        if settings.EMBEDDING_CACHE_ENABLED:
+            await embedding_cache.set_async(text, settings.EMBEDDING_MODEL_NAME, embedding)
+
         logger.info("Embedding generated successfully", extra={
             "embedding_length": len(embedding)
         })
@@ -79,6 +133,59 @@ def batch_embedding(texts: list[str]) -> list[list[float]]:
         })
         raise
 
+async def batch_embedding_async(texts: list[str]) -> list[list[float]]:
+    """
+    Embed a list of query strings with a single embeddings API call, without blocking the event loop.
+    Queries found in the embedding cache are not sent to the API.
+
+    Args:
+        texts (list[str]): List of text strings to embed
+
+    Returns:
+        list[list[float]]: List of embeddings, in the order of the texts
+    """
+    embeddings: list[list[float] | None] = [None] * len(texts)
+    if settings.EMBEDDING_CACHE_ENABLED:
+        for i, text in enumerate(texts):
+            embeddings[i] = await embedding_cache.get_async(text, settings.EMBEDDING_MODEL_NAME)
+
+    missing_indexes = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if not missing_indexes:
+        return embeddings
+
+    try:
+        logger.info("Starting batch embedding", extra={
+            "batch_size": len(texts),
+            "cache_misses": len(missing_indexes),
+            "model": settings.EMBEDDING_MODEL_NAME
+        })
+
+        response = await async_client.embeddings.create(
+            model=settings.EMBEDDING_MODEL_NAME,
+            input=[texts[i] for i in missing_indexes],
+        )
+
+        for i, obj in zip(missing_indexes, response.data):
+            embedding = np.array(obj.embedding, dtype=np.float32).tolist()
+            embeddings[i] = embedding
+            if settings.EMBEDDING_CACHE_ENABLED:
+                await embedding_cache.set_async(texts[i], settings.EMBEDDING_MODEL_NAME, embedding)
+
+        logger.info("Batch embedding completed", extra={
+            "input_size": len(texts),
+            "output_size": len(response.data)
+        })
+
+        return embeddings
+
+    except Exception as e:
+        logger.error("Batch embedding failed", extra={
+            "error": str(e),
+            "error_type": type(e).__name__,
+            "batch_size": len(texts)
+        })
+        raise
+
 def get_embeddings_batch(texts: List[str], batch_size: int = 100) -> List[List[float]]:
     """
     Get embeddings for a batch of texts using multiprocessing
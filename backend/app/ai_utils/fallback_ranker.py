@@ -0,0 +1,147 @@
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.config.settings import Settings
+
+settings = Settings()
+
+
+def bayesian_rating(
+    average_rating: np.ndarray, rating_number: np.ndarray, prior_rating: float, prior_count: float
+) -> np.ndarray:
+    """
+    Smooth average ratings towards a prior, so a 5.0 from 2 reviews does not beat a 4.6 from 2000.
+
+    Args:
+        average_rating (np.ndarray): Average rating of each product
+        rating_number (np.ndarray): Number of ratings of each product
+        prior_rating (float): Rating assumed for a product without reviews
+        prior_count (float): Number of reviews the prior is worth
+
+    Returns:
+        np.ndarray: The smoothed ratings
+    """
+    return (prior_count * prior_rating + rating_number * average_rating) / (prior_count + rating_number)
+
+
+def rank_products(
+    products: List[Dict[str, Any]],
+    similarity_weight: Optional[float] = None,
+    rating_weight: Optional[float] = None,
+    reviews_weight: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Rank products without the LLM, vectorized over the candidates:
+        score = similarity_weight * similarity
+              + rating_weight * bayesian rating / 5
+              + reviews_weight * log(1 + reviews) / log(1 + most reviews of the candidates)
+    Deterministic: ties keep the search order.
+
+    Args:
+        products (List[Dict[str, Any]]): The candidates in search order
+        similarity_weight (Optional[float]): Weight of the query similarity, the setting if None
+        rating_weight (Optional[float]): Weight of the smoothed rating, the setting if None
+        reviews_weight (Optional[float]): Weight of the review count, the setting if None
+
+    Returns:
+        List[Dict[str, Any]]: New product dicts with their rank and rerank_score, best first
+    """
+    if not products:
+        return []
+
+    similarity_weight = settings.RERANK_FALLBACK_SIMILARITY_WEIGHT if similarity_weight is None else similarity_weight
+    rating_weight = settings.RERANK_FALLBACK_RATING_WEIGHT if rating_weight is None else rating_weight
+    reviews_weight = settings.RERANK_FALLBACK_REVIEWS_WEIGHT if reviews_weight is None else reviews_weight
+
+    def column(key: str) -> np.ndarray:
+        return np.array(
+            [p.get(key) if p.get(key) is not None else np.nan for p in products], dtype=np.float64
+        )
+
+    # Full-text only hits of the hybrid search have no similarity, they rank as the least similar hit
+    similarity = column("similarity")
+    similarity = np.nan_to_num(
+        similarity, nan=np.nanmin(similarity) if not np.isnan(similarity).all() else 0.0
+    )
+    rating_number = np.clip(np.nan_to_num(column("rating_number"), nan=0.0), 0, None)
+    average_rating = np.nan_to_num(column("average_rating"), nan=settings.RERANK_FALLBACK_PRIOR_RATING)
+
+    rating = bayesian_rating(
+        average_rating,
+        rating_number,
+        settings.RERANK_FALLBACK_PRIOR_RATING,
+        settings.RERANK_FALLBACK_PRIOR_COUNT,
+    ) / 5
+    most_reviews = rating_number.max()
+    reviews = np.log1p(rating_number) / np.log1p(most_reviews) if most_reviews > 0 else np.zeros_like(rating_number)
+
+    scores = similarity_weight * similarity + rating_weight * rating + reviews_weight * reviews
+    order = np.argsort(-scores, kind="stable")
+    return [
+        {**products[i], "rank": rank, "rerank_score": round(float(scores[i]), 4)}
+        for rank, i in enumerate(order, start=1)
+    ]
+
+
+class RankerStats:
+    """
+    Counters of the rankers that produced the reranked lists: the LLM, or the local fallback
+    ranker with the reason it took over (timeout, error, invalid_output).
+    """
+
+    def __init__(self):
+        """
+        Constructor for RankerStats class.
+        """
+        self.llm = 0
+        self.fallback = 0
+        self.fallback_reasons: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record_llm(self) -> None:
+        """
+        Count a list ranked by the LLM.
+        """
+        with self._lock:
+            self.llm += 1
+
+    def record_fallback(self, reason: str) -> None:
+        """
+        Count a list ranked by the fallback ranker.
+
+        Args:
+            reason (str): Why the LLM ranking was not used
+        """
+        with self._lock:
+            self.fallback += 1
+            self.fallback_reasons[reason] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the ranker counters.
+
+        Returns:
+            Dict[str, Any]: Lists ranked by each ranker, the fallback ratio and reasons
+        """
+        total = self.llm + self.fallback
+        return {
+            "llm": self.llm,
+            "fallback": self.fallback,
+            "fallback_ratio": round(self.fallback / total, 4) if total else 0.0,
+            "fallback_reasons": dict(self.fallback_reasons),
+        }
+
+
+@lru_cache(maxsize=1)
+def get_ranker_stats() -> RankerStats:
+    """
+    Initialize the process-wide ranker counters and save them in the cache.
+
+    Returns:
+        RankerStats: The ranker counters.
+    """
+    return RankerStats()
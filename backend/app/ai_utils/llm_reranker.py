@@ -1,8 +1,21 @@
-import os
-import json
+import asyncio
+import time
+from typing import Any, Callable, Optional
 from dotenv import load_dotenv
-from app.clients.openai_client import get_openai_client
+from openai import APITimeoutError
+from app.clients.openai_client import get_openai_client, get_async_openai_client
+from app.ai_utils.fallback_ranker import get_ranker_stats, rank_products
+from app.ai_utils.prompt_compaction import (
+    ALIAS_PREFIXES,
+    CANDIDATE_COLUMNS,
+    compact_candidates,
+    log_token_usage,
+    resolve_aliases,
+)
 from app.config.settings import Settings
+from app.ai_utils.rerank_cache import RerankCache, get_rerank_cache
+from app.ai_utils.rerank_cascade import get_cascade_stats, get_cascade_tiers, get_escalation_reason
+from app.ai_utils.rerank_stream import IncrementalRerankParser, build_rerank_output_format
 from app.utils.logger import setup_logger
 
 logger = setup_logger("llm_reranker")
@@ -11,61 +24,103 @@ load_dotenv()
 
 settings = Settings()
 
+rerank_cache = get_rerank_cache()
+
 
 def build_rerank_prompt(
     query: str,
-    summarized_product_details: list[dict],
+    candidates: str,
 ) -> str:
     """
     Build the prompt for the LLM to rerank the products.
 
     Args:
         query (str): The user's query.
-        summarized_product_details (list[dict]): The summarized product details.
+        candidates (str): The candidate rows of compact_candidates.
 
     Returns:
         str: The prompt for the LLM to rerank the products.
     """
-    
     logger.info("Building rerank prompt", extra={
         "query": query,
-        "num_products": len(summarized_product_details)
+        "num_products": candidates.count("\n") + 1 if candidates else 0
     })
-    return f"""
-        ## USER QUERY
-        {query}
-
-        ## CANDIDATE PRODUCTS
-        Top 10 relevant items:
-        {summarized_product_details}
-
-        ## TASK
-        1. Re-rank the candidates in order of relevance to the user's query.
-        2. Prioritize products with high average rating and high rating number.
-        3. Rank 1 = most relevant. Use ties only if scores are identical.
-        4. IMPORTANT: You MUST use the EXACT product IDs from the input data. Do not generate new IDs.
-        5. Generate a reason for recommending this product to encourage the user to purchase it.
-    
-        ## OUTPUT FORMAT
-        (return **exactly** this JSON structure)
-        {{
-        "reranked_results": [
-            {{
-            "id": "EXACT_ID_FROM_INPUT",  // Must match an ID from the input data
-            "rank": 1,
-            "rerank_score": 0.95,
-            "reason": "Reason for recommending this product to encourage the user to purchase it."
-            }}
-            /* repeat for each product */
-        ],
-        "query_understanding": "Summary of what the user is looking for",
-        }}
-
-        Rules:
-        - Do **not** add extra keys, comments, or trailing commas in the final JSON.
-        - You MUST use the EXACT product IDs from the input data. Do not generate new IDs.
-        - The system will verify that all IDs match the input data.
+    return f"""## USER QUERY
+{query}
+
+## CANDIDATES (tab-separated)
+{CANDIDATE_COLUMNS}
+{candidates}
+
+## TASK
+1. Re-rank the candidates in order of relevance to the user's query.
+2. Prioritize products with high rating and many reviews.
+3. Rank 1 = most relevant. Use ties only if scores are identical.
+4. Give a reason of at most 20 words encouraging the user to purchase the product.
+
+## OUTPUT
+JSON, "id" is the exact ref of the candidate:
+{{"reranked_results": [{{"id": "i1", "rank": 1, "rerank_score": 0.95, "reason": "..."}}]}}
+"""
+
+
+# Section title of each stock table in the combined rerank prompt
+STOCK_STATUS_SECTIONS = {
+    "in_stock": "IN-STOCK CANDIDATES",
+    "out_of_stock": "OUT-OF-STOCK CANDIDATES",
+}
+
+
+def build_combined_rerank_prompt(
+    query: str,
+    candidates_by_status: dict[str, str],
+) -> str:
     """
+    Build the prompt for the LLM to rerank the products of several stock tables in one call.
+    The instructions are sent once and each table's candidates get their own section and
+    output list, so the two rankings stay independent.
+
+    Args:
+        query (str): The user's query.
+        candidates_by_status (dict[str, str]): The candidate rows of compact_candidates of each
+            stock status.
+
+    Returns:
+        str: The prompt for the LLM to rerank the products.
+    """
+    logger.info("Building combined rerank prompt", extra={
+        "query": query,
+        "num_products": {
+            stock_status: candidates.count("\n") + 1 if candidates else 0
+            for stock_status, candidates in candidates_by_status.items()
+        }
+    })
+    candidate_sections = "\n\n".join(
+        f"""### {STOCK_STATUS_SECTIONS[stock_status]} (output key "{stock_status}")
+{candidates}"""
+        for stock_status, candidates in candidates_by_status.items()
+    )
+    output_lists = ", ".join(
+        f""""{stock_status}": [{{"id": "{ALIAS_PREFIXES[stock_status]}1", "rank": 1, "rerank_score": 0.95, "reason": "..."}}]"""
+        for stock_status in candidates_by_status
+    )
+    return f"""## USER QUERY
+{query}
+
+## CANDIDATES (tab-separated, columns: {CANDIDATE_COLUMNS.replace(chr(9), ", ")})
+{candidate_sections}
+
+## TASK
+1. Re-rank the candidates of EACH section separately, in order of relevance to the user's query.
+2. Prioritize products with high rating and many reviews.
+3. Rank 1 = most relevant within its section. Use ties only if scores are identical.
+4. Never move a candidate to another section's list.
+5. Give a reason of at most 20 words encouraging the user to purchase the product.
+
+## OUTPUT
+JSON, "id" is the exact ref of the candidate:
+{{{output_lists}}}
+"""
 
 
 def merge_reranked_with_all_relevant_products(
@@ -129,11 +184,275 @@ def merge_reranked_with_all_relevant_products(
     return results
 
 
+def parse_reranked_items(output_text: str) -> list[dict] | None:
+    """
+    Parse and validate the reranked items from the LLM output.
+    Items are validated one by one, so a malformed item or tail only loses itself.
+
+    Args:
+        output_text (str): The raw text returned by the LLM.
+
+    Returns:
+        list[dict] | None: The valid reranked items, or None if the output has none.
+    """
+    parser = IncrementalRerankParser(["reranked_results"])
+    reranked_items = [item for _, item in parser.feed(output_text)]
+    if not reranked_items:
+        logger.error("Failed to parse LLM response", extra={
+            "invalid_items": parser.invalid_items,
+            "raw_response": output_text[:200]
+        })
+        return None
+
+    logger.info("LLM response parsed successfully", extra={
+        "reranked_items_count": len(reranked_items),
+        "invalid_items": parser.invalid_items
+    })
+    return reranked_items
+
+
+def fallback_rerank(products_search_results: list[dict], reason: str) -> list[dict]:
+    """
+    Rank the products with the local fallback ranker instead of the LLM.
+
+    Args:
+        products_search_results (list[dict]): The list of products to rerank.
+        reason (str): Why the LLM ranking is not used: "timeout", "error" or "invalid_output".
+
+    Returns:
+        list[dict]: The products ranked by similarity, smoothed rating and review count.
+    """
+    logger.warning("Reranking with the fallback ranker", extra={
+        "reason": reason,
+        "num_products": len(products_search_results)
+    })
+    get_ranker_stats().record_fallback(reason)
+    return [
+        {**product, "ranker": "fallback"} for product in rank_products(products_search_results)
+    ]
+
+
+def fallback_reason(error: Exception) -> str:
+    """Fallback reason of a failed LLM call"""
+    return "timeout" if isinstance(error, (TimeoutError, APITimeoutError)) else "error"
+
+
+def apply_reranked_items(
+    reranked_items: list[dict] | None, products_search_results: list[dict]
+) -> list[dict]:
+    """
+    Merge the reranked items with their products metadata.
+    Falls back to the local ranker if the LLM output could not be parsed or matched no candidate.
+
+    Args:
+        reranked_items (list[dict] | None): The reranked items, None if parsing failed.
+        products_search_results (list[dict]): The list of products that were reranked.
+
+    Returns:
+        list[dict]: The reranked products.
+    """
+    if reranked_items is None:
+        return fallback_rerank(products_search_results, "invalid_output")
+
+    merged_results = merge_reranked_with_all_relevant_products(
+        reranked_items, products_search_results
+    )
+    if not merged_results and products_search_results:
+        return fallback_rerank(products_search_results, "invalid_output")
+
+    logger.info("Reranking completed successfully", extra={
+        "final_results_count": len(merged_results)
+    })
+
+    get_ranker_stats().record_llm()
+    return [{**product, "ranker": "llm"} for product in merged_results]
+
+
+def apply_partial_reranked_items(
+    reranked_items: list[dict], products_search_results: list[dict], reason: str
+) -> list[dict]:
+    """
+    Merge the items the LLM ranked before its stream failed or missed the deadline, then rank the
+    candidates it did not reach with the local fallback ranker, after them.
+
+    Args:
+        reranked_items (list[dict]): The reranked items received before the failure.
+        products_search_results (list[dict]): The list of products that were reranked.
+        reason (str): Why the stream did not complete: "timeout" or "error".
+
+    Returns:
+        list[dict]: The reranked products.
+    """
+    ranked = merge_reranked_with_all_relevant_products(reranked_items, products_search_results)
+    if not ranked:
+        return fallback_rerank(products_search_results, reason)
+
+    logger.warning("Reranking completed from a partial LLM output", extra={
+        "reason": reason,
+        "llm_ranked": len(ranked),
+        "num_products": len(products_search_results)
+    })
+    get_ranker_stats().record_fallback(f"partial_{reason}")
+
+    ranked_ids = {product["id"] for product in ranked}
+    last_rank = max(product.get("rank", 0) for product in ranked)
+    remaining = rank_products([p for p in products_search_results if p["id"] not in ranked_ids])
+    return [{**product, "ranker": "llm"} for product in ranked] + [
+        {**product, "rank": last_rank + product["rank"], "ranker": "fallback"} for product in remaining
+    ]
+
+
+async def stream_reranked_items(
+    openai_client: Any,
+    model: str,
+    prompt: str,
+    parser: IncrementalRerankParser,
+    on_item: Optional[Callable[[str, dict], None]] = None,
+) -> Any:
+    """
+    Stream a schema-constrained rerank response into the incremental parser.
+    The parser is owned by the caller, so the items received before a timeout are kept.
+
+    Args:
+        openai_client (Any): The async OpenAI client.
+        model (str): The reranker model.
+        prompt (str): The rerank prompt.
+        parser (IncrementalRerankParser): The parser of the ranked lists.
+        on_item (Optional[Callable[[str, dict], None]]): Called with the list key and each valid item
+            as soon as it is parsed.
+
+    Returns:
+        Any: The completed response, for its token usage, None if the stream ended without it.
+    """
+    stream = await openai_client.responses.create(
+        model=model,
+        input=prompt,
+        temperature=settings.LLM_RERANKER_TEMPERATURE,
+        top_p=settings.LLM_RERANKER_TOP_P,
+        text={"format": build_rerank_output_format(list(parser.items))},
+        stream=True,
+    )
+    completed_response = None
+    async for event in stream:
+        if event.type == "response.output_text.delta":
+            for list_key, item in parser.feed(event.delta):
+                if on_item is not None:
+                    on_item(list_key, item)
+        elif event.type == "response.completed":
+            completed_response = event.response
+    return completed_response
+
+
+async def run_rerank_tier(
+    openai_client: Any,
+    tier: tuple[str, str],
+    prompt: str,
+    parser: IncrementalRerankParser,
+    deadline: float,
+    stock_status: Any,
+    on_item: Optional[Callable[[str, dict], None]] = None,
+) -> Exception | None:
+    """
+    Stream the rerank of one cascade tier into the parser, within what is left of the deadline.
+    The call is counted in the cascade stats with its latency, failed calls included.
+
+    Args:
+        openai_client (Any): The async OpenAI client.
+        tier (tuple[str, str]): The tier name and model of get_cascade_tiers.
+        prompt (str): The rerank prompt.
+        parser (IncrementalRerankParser): The parser of the ranked lists.
+        deadline (float): The time.perf_counter() value by which the rerank must be complete.
+        stock_status (Any): The stock status (or statuses) of the reranked candidates.
+        on_item (Optional[Callable[[str, dict], None]]): Called with the list key and each valid item
+            as soon as it is parsed.
+
+    Returns:
+        Exception | None: The error that interrupted the call, None if it completed.
+    """
+    tier_name, model = tier
+    logger.info("Sending request to LLM", extra={
+        "tier": tier_name,
+        "model": model,
+        "temperature": settings.LLM_RERANKER_TEMPERATURE,
+        "top_p": settings.LLM_RERANKER_TOP_P
+    })
+
+    start = time.perf_counter()
+    try:
+        response = await asyncio.wait_for(
+            stream_reranked_items(openai_client, model, prompt, parser, on_item),
+            timeout=max(deadline - start, 0),
+        )
+    except Exception as e:
+        logger.error("Rerank call failed", extra={
+            "tier": tier_name,
+            "error": str(e),
+            "error_type": type(e).__name__,
+            "received_items": parser.num_items,
+            "stock_status": stock_status
+        })
+        return e
+    finally:
+        get_cascade_stats().record_call(tier_name, time.perf_counter() - start)
+
+    log_token_usage(response, prompt, parser.text, time.perf_counter() - start, stock_status, model)
+    return None
+
+
+def get_cached_reranked_items(
+    query: str, stock_status: str, products_search_results: list[dict], tiers: list[tuple[str, str]]
+) -> list[dict] | None:
+    """
+    Get the cached ranking of an identical query and candidate set, made by one of the tiers the
+    request may go through, the larger model's first.
+
+    Args:
+        query (str): The user's query.
+        stock_status (str): The stock status of the products.
+        products_search_results (list[dict]): The list of products to rerank.
+        tiers (list[tuple[str, str]]): The tiers of get_cascade_tiers.
+
+    Returns:
+        list[dict] | None: The cached reranked items, None on a miss.
+    """
+    if not settings.RERANK_CACHE_ENABLED:
+        return None
+
+    product_ids = [p["id"] for p in products_search_results]
+    for _, model in reversed(tiers):
+        cached_items = rerank_cache.get(RerankCache.make_key(query, stock_status, model, product_ids))
+        if cached_items is not None:
+            logger.info("Rerank served from cache", extra={"stock_status": stock_status, "model": model})
+            return cached_items
+    return None
+
+
+def cache_reranked_items(
+    query: str, stock_status: str, products_search_results: list[dict], model: str, reranked_items: list[dict]
+) -> None:
+    """Cache a complete ranking under the model that made it"""
+    if reranked_items and settings.RERANK_CACHE_ENABLED:
+        rerank_cache.set(
+            RerankCache.make_key(query, stock_status, model, [p["id"] for p in products_search_results]),
+            reranked_items,
+        )
+
+
+def log_escalation(reason: str, stock_status: Any) -> None:
+    """Count a ranking of the fast tier sent to the larger model"""
+    logger.info("Escalating rerank to the larger model", extra={
+        "reason": reason,
+        "stock_status": stock_status
+    })
+    get_cascade_stats().record_escalation(reason)
+
+
 def rerank_search_results(
     products_search_results: list[dict], stock_status: str, query: str
 ) -> list[dict]:
     """
     Rerank the search results based on the user's query.
+    The candidates go through the model cascade of get_cascade_tiers, like the async reranker.
 
     Args:
         products_search_results (list[dict]): The list of products to rerank.
@@ -150,72 +469,192 @@ def rerank_search_results(
             "num_products": len(products_search_results)
         })
 
+        # Reuse the ranking of an identical query and candidate set
+        tiers = get_cascade_tiers()
+        cached_items = get_cached_reranked_items(query, stock_status, products_search_results, tiers)
+        if cached_items is not None:
+            return apply_reranked_items(cached_items, products_search_results)
+
         openai_client = get_openai_client()
 
-        # Extract important product details for the LLM to rerank the products
-        summarized_product_details = [
-            {
-                "id": p["id"],
-                "title": p["title"],
-                "similarity": p.get("similarity", 0),
-                "features": p.get("features", []),
-                "details": p.get("details", []),
-                "average_rating": p.get("average_rating", 0),
-                "rating_number": p.get("rating_number", 0),
-                "price": float(p.get("price", 0.0)) if p.get("price") is not None else 0.0,
-                "reason": p.get("reason", "")
-            }
-            for p in products_search_results
-        ]
-
-        logger.info("Product details summarized", extra={
-            "summarized_count": len(summarized_product_details)
-        })
+        deadline = time.perf_counter() + settings.RERANK_TIMEOUT_SECONDS
+        reranked_items, ranked_by = [], None
+        for tier_name, model in tiers:
+            # Compact the candidates to a token budget of the tier's model, under short aliases
+            # instead of their ids
+            candidates, aliases = compact_candidates(products_search_results, stock_status, model=model)
+
+            # Build the prompt for the LLM to rerank the products
+            prompt = build_rerank_prompt(query, candidates)
+
+            logger.info("Sending request to LLM", extra={
+                "tier": tier_name,
+                "model": model,
+                "temperature": settings.LLM_RERANKER_TEMPERATURE,
+                "top_p": settings.LLM_RERANKER_TOP_P
+            })
 
+            start = time.perf_counter()
+            try:
+                if deadline <= start:
+                    raise TimeoutError("Rerank deadline reached")
+                response = openai_client.responses.create(
+                    model=model,
+                    input=prompt,
+                    temperature=settings.LLM_RERANKER_TEMPERATURE,
+                    top_p=settings.LLM_RERANKER_TOP_P,
+                    text={"format": build_rerank_output_format(["reranked_results"])},
+                    timeout=deadline - start,
+                )
+            except Exception:
+                if not reranked_items:
+                    raise
+                # The escalation failed, the fast tier's ranking stands but is not cached
+                get_cascade_stats().record_escalation_failure()
+                ranked_by = None
+                break
+            finally:
+                get_cascade_stats().record_call(tier_name, time.perf_counter() - start)
+            log_token_usage(
+                response, prompt, response.output_text, time.perf_counter() - start, stock_status, model
+            )
 
-        # Build the prompt for the LLM to rerank the products
-        prompt = build_rerank_prompt(query, summarized_product_details)
+            items = resolve_aliases(parse_reranked_items(response.output_text) or [], aliases)
+            if not items and reranked_items:
+                # The escalation returned no valid item, the fast tier's ranking stands but is not cached
+                get_cascade_stats().record_escalation_failure()
+                ranked_by = None
+                break
+            reranked_items, ranked_by = items, model
+            if (tier_name, model) == tiers[-1]:
+                break
+            escalation_reason = get_escalation_reason(reranked_items)
+            if escalation_reason is None:
+                break
+            log_escalation(escalation_reason, stock_status)
+
+        if ranked_by is not None:
+            cache_reranked_items(query, stock_status, products_search_results, ranked_by, reranked_items)
+        return apply_reranked_items(reranked_items, products_search_results)
 
-        # Call the LLM to rerank the products
-        logger.info("Sending request to LLM", extra={
-            "model": os.getenv("PRODUCT_RECOMMENDATION_RERANKER_MODEL"),
-            "temperature": settings.LLM_RERANKER_TEMPERATURE,
-            "top_p": settings.LLM_RERANKER_TOP_P
+    except Exception as e:
+        logger.error("Reranking failed", extra={
+            "error": str(e),
+            "error_type": type(e).__name__,
+            "query": query,
+            "stock_status": stock_status
         })
+        return fallback_rerank(products_search_results, fallback_reason(e))
 
-        response = openai_client.responses.create(
-            model=settings.IMAGE_FEATURE_EXTRACTION_MODEL,
-            input=prompt,
-            temperature=settings.LLM_RERANKER_TEMPERATURE,
-            top_p=settings.LLM_RERANKER_TOP_P,
-        )
 
-        try:
-            parsed_output = json.loads(response.output_text)
-            reranked_items = parsed_output.get("reranked_results", [])
+async def rerank_search_results_async(
+    products_search_results: list[dict],
+    stock_status: str,
+    query: str,
+    on_item: Optional[Callable[[dict], None]] = None,
+    high_value: bool = False,
+) -> list[dict]:
+    """
+    Rerank the search results based on the user's query using the async OpenAI client,
+    so several reranks can be awaited concurrently.
+    The schema-constrained output is streamed and each ranked item validated as it arrives: the
+    items received before the deadline are kept, the candidates the LLM did not reach are ranked
+    after them by the fallback ranker.
+    The candidates go through the model cascade of get_cascade_tiers: the fast model ranks them
+    and the larger model redoes the ranking when get_escalation_reason finds it unsure. A failed
+    escalation keeps the fast model's ranking.
 
-            logger.info("LLM response parsed successfully", extra={
-                "reranked_items_count": len(reranked_items)
-            })
+    Args:
+        products_search_results (list[dict]): The list of products to rerank.
+        stock_status (str): The stock status of the products.
+        query (str): The user's query.
+        on_item (Optional[Callable[[dict], None]]): Called with each reranked product as soon as
+            the LLM ranked it, before the whole list is complete. Only the first tier that returns
+            items is streamed, an escalated ranking only replaces them in the returned list.
+            Not called for cached rankings.
+        high_value (bool): Send the rerank straight to the larger model.
 
-            # Merged reranked items with their products metadata
-            merged_results = merge_reranked_with_all_relevant_products(
-                reranked_items, products_search_results
-            )
+    Returns:
+        list[dict]: The reranked products.
+    """
+    try:
+        logger.info("Starting search results reranking", extra={
+            "query": query,
+            "stock_status": stock_status,
+            "num_products": len(products_search_results)
+        })
 
-            logger.info("Reranking completed successfully", extra={
-                "final_results_count": len(merged_results)
+        # Reuse the ranking of an identical query and candidate set
+        tiers = get_cascade_tiers(high_value)
+        cached_items = get_cached_reranked_items(query, stock_status, products_search_results, tiers)
+        if cached_items is not None:
+            return apply_reranked_items(cached_items, products_search_results)
+
+        openai_client = get_async_openai_client()
+
+        products_by_id = {int(p["id"]): p for p in products_search_results}
+        emitted_ids = set()
+
+        def emit_item(_, item: dict):
+            """Send a ranked product to on_item as soon as it is parsed"""
+            resolved = resolve_aliases([item], aliases)
+            if on_item is None or not resolved or resolved[0]["id"] in emitted_ids:
+                return
+            product_id = resolved[0]["id"]
+            emitted_ids.add(product_id)
+            on_item({
+                **products_by_id[product_id],
+                "reason": item["reason"],
+                "rank": item["rank"],
+                "rerank_score": item["rerank_score"],
+                "ranker": "llm",
             })
 
-            return merged_results
-
-        except json.JSONDecodeError as e:
-            logger.error("Failed to parse LLM response", extra={
-                "error": str(e),
-                "error_type": "JSONDecodeError",
-                "raw_response": response.output_text[:200] 
-            })
-            return products_search_results
+        # The LLM streams are abandoned at the deadline, the items parsed so far are kept
+        deadline = time.perf_counter() + settings.RERANK_TIMEOUT_SECONDS
+        reranked_items, ranked_by = [], None
+        for tier in tiers:
+            # Compact the candidates to a token budget of the tier's model, under short aliases
+            # instead of their ids. The aliases only depend on the search order.
+            candidates, aliases = compact_candidates(products_search_results, stock_status, model=tier[1])
+
+            # Build the prompt for the LLM to rerank the products
+            prompt = build_rerank_prompt(query, candidates)
+
+            parser = IncrementalRerankParser(["reranked_results"])
+            error = await run_rerank_tier(
+                openai_client, tier, prompt, parser, deadline, stock_status,
+                on_item=emit_item if not emitted_ids else None,
+            )
+            items = resolve_aliases(parser.items["reranked_results"], aliases)
+            # A list closed before the stream failed is a complete ranking
+            if error is not None and "reranked_results" not in parser.completed_lists:
+                if reranked_items:
+                    # The escalation failed, the fast tier's ranking stands but is not cached
+                    get_cascade_stats().record_escalation_failure()
+                    ranked_by = None
+                    break
+                if not items:
+                    raise error
+                return apply_partial_reranked_items(items, products_search_results, fallback_reason(error))
+
+            if not items and reranked_items:
+                # The escalation returned no valid item, the fast tier's ranking stands but is not cached
+                get_cascade_stats().record_escalation_failure()
+                ranked_by = None
+                break
+
+            reranked_items, ranked_by = items, tier[1]
+            if tier == tiers[-1]:
+                break
+            escalation_reason = get_escalation_reason(reranked_items)
+            if escalation_reason is None:
+                break
+            log_escalation(escalation_reason, stock_status)
+
+        if ranked_by is not None:
+            cache_reranked_items(query, stock_status, products_search_results, ranked_by, reranked_items)
+        return apply_reranked_items(reranked_items, products_search_results)
 
     except Exception as e:
         logger.error("Reranking failed", extra={
@@ -224,4 +663,136 @@ def rerank_search_results(
             "query": query,
             "stock_status": stock_status
         })
-        return products_search_results
+        return fallback_rerank(products_search_results, fallback_reason(e))
+
+
+async def rerank_stock_tables_async(
+    in_stock_results: list[dict],
+    out_of_stock_results: list[dict],
+    query: str,
+    high_value: bool = False,
+) -> tuple[list[dict], list[dict]]:
+    """
+    Rerank the search results of both stock tables.
+    With RERANK_MODE "combined" both candidate sets are sent in one LLM call, halving the calls
+    and the instruction tokens. Each returned list is validated against its own table's candidates
+    by merge_reranked_with_all_relevant_products, and cached under the same key as a per-table
+    rerank. A table served from the rerank cache leaves a per-table call for the other one.
+    With RERANK_MODE "per_table" each table is reranked by its own concurrent call.
+    Each table goes through the model cascade: the tables whose fast ranking is unsure are
+    reranked again together by the larger model.
+
+    Args:
+        in_stock_results (list[dict]): The in-stock products to rerank.
+        out_of_stock_results (list[dict]): The out-of-stock products to rerank.
+        query (str): The user's query.
+        high_value (bool): Send the rerank straight to the larger model.
+
+    Returns:
+        tuple[list[dict], list[dict]]: The reranked in-stock and out-of-stock products.
+    """
+    if settings.RERANK_MODE != "combined":
+        return tuple(await asyncio.gather(
+            rerank_search_results_async(in_stock_results, "in_stock", query, high_value=high_value),
+            rerank_search_results_async(out_of_stock_results, "out_of_stock", query, high_value=high_value),
+        ))
+
+    tiers = get_cascade_tiers(high_value)
+    products_by_status = {"in_stock": in_stock_results, "out_of_stock": out_of_stock_results}
+    results, pending = {}, {}
+    for stock_status, products in products_by_status.items():
+        if not products:
+            results[stock_status] = products
+            continue
+
+        cached_items = get_cached_reranked_items(query, stock_status, products, tiers)
+        if cached_items is not None:
+            results[stock_status] = apply_reranked_items(cached_items, products)
+        else:
+            pending[stock_status] = products
+
+    if len(pending) == 1:
+        # A single table left, its own prompt is shorter than the combined one
+        stock_status, products = next(iter(pending.items()))
+        results[stock_status] = await rerank_search_results_async(
+            products, stock_status, query, high_value=high_value
+        )
+    elif pending:
+        reranked_by_status, ranked_by, failure_reasons = {}, {}, {}
+        try:
+            logger.info("Starting combined search results reranking", extra={
+                "query": query,
+                "num_products": {stock_status: len(p) for stock_status, p in pending.items()}
+            })
+
+            openai_client = get_async_openai_client()
+
+            deadline = time.perf_counter() + settings.RERANK_TIMEOUT_SECONDS
+            tier_statuses = list(pending)
+            for tier in tiers:
+                compacted = {
+                    stock_status: compact_candidates(pending[stock_status], stock_status, model=tier[1])
+                    for stock_status in tier_statuses
+                }
+                prompt = build_combined_rerank_prompt(
+                    query, {stock_status: compacted[stock_status][0] for stock_status in tier_statuses}
+                )
+                parser = IncrementalRerankParser(tier_statuses)
+                error = await run_rerank_tier(openai_client, tier, prompt, parser, deadline, tier_statuses)
+
+                escalated_statuses = []
+                for stock_status in tier_statuses:
+                    items = resolve_aliases(parser.items[stock_status], compacted[stock_status][1])
+                    # The lists are streamed one after the other, those closed before the
+                    # stream failed are complete rankings
+                    if error is not None and stock_status not in parser.completed_lists:
+                        if reranked_by_status.get(stock_status):
+                            # The escalation failed, the fast tier's ranking stands but is not cached
+                            get_cascade_stats().record_escalation_failure()
+                            ranked_by[stock_status] = None
+                        else:
+                            reranked_by_status[stock_status] = items
+                            failure_reasons[stock_status] = fallback_reason(error)
+                        continue
+
+                    if not items and reranked_by_status.get(stock_status):
+                        # The escalation returned no valid item, the fast tier's ranking stands
+                        get_cascade_stats().record_escalation_failure()
+                        ranked_by[stock_status] = None
+                        continue
+
+                    reranked_by_status[stock_status], ranked_by[stock_status] = items, tier[1]
+                    escalation_reason = get_escalation_reason(items) if tier != tiers[-1] else None
+                    if escalation_reason is not None:
+                        log_escalation(escalation_reason, stock_status)
+                        escalated_statuses.append(stock_status)
+
+                tier_statuses = escalated_statuses
+                if not tier_statuses:
+                    break
+
+        except Exception as e:
+            logger.error("Reranking failed", extra={
+                "error": str(e),
+                "error_type": type(e).__name__,
+                "query": query,
+                "stock_status": list(pending)
+            })
+            for stock_status in pending:
+                if stock_status not in reranked_by_status:
+                    reranked_by_status[stock_status] = []
+                    failure_reasons[stock_status] = fallback_reason(e)
+
+        for stock_status, products in pending.items():
+            reranked_items = reranked_by_status[stock_status]
+            if stock_status in failure_reasons:
+                results[stock_status] = apply_partial_reranked_items(
+                    reranked_items, products, failure_reasons[stock_status]
+                )
+                continue
+
+            if ranked_by.get(stock_status) is not None:
+                cache_reranked_items(query, stock_status, products, ranked_by[stock_status], reranked_items)
+            results[stock_status] = apply_reranked_items(reranked_items, products)
+
+    return results["in_stock"], results["out_of_stock"]
@@ -0,0 +1,254 @@
+import base64
+import binascii
+import json
+import secrets
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+from app.config.settings import Settings
+from app.database.catalog_events import subscribe
+from app.utils.cache import LRUCache
+from app.utils.logger import setup_logger
+
+settings = Settings()
+
+logger = setup_logger("page_cache")
+
+# Stock status of each buffered result list and the table holding its products
+STOCK_STATUS_TABLES = {
+    "in_stock": settings.IN_STOCK_PRODUCTS_TABLE_NAME,
+    "out_of_stock": settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME,
+}
+
+
+def encode_cursor(buffer_id: str, offset: int) -> str:
+    """
+    Build the opaque cursor of a result page.
+
+    Args:
+        buffer_id (str): Id of the buffered candidates of the search
+        offset (int): Position of the first product of the page in each stock table
+
+    Returns:
+        str: The cursor
+    """
+    payload = json.dumps({"b": buffer_id, "o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Parse a cursor built by encode_cursor.
+
+    Args:
+        cursor (str): The cursor
+
+    Returns:
+        Tuple[str, int]: The buffer id and the offset of the page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        buffer_id, offset = payload["b"], payload["o"]
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+        raise ValueError("Invalid page cursor.")
+
+    if not isinstance(buffer_id, str) or not isinstance(offset, int) or offset < 0:
+        raise ValueError("Invalid page cursor.")
+    return buffer_id, offset
+
+
+class SearchPageCache:
+    """
+    Short-lived buffer of the search candidates behind the pages of a paginated search.
+    The first page retrieves SEARCH_PAGE_BUFFER_SIZE candidates per table in one search, reranks
+    the first top_k and buffers the rest, so later pages are slices of the buffer: no embedding,
+    database or LLM call, and no OFFSET rescan of the ANN index.
+
+    Buffers are dropped when any of their products changes, the client then runs the search again.
+
+    Attributes:
+        entries (LRUCache): The buffered candidates by buffer id
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: Optional[float] = None):
+        """
+        Constructor for SearchPageCache class.
+
+        Args:
+            max_size (int): Maximum number of buffered searches
+            ttl_seconds (Optional[float]): Seconds a buffer stays valid, None for no expiry
+        """
+        self.entries = LRUCache(
+            max_size=max_size, ttl_seconds=ttl_seconds, on_evict=self._unindex
+        )
+        self.invalidations = 0
+        self.pages_served = 0
+        # (table name, product id) -> ids of the buffers containing the product
+        self._buffers_by_product: Dict[Tuple[str, int], Set[Hashable]] = {}
+        self._index_lock = threading.Lock()
+
+    def store(
+        self,
+        in_stock_results: List[Dict[str, Any]],
+        out_of_stock_results: List[Dict[str, Any]],
+        page_size: int,
+    ) -> Optional[str]:
+        """
+        Buffer the candidates of a search whose first page_size products per table were served.
+
+        Args:
+            in_stock_results (List[Dict[str, Any]]): The in-stock candidates, in search order
+            out_of_stock_results (List[Dict[str, Any]]): The out-of-stock candidates, in search order
+            page_size (int): Number of products per table in a page
+
+        Returns:
+            Optional[str]: The cursor of the second page, None if there is no second page
+        """
+        buffer = {
+            "page_size": page_size,
+            "in_stock": in_stock_results,
+            "out_of_stock": out_of_stock_results,
+        }
+        if not self._has_page(buffer, page_size):
+            return None
+
+        buffer_id = secrets.token_urlsafe(12)
+        self._index(buffer_id, buffer)
+        self.entries.set(buffer_id, buffer)
+        return encode_cursor(buffer_id, page_size)
+
+    def get_page(
+        self, cursor: str
+    ) -> Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[str]]]:
+        """
+        Get a page of a buffered search.
+
+        Args:
+            cursor (str): The cursor of the page
+
+        Returns:
+            Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[str]]]: The in-stock
+                and out-of-stock products of the page and the cursor of the next page,
+                or None if the buffer expired or was invalidated
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        buffer_id, offset = decode_cursor(cursor)
+        buffer = self.entries.get(buffer_id)
+        if buffer is None:
+            return None
+
+        end = offset + buffer["page_size"]
+        in_stock_page = [dict(p) for p in buffer["in_stock"][offset:end]]
+        out_of_stock_page = [dict(p) for p in buffer["out_of_stock"][offset:end]]
+        next_cursor = encode_cursor(buffer_id, end) if self._has_page(buffer, end) else None
+        self.pages_served += 1
+        return in_stock_page, out_of_stock_page, next_cursor
+
+    @staticmethod
+    def _has_page(buffer: Dict[str, Any], offset: int) -> bool:
+        return len(buffer["in_stock"]) > offset or len(buffer["out_of_stock"]) > offset
+
+    @staticmethod
+    def _product_keys(buffer: Dict[str, Any]) -> List[Tuple[str, int]]:
+        return [
+            (table_name, int(product["id"]))
+            for stock_status, table_name in STOCK_STATUS_TABLES.items()
+            for product in buffer[stock_status]
+        ]
+
+    def _index(self, buffer_id: Hashable, buffer: Dict[str, Any]) -> None:
+        with self._index_lock:
+            for product_key in self._product_keys(buffer):
+                self._buffers_by_product.setdefault(product_key, set()).add(buffer_id)
+
+    def _unindex(self, buffer_id: Hashable, buffer: Optional[Dict[str, Any]]) -> None:
+        if buffer is None:
+            return
+        with self._index_lock:
+            for product_key in self._product_keys(buffer):
+                buffer_ids = self._buffers_by_product.get(product_key)
+                if buffer_ids is not None:
+                    buffer_ids.discard(buffer_id)
+                    if not buffer_ids:
+                        del self._buffers_by_product[product_key]
+
+    def invalidate(self, table_name: str, product_ids: Optional[List[int]] = None) -> None:
+        """
+        Drop the buffers containing changed products.
+        New products (product_ids is None) would change the ranking of every search of the table,
+        and every buffered search covers both stock tables, so all buffers are dropped unless the
+        table is not a stock table.
+
+        Args:
+            table_name (str): Name of the products table
+            product_ids (Optional[List[int]]): Ids of the changed products, None for the whole table
+        """
+        if product_ids is None:
+            dropped = 0
+            if table_name in STOCK_STATUS_TABLES.values():
+                dropped = len(self.entries)
+                self.clear()
+        else:
+            with self._index_lock:
+                buffer_ids = set()
+                for product_id in product_ids:
+                    buffer_ids |= self._buffers_by_product.get((table_name, int(product_id)), set())
+
+            dropped = 0
+            for buffer_id in buffer_ids:
+                buffer = self.entries.get(buffer_id)
+                if self.entries.delete(buffer_id):
+                    dropped += 1
+                self._unindex(buffer_id, buffer)
+        self.invalidations += dropped
+
+        if dropped:
+            logger.info("Search page buffers invalidated", extra={
+                "table_name": table_name,
+                "dropped": dropped
+            })
+
+    def clear(self) -> None:
+        """
+        Remove all buffered searches.
+        """
+        self.entries.clear()
+        with self._index_lock:
+            self._buffers_by_product.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the buffer counters. Hits and misses count the page requests.
+
+        Returns:
+            Dict[str, Any]: Counters of the buffered searches
+        """
+        return {
+            **self.entries.stats(),
+            "pages_served": self.pages_served,
+            "invalidations": self.invalidations,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_search_page_cache() -> SearchPageCache:
+    """
+    Initialize the process-wide search page buffer and save it in the cache.
+    The buffer is subscribed to catalog changes so searches over rewritten products are dropped.
+
+    Returns:
+        SearchPageCache: The search page buffer.
+    """
+    cache = SearchPageCache(
+        max_size=settings.SEARCH_PAGE_CACHE_MAX_SIZE,
+        ttl_seconds=settings.SEARCH_PAGE_TTL_SECONDS,
+    )
+    subscribe(cache.invalidate)
+    return cache
@@ -0,0 +1,217 @@
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import tiktoken
+
+from app.config.settings import Settings
+from app.utils.logger import setup_logger
+
+settings = Settings()
+
+logger = setup_logger("prompt_compaction")
+
+# Characters per token assumed when the tokenizer files are not available
+CHARS_PER_TOKEN = 4
+
+# Tokens kept for a title however small the candidate budget
+MIN_TITLE_TOKENS = 8
+
+# Prefix of the short aliases of each stock table's candidates, so a product moved to the
+# other table's list is detected instead of matching a product with the same id
+ALIAS_PREFIXES = {"in_stock": "i", "out_of_stock": "o"}
+
+# Header of the tab-separated candidate rows
+CANDIDATE_COLUMNS = "ref\tprice\trating\treviews\tsim\ttitle\tfeatures"
+
+
+@lru_cache(maxsize=8)
+def get_encoding(model: str) -> Optional[tiktoken.Encoding]:
+    """
+    Get the tokenizer of a model, counting tokens locally without an API call.
+    The BPE files are downloaded once, set TIKTOKEN_CACHE_DIR to a pre-filled directory to run
+    offline.
+
+    Args:
+        model (str): The model name
+
+    Returns:
+        Optional[tiktoken.Encoding]: The tokenizer, None if it cannot be loaded
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning("Tokenizer unavailable, estimating tokens from characters", extra={
+            "model": model,
+            "error": str(e)
+        })
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Count the tokens of a text with the model's tokenizer.
+
+    Args:
+        text (str): The text
+        model (Optional[str]): The model name, the reranker model if None
+
+    Returns:
+        int: The number of tokens
+    """
+    encoding = get_encoding(model or settings.RERANKER_MODEL_NAME)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """
+    Truncate a text to a number of tokens.
+
+    Args:
+        text (str): The text
+        max_tokens (int): Maximum number of tokens kept
+        model (Optional[str]): The model name, the reranker model if None
+
+    Returns:
+        str: The text, cut after max_tokens tokens
+    """
+    if max_tokens <= 0:
+        return ""
+
+    encoding = get_encoding(model or settings.RERANKER_MODEL_NAME)
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN].rstrip()
+
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens]).rstrip()
+
+
+def clean_field(value: Any) -> str:
+    """Collapse the whitespace of a field so it fits in one tab-separated cell"""
+    return re.sub(r"\s+", " ", str(value or "")).strip()
+
+
+def format_number(value: Any, digits: int) -> str:
+    """Format a number with few digits, "-" if missing"""
+    if value is None:
+        return "-"
+    return f"{float(value):.{digits}f}".rstrip("0").rstrip(".") if digits else str(int(value))
+
+
+def compact_candidates(
+    products: List[Dict[str, Any]],
+    stock_status: str,
+    token_budget: Optional[int] = None,
+    model: Optional[str] = None,
+) -> Tuple[str, Dict[str, int]]:
+    """
+    Render rerank candidates as tab-separated rows within a per-candidate token budget.
+    Each product gets a short alias (i1, i2... for in-stock products) instead of its id. The
+    title takes up to two thirds of the budget left by the numbers, the feature summary the rest.
+
+    Args:
+        products (List[Dict[str, Any]]): The candidates in search order
+        stock_status (str): The stock status of the candidates
+        token_budget (Optional[int]): Tokens per candidate row, RERANK_PROMPT_CANDIDATE_TOKENS if None
+        model (Optional[str]): The model name, the reranker model if None
+
+    Returns:
+        Tuple[str, Dict[str, int]]: The rows, one per line, and the product id of each alias
+    """
+    token_budget = token_budget or settings.RERANK_PROMPT_CANDIDATE_TOKENS
+    prefix = ALIAS_PREFIXES[stock_status]
+
+    rows, aliases = [], {}
+    for i, product in enumerate(products, start=1):
+        alias = f"{prefix}{i}"
+        aliases[alias] = int(product["id"])
+
+        numbers = "\t".join([
+            alias,
+            format_number(product.get("price"), 2),
+            format_number(product.get("average_rating"), 1),
+            format_number(product.get("rating_number"), 0),
+            format_number(product.get("similarity"), 2),
+        ])
+        # The two tabs around the title count against the budget too
+        remaining = token_budget - count_tokens(numbers, model) - 2
+        title = truncate_to_tokens(
+            clean_field(product.get("title")), max(remaining * 2 // 3, MIN_TITLE_TOKENS), model
+        )
+        remaining -= count_tokens(title, model)
+        features = truncate_to_tokens(clean_field(product.get("feature_summary")), remaining, model)
+        rows.append(f"{numbers}\t{title}\t{features}")
+
+    return "\n".join(rows), aliases
+
+
+def resolve_aliases(reranked_items: List[Dict[str, Any]], aliases: Dict[str, int]) -> List[Dict[str, Any]]:
+    """
+    Replace the aliases of the reranked items by their product ids.
+    Items with an unknown alias, including the aliases of another stock table, are dropped.
+
+    Args:
+        reranked_items (List[Dict[str, Any]]): The reranked items returned by the LLM
+        aliases (Dict[str, int]): The product id of each alias
+
+    Returns:
+        List[Dict[str, Any]]: The reranked items with their product ids
+    """
+    resolved = []
+    for item in reranked_items:
+        product_id = aliases.get(str(item.get("id", "")).strip().lower())
+        if product_id is not None:
+            resolved.append({**item, "id": product_id})
+
+    if len(resolved) < len(reranked_items):
+        logger.warning("Reranked items with unknown aliases dropped", extra={
+            "dropped": len(reranked_items) - len(resolved)
+        })
+    return resolved
+
+
+def log_token_usage(
+    response: Any,
+    prompt: str,
+    output_text: str,
+    latency_seconds: float,
+    stock_status: Any,
+    model: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Log the input and output tokens of an LLM call with its latency, to track the latency per token.
+    Uses the usage reported by the API, or counts the tokens locally if it is missing.
+
+    Args:
+        response (Any): The LLM response
+        prompt (str): The prompt sent
+        output_text (str): The text returned
+        latency_seconds (float): Duration of the call
+        stock_status (Any): The stock status (or statuses) of the reranked candidates
+        model (Optional[str]): The model name, the reranker model if None
+
+    Returns:
+        Dict[str, Any]: The logged token counts and latency
+    """
+    usage = getattr(response, "usage", None)
+    input_tokens = getattr(usage, "input_tokens", None)
+    output_tokens = getattr(usage, "output_tokens", None)
+    usage = {
+        "stock_status": stock_status,
+        "model": model or settings.RERANKER_MODEL_NAME,
+        "input_tokens": input_tokens if isinstance(input_tokens, int) else count_tokens(prompt, model),
+        "output_tokens": output_tokens if isinstance(output_tokens, int) else count_tokens(output_text, model),
+        "latency_ms": round(latency_seconds * 1000, 1),
+    }
+    usage["ms_per_output_token"] = (
+        round(usage["latency_ms"] / usage["output_tokens"], 2) if usage["output_tokens"] else None
+    )
+    logger.info("LLM rerank token usage", extra=usage)
+    return usage
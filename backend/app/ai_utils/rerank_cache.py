@@ -0,0 +1,172 @@
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+from app.ai_utils.embedding_cache import normalize_query
+from app.config.settings import Settings
+from app.database.catalog_events import subscribe
+from app.utils.cache import LRUCache
+from app.utils.logger import setup_logger
+
+settings = Settings()
+
+logger = setup_logger("rerank_cache")
+
+# Table holding the candidates of each stock status, used to match catalog change events
+STOCK_STATUS_TABLES = {
+    "in_stock": settings.IN_STOCK_PRODUCTS_TABLE_NAME,
+    "out_of_stock": settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME,
+}
+
+RerankKey = Tuple[str, str, str, Tuple[int, ...]]
+
+
+class RerankCache:
+    """
+    Cache of LLM reranker outputs keyed on the normalized query, the stock status, the model and
+    the ordered candidate ids. Only the ranking (id, rank, rerank_score, reason) is cached and merged
+    with the current product rows, and entries are dropped when any of their candidates changes.
+
+    Attributes:
+        entries (LRUCache): The cached rankings
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: Optional[float] = None):
+        """
+        Constructor for RerankCache class.
+
+        Args:
+            max_size (int): Maximum number of cached rankings
+            ttl_seconds (Optional[float]): Seconds a ranking stays valid, None for no expiry
+        """
+        self.entries = LRUCache(
+            max_size=max_size, ttl_seconds=ttl_seconds, on_evict=self._unindex
+        )
+        self.invalidations = 0
+        # (table name, product id) -> keys of the rankings containing the product
+        self._keys_by_product: Dict[Tuple[str, int], Set[Hashable]] = {}
+        self._index_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        query: str, stock_status: str, model: str, candidate_ids: List[Any]
+    ) -> RerankKey:
+        """
+        Build the cache key of a rerank call.
+
+        Args:
+            query (str): The user's query
+            stock_status (str): The stock status of the candidates
+            model (str): The reranker model name
+            candidate_ids (List[Any]): The candidate ids in similarity order
+
+        Returns:
+            RerankKey: The cache key
+        """
+        return (
+            normalize_query(query),
+            stock_status,
+            model,
+            tuple(int(i) for i in candidate_ids),
+        )
+
+    def get(self, key: RerankKey) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get the cached ranking of a rerank call.
+
+        Args:
+            key (RerankKey): The cache key
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: The reranked items, or None on a miss
+        """
+        return self.entries.get(key)
+
+    def set(self, key: RerankKey, reranked_items: List[Dict[str, Any]]) -> None:
+        """
+        Cache the ranking of a rerank call.
+
+        Args:
+            key (RerankKey): The cache key
+            reranked_items (List[Dict[str, Any]]): The reranked items returned by the LLM
+        """
+        table_name = STOCK_STATUS_TABLES.get(key[1], key[1])
+        with self._index_lock:
+            for product_id in key[3]:
+                self._keys_by_product.setdefault((table_name, product_id), set()).add(key)
+        self.entries.set(key, reranked_items)
+
+    def _unindex(self, key: Hashable, _value: Any) -> None:
+        table_name = STOCK_STATUS_TABLES.get(key[1], key[1])
+        with self._index_lock:
+            for product_id in key[3]:
+                keys = self._keys_by_product.get((table_name, product_id))
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._keys_by_product[(table_name, product_id)]
+
+    def invalidate(self, table_name: str, product_ids: Optional[List[int]] = None) -> None:
+        """
+        Drop the rankings containing changed products.
+        Without product ids the table may have been reloaded, reusing ids for other products,
+        so every ranking of the table is dropped.
+
+        Args:
+            table_name (str): Name of the products table
+            product_ids (Optional[List[int]]): Ids of the changed products, None for the whole table
+        """
+        with self._index_lock:
+            keys = set()
+            if product_ids is None:
+                for (indexed_table, _), product_keys in self._keys_by_product.items():
+                    if indexed_table == table_name:
+                        keys |= product_keys
+            else:
+                for product_id in product_ids:
+                    keys |= self._keys_by_product.get((table_name, int(product_id)), set())
+
+        for key in keys:
+            self.entries.delete(key)
+            self._unindex(key, None)
+        self.invalidations += len(keys)
+
+        if keys:
+            logger.info("Rerank cache invalidated", extra={
+                "table_name": table_name,
+                "dropped": len(keys)
+            })
+
+    def clear(self) -> None:
+        """
+        Remove all cached rankings.
+        """
+        self.entries.clear()
+        with self._index_lock:
+            self._keys_by_product.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dict[str, Any]: Counters of the cached rankings
+        """
+        return {**self.entries.stats(), "invalidations": self.invalidations}
+
+
+@lru_cache(maxsize=1)
+def get_rerank_cache() -> RerankCache:
+    """
+    Initialize the process-wide rerank cache and save it in the cache.
+    The cache is subscribed to catalog changes so rankings of rewritten products are dropped.
+
+    Returns:
+        RerankCache: The rerank cache.
+    """
+    cache = RerankCache(
+        max_size=settings.RERANK_CACHE_MAX_SIZE,
+        ttl_seconds=settings.RERANK_CACHE_TTL_SECONDS,
+    )
+    subscribe(cache.invalidate)
+    return cache
@@ -0,0 +1,152 @@
+import threading
+from collections import Counter, deque
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config.settings import Settings
+
+settings = Settings()
+
+# Tier of the small, fast reranker model, and of the larger one it escalates to
+FAST_TIER = "fast"
+LARGE_TIER = "large"
+
+
+def get_cascade_tiers(high_value: bool = False) -> List[Tuple[str, str]]:
+    """
+    Get the model tiers a rerank goes through, in order.
+    High-value traffic, and every request when RERANK_CASCADE_ENABLED is off, goes straight to
+    the larger model.
+
+    Args:
+        high_value (bool): Whether the request is high-value traffic
+
+    Returns:
+        List[Tuple[str, str]]: The tier name and model name of each tier
+    """
+    large = (LARGE_TIER, settings.RERANKER_ESCALATION_MODEL_NAME)
+    if high_value or not settings.RERANK_CASCADE_ENABLED:
+        return [large]
+    return [(FAST_TIER, settings.RERANKER_MODEL_NAME), large]
+
+
+def get_escalation_reason(reranked_items: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Decide whether a ranking of the fast model should be redone by the larger model:
+        - "invalid_output": no usable item
+        - "low_confidence": the best score is below RERANK_CASCADE_MIN_TOP_SCORE
+        - "close_tie": two of the RERANK_CASCADE_TIE_TOP_N best scores are less than
+          RERANK_CASCADE_MIN_SCORE_GAP apart
+
+    Args:
+        reranked_items (List[Dict[str, Any]]): The reranked items of one stock table
+
+    Returns:
+        Optional[str]: The escalation reason, None if the ranking is kept
+    """
+    if not reranked_items:
+        return "invalid_output"
+
+    ranked = sorted(reranked_items, key=lambda item: item.get("rank", 0))
+    scores = np.array([item.get("rerank_score", 0) for item in ranked], dtype=np.float64)
+    if scores[0] < settings.RERANK_CASCADE_MIN_TOP_SCORE:
+        return "low_confidence"
+
+    top_scores = scores[:settings.RERANK_CASCADE_TIE_TOP_N]
+    if len(top_scores) > 1 and np.abs(np.diff(top_scores)).min() < settings.RERANK_CASCADE_MIN_SCORE_GAP:
+        return "close_tie"
+    return None
+
+
+class CascadeStats:
+    """
+    Counters of the cascade reranker: the calls handled by each tier with their latency
+    distribution over the last RERANK_CASCADE_LATENCY_SAMPLES calls, and the escalations with
+    their reason.
+    """
+
+    def __init__(self, max_samples: int):
+        """
+        Constructor for CascadeStats class.
+
+        Args:
+            max_samples (int): Number of latencies kept per tier
+        """
+        self.calls: Counter = Counter()
+        self.escalations: Counter = Counter()
+        self.escalation_failures = 0
+        self.latencies_ms: Dict[str, deque] = {}
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+
+    def record_call(self, tier: str, latency_seconds: float) -> None:
+        """
+        Count a rerank call handled by a tier.
+
+        Args:
+            tier (str): The tier name
+            latency_seconds (float): Duration of the call
+        """
+        with self._lock:
+            self.calls[tier] += 1
+            self.latencies_ms.setdefault(tier, deque(maxlen=self.max_samples)).append(
+                latency_seconds * 1000
+            )
+
+    def record_escalation(self, reason: str) -> None:
+        """
+        Count a ranking of the fast tier sent to the larger model.
+
+        Args:
+            reason (str): Why the ranking was escalated
+        """
+        with self._lock:
+            self.escalations[reason] += 1
+
+    def record_escalation_failure(self) -> None:
+        """
+        Count an escalation that failed or missed the deadline, the fast tier's ranking being kept.
+        """
+        with self._lock:
+            self.escalation_failures += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cascade counters.
+
+        Returns:
+            Dict[str, Any]: Calls and latency percentiles of each tier, escalations and their reasons
+        """
+        with self._lock:
+            latencies = {tier: np.array(samples) for tier, samples in self.latencies_ms.items()}
+            total_calls = sum(self.calls.values())
+            tiers = {
+                tier: {
+                    "calls": calls,
+                    "share": round(calls / total_calls, 4),
+                    "latency_ms": {
+                        f"p{percentile}": round(float(np.percentile(latencies[tier], percentile)), 1)
+                        for percentile in (50, 90, 99)
+                    },
+                }
+                for tier, calls in self.calls.items()
+            }
+            return {
+                "tiers": tiers,
+                "escalations": sum(self.escalations.values()),
+                "escalation_reasons": dict(self.escalations),
+                "escalation_failures": self.escalation_failures,
+            }
+
+
+@lru_cache(maxsize=1)
+def get_cascade_stats() -> CascadeStats:
+    """
+    Initialize the process-wide cascade reranker counters and save them in the cache.
+
+    Returns:
+        CascadeStats: The cascade counters.
+    """
+    return CascadeStats(max_samples=settings.RERANK_CASCADE_LATENCY_SAMPLES)
@@ -0,0 +1,155 @@
+import json
+from typing import Any, Dict, List, Tuple, Union
+
+from pydantic import BaseModel, ValidationError
+
+from app.utils.logger import setup_logger
+
+logger = setup_logger("rerank_stream")
+
+
+class RerankedItem(BaseModel):
+    # Ranking of one candidate returned by the LLM, id is the candidate alias
+    id: Union[str, int]
+    rank: int
+    rerank_score: float
+    reason: str = ""
+
+
+def build_rerank_output_format(list_keys: List[str]) -> Dict[str, Any]:
+    """
+    Build the JSON schema the reranker output is constrained to (OpenAI structured outputs).
+    The ranked lists are the only properties, so the model spends no tokens outside of them.
+
+    Args:
+        list_keys (List[str]): Keys of the ranked lists, e.g. ["reranked_results"]
+
+    Returns:
+        Dict[str, Any]: The "format" of the text parameter of the Responses API
+    """
+    item_schema = {
+        "type": "object",
+        "properties": {
+            "id": {"type": "string"},
+            "rank": {"type": "integer"},
+            "rerank_score": {"type": "number"},
+            "reason": {"type": "string"},
+        },
+        "required": ["id", "rank", "rerank_score", "reason"],
+        "additionalProperties": False,
+    }
+    return {
+        "type": "json_schema",
+        "name": "reranked_products",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {key: {"type": "array", "items": item_schema} for key in list_keys},
+            "required": list(list_keys),
+            "additionalProperties": False,
+        },
+    }
+
+
+class IncrementalRerankParser:
+    """
+    Incremental parser of the reranker JSON output, fed with the text deltas of a streamed response.
+    Each item of a ranked list is validated as soon as its closing brace arrives, so the first
+    ranked products can be used before the model finishes, and the items received before a
+    timeout or a malformed tail are kept.
+
+    Attributes:
+        items (Dict[str, List[Dict[str, Any]]]): The valid items received for each list key
+        text (str): The output text received so far
+        invalid_items (int): Number of items that failed validation
+        completed_lists (List[str]): Keys of the lists whose closing bracket was received
+    """
+
+    def __init__(self, list_keys: List[str]):
+        """
+        Constructor for IncrementalRerankParser class.
+
+        Args:
+            list_keys (List[str]): Keys of the ranked lists to parse
+        """
+        self.items: Dict[str, List[Dict[str, Any]]] = {key: [] for key in list_keys}
+        self.text = ""
+        self.invalid_items = 0
+        self.completed_lists: List[str] = []
+
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._last_key = None
+        self._current_list = None
+        self._item_start = None
+
+    def feed(self, delta: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Parse a chunk of the output text.
+
+        Args:
+            delta (str): The next chunk of the output text
+
+        Returns:
+            List[Tuple[str, Dict[str, Any]]]: The list key and item of each item completed by the chunk
+        """
+        self.text += delta
+        completed = []
+        text = self.text
+        for i in range(self._position, len(text)):
+            char = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        # Strings at depth 1 are the keys of the top-level object
+                        self._last_key = text[self._string_start:i]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i + 1
+            elif char in "{[":
+                self._depth += 1
+                if char == "[" and self._depth == 2 and self._last_key in self.items:
+                    self._current_list = self._last_key
+                elif char == "{" and self._depth == 3 and self._current_list is not None:
+                    self._item_start = i
+            elif char in "}]":
+                if char == "}" and self._depth == 3 and self._item_start is not None:
+                    item = self._validate(text[self._item_start:i + 1])
+                    if item is not None:
+                        self.items[self._current_list].append(item)
+                        completed.append((self._current_list, item))
+                    self._item_start = None
+                elif char == "]" and self._depth == 2:
+                    if self._current_list is not None:
+                        self.completed_lists.append(self._current_list)
+                    self._current_list = None
+                self._depth -= 1
+
+        self._position = len(text)
+        return completed
+
+    def _validate(self, item_text: str) -> Dict[str, Any] | None:
+        try:
+            return RerankedItem.model_validate(json.loads(item_text)).model_dump()
+        except (json.JSONDecodeError, ValidationError) as e:
+            self.invalid_items += 1
+            logger.warning("Invalid reranked item skipped", extra={
+                "error": str(e)[:200],
+                "item": item_text[:200]
+            })
+            return None
+
+    @property
+    def num_items(self) -> int:
+        """Number of valid items received over all lists"""
+        return sum(len(items) for items in self.items.values())
@@ -0,0 +1,263 @@
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.config.settings import Settings
+from app.database.catalog_events import subscribe
+from app.utils.logger import setup_logger
+
+settings = Settings()
+
+logger = setup_logger("semantic_cache")
+
+
+class SemanticCache:
+    """
+    Cache of final /search responses looked up by query embedding similarity.
+    A query whose embedding has a cosine similarity above the threshold with a previous query
+    of the same scope (top_k, filters...) is served the previous response without reranking.
+
+    Embeddings are kept L2-normalized in a preallocated float32 matrix, so a lookup is a single
+    matrix-vector product over the cached queries.
+
+    Attributes:
+        threshold (float): Minimum cosine similarity for a hit
+        max_size (int): Maximum number of cached responses
+        ttl_seconds (Optional[float]): Seconds a response stays valid, None for no expiry
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        max_size: int,
+        threshold: float,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Constructor for SemanticCache class.
+
+        Args:
+            dimension (int): Dimension of the query embeddings
+            max_size (int): Maximum number of cached responses
+            threshold (float): Minimum cosine similarity for a hit
+            ttl_seconds (Optional[float]): Seconds a response stays valid, None for no expiry
+            clock (Callable[[], float]): Time source, injectable for tests
+        """
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._embeddings = np.zeros((max_size, dimension), dtype=np.float32)
+        self._valid = np.zeros(max_size, dtype=bool)
+        self._last_used = np.zeros(max_size, dtype=np.float64)
+        self._expires_at = np.zeros(max_size, dtype=np.float64)
+        self._scopes: List[Optional[str]] = [None] * max_size
+        self._responses: List[Any] = [None] * max_size
+        # Product ids per table contained in each response, used for invalidation
+        self._product_ids: List[Dict[str, set]] = [{} for _ in range(max_size)]
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._hit_similarity_sum = 0.0
+        self._miss_best_similarity_sum = 0.0
+        self._miss_with_candidate = 0
+
+    @staticmethod
+    def _normalize(embedding: list[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def lookup(self, query_embedding: list[float], scope: str) -> Optional[Any]:
+        """
+        Find the cached response of the most similar previous query in the same scope.
+
+        Args:
+            query_embedding (list[float]): Embedding of the query
+            scope (str): Key of the parameters the response depends on besides the query
+
+        Returns:
+            Optional[Any]: The cached response, or None on a miss
+        """
+        query = self._normalize(query_embedding)
+
+        with self._lock:
+            now = self._clock()
+            candidates = np.flatnonzero(self._valid & (self._expires_at >= now))
+            candidates = [i for i in candidates if self._scopes[i] == scope]
+
+            if not candidates:
+                self.misses += 1
+                return None
+
+            similarities = self._embeddings[candidates] @ query
+            best = int(np.argmax(similarities))
+            best_similarity = float(similarities[best])
+
+            if best_similarity < self.threshold:
+                self.misses += 1
+                self._miss_with_candidate += 1
+                self._miss_best_similarity_sum += best_similarity
+                return None
+
+            slot = candidates[best]
+            self._last_used[slot] = now
+            self.hits += 1
+            self._hit_similarity_sum += best_similarity
+            response = self._responses[slot]
+
+        logger.info("Semantic cache hit", extra={"similarity": best_similarity})
+        return response
+
+    def store(
+        self,
+        query_embedding: list[float],
+        scope: str,
+        response: Any,
+        product_ids: Optional[Dict[str, List[int]]] = None,
+    ) -> None:
+        """
+        Cache a response, evicting the least recently used one when full.
+
+        Args:
+            query_embedding (list[float]): Embedding of the query
+            scope (str): Key of the parameters the response depends on besides the query
+            response (Any): The response to cache
+            product_ids (Optional[Dict[str, List[int]]]): Ids of the returned products per table
+        """
+        query = self._normalize(query_embedding)
+
+        with self._lock:
+            now = self._clock()
+            free_slots = np.flatnonzero(~self._valid)
+            if len(free_slots):
+                slot = int(free_slots[0])
+            else:
+                # Reuse expired entries first, then the least recently used one
+                expired = self._expires_at < now
+                slot = int(np.argmin(np.where(expired, -np.inf, self._last_used)))
+                self.evictions += 1
+
+            self._embeddings[slot] = query
+            self._valid[slot] = True
+            self._last_used[slot] = now
+            self._expires_at[slot] = (
+                now + self.ttl_seconds if self.ttl_seconds is not None else np.inf
+            )
+            self._scopes[slot] = scope
+            self._responses[slot] = response
+            self._product_ids[slot] = {
+                table: set(ids) for table, ids in (product_ids or {}).items()
+            }
+
+    def invalidate(self, table_name: str, product_ids: Optional[List[int]] = None) -> None:
+        """
+        Drop the responses affected by a change of the products table.
+        Without product ids (new products were added) every response searching the table may be stale.
+
+        Args:
+            table_name (str): Name of the products table
+            product_ids (Optional[List[int]]): Ids of the changed products, None for the whole table
+        """
+        with self._lock:
+            if product_ids is None:
+                slots = [i for i in np.flatnonzero(self._valid) if table_name in self._product_ids[i]]
+                dropped = len(slots)
+                self._clear_slots(slots)
+            else:
+                changed = set(product_ids)
+                slots = [
+                    i
+                    for i in np.flatnonzero(self._valid)
+                    if self._product_ids[i].get(table_name, set()) & changed
+                ]
+                dropped = len(slots)
+                self._clear_slots(slots)
+            self.invalidations += dropped
+
+        if dropped:
+            logger.info("Semantic cache invalidated", extra={
+                "table_name": table_name,
+                "dropped": dropped
+            })
+
+    def _clear_slots(self, slots) -> None:
+        for slot in slots:
+            self._valid[slot] = False
+            self._responses[slot] = None
+            self._product_ids[slot] = {}
+
+    def clear(self) -> None:
+        """
+        Remove all cached responses.
+        """
+        with self._lock:
+            self._clear_slots(np.flatnonzero(self._valid))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dict[str, Any]: Size, hit rate, evictions, invalidations and similarity statistics
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": int(self._valid.sum()),
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "mean_hit_similarity": (
+                round(self._hit_similarity_sum / self.hits, 4) if self.hits else None
+            ),
+            # Helps tuning the threshold: how close the misses came to a hit
+            "mean_miss_best_similarity": (
+                round(self._miss_best_similarity_sum / self._miss_with_candidate, 4)
+                if self._miss_with_candidate
+                else None
+            ),
+        }
+
+
+def build_search_scope(**params: Any) -> str:
+    """
+    Build the scope key of a search from the parameters the response depends on besides the query.
+
+    Args:
+        **params: The search parameters (top_k, filters...)
+
+    Returns:
+        str: The scope key
+    """
+    return "&".join(f"{key}={params[key]!r}" for key in sorted(params))
+
+
+@lru_cache(maxsize=1)
+def get_semantic_cache() -> SemanticCache:
+    """
+    Initialize the process-wide semantic response cache and save it in the cache.
+    The cache is subscribed to catalog changes so stale responses are dropped.
+
+    Returns:
+        SemanticCache: The semantic cache.
+    """
+    cache = SemanticCache(
+        dimension=settings.EMBEDDING_DIMENSION,
+        max_size=settings.SEMANTIC_CACHE_MAX_SIZE,
+        threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+        ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+    )
+    subscribe(cache.invalidate)
+    return cache
@@ -2,4 +2,5 @@ from .openai_client import *
 
 __all__ = [
     'get_openai_client',
-] 
\ No newline at end of file
+    'get_async_openai_client',
+] 
@@ -1,5 +1,5 @@
 from functools import lru_cache
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from app.config.settings import get_settings
 
 
@@ -14,3 +14,17 @@ def get_openai_client() -> OpenAI:
     settings = get_settings()
     client = OpenAI(api_key=settings.OPENAI_API_KEY)
     return client
+
+
+@lru_cache(maxsize=1)
+def get_async_openai_client() -> AsyncOpenAI:
+    """
+    Initialize the async OpenAI client and save it in the cache.
+    Used by the request path so LLM and embedding calls do not block the event loop.
+
+    Returns:
+        AsyncOpenAI: The async OpenAI client.
+    """
+    settings = get_settings()
+    client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    return client
@@ -24,18 +24,148 @@ class Settings(BaseSettings):
     DB_PASSWORD: str
     DB_NAME: str
 
+    # Database connection pool settings
+    DB_POOL_MIN_SIZE: int = 2
+    DB_POOL_MAX_SIZE: int = 10
+    DB_POOL_MAX_IDLE: float = 300.0  # Seconds before an idle connection above min size is closed
+    DB_POOL_MAX_LIFETIME: float = 3600.0
+    DB_POOL_TIMEOUT: float = 10.0  # Seconds to wait for a free connection
+
     # OpenAI settings
     OPENAI_API_KEY: str
     EMBEDDING_MODEL_NAME: str = "text-embedding-3-small"
     IMAGE_FEATURE_EXTRACTION_MODEL: str = "gpt-4.1-mini"
 
+    # Query embedding cache settings
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_SIZE: int = 10_000
+    EMBEDDING_CACHE_TTL_SECONDS: float = 7 * 24 * 3600
+    EMBEDDING_CACHE_PATH: str = ""  # SQLite file shared by workers, empty to disable
+    EMBEDDING_CACHE_DISK_MAX_SIZE: int = 200_000
+
+    # Semantic response cache settings
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.97  # Minimum cosine similarity between queries for a hit
+    SEMANTIC_CACHE_MAX_SIZE: int = 2_000
+    SEMANTIC_CACHE_TTL_SECONDS: float = 3600
+
+    # Single-flight coalescing: concurrent identical /search requests share one computation
+    SEARCH_COALESCING_ENABLED: bool = True
+    SEARCH_COALESCING_PATH: str = ""  # SQLite file shared by workers to coalesce across them, empty to disable
+    SEARCH_COALESCING_LEASE_SECONDS: float = 15.0  # Another worker's unfinished search is abandoned after this
+    SEARCH_COALESCING_POLL_SECONDS: float = 0.02
+    SEARCH_COALESCING_RESULT_TTL_SECONDS: float = 5.0
+
     RERANKER_MODEL_NAME: str = "gpt-4.1-nano"    
     LLM_RERANKER_TEMPERATURE: float = 0.1
     LLM_RERANKER_TOP_P: float = 1.0
 
+    # "combined": one LLM call reranks both stock tables, "per_table": one concurrent call per table
+    RERANK_MODE: str = "combined"
+
+    # Cascade reranking: RERANKER_MODEL_NAME ranks first, the larger model only redoes a ranking
+    # whose best score is low or whose top scores are tied, and ranks high-priority requests
+    RERANK_CASCADE_ENABLED: bool = True
+    RERANKER_ESCALATION_MODEL_NAME: str = "gpt-4.1-mini"
+    RERANK_CASCADE_MIN_TOP_SCORE: float = 0.5
+    RERANK_CASCADE_MIN_SCORE_GAP: float = 0.02  # Top scores closer than this are a tie
+    RERANK_CASCADE_TIE_TOP_N: int = 3  # Number of top scores checked for ties
+    RERANK_CASCADE_LATENCY_SAMPLES: int = 1_000  # Latencies kept per tier for the percentiles
+
+    # Deadline of an LLM rerank, both cascade tiers included. A call missing it, failing or
+    # returning unusable output is replaced by the local ranker: weighted similarity,
+    # Bayesian-smoothed rating and review count.
+    RERANK_TIMEOUT_SECONDS: float = 4.0
+    RERANK_FALLBACK_SIMILARITY_WEIGHT: float = 0.6
+    RERANK_FALLBACK_RATING_WEIGHT: float = 0.3
+    RERANK_FALLBACK_REVIEWS_WEIGHT: float = 0.1
+    RERANK_FALLBACK_PRIOR_RATING: float = 3.5  # Rating a product is assumed to have without reviews
+    RERANK_FALLBACK_PRIOR_COUNT: int = 20  # Number of reviews the prior rating is worth
+
+    # Tokens of a candidate row in the rerank prompt, measured with the model's tokenizer
+    RERANK_PROMPT_CANDIDATE_TOKENS: int = 60
+
+    # Reranker result cache settings
+    RERANK_CACHE_ENABLED: bool = True
+    RERANK_CACHE_MAX_SIZE: int = 5_000
+    RERANK_CACHE_TTL_SECONDS: float = 6 * 3600
+
     # Vector settings
     EMBEDDING_DIMENSION: int = 1536
 
+    # "postgres": pgvector tables, "numpy": in-process float32 matrices memory-mapped from disk
+    VECTOR_STORE_BACKEND: str = "postgres"
+    NUMPY_VECTOR_STORE_PATH: str = "vector_store"
+
+    # "single_round_trip": one prepared UNION ALL query for both stock tables
+    # "concurrent": one query per stock table, run concurrently on separate connections
+    VECTOR_SEARCH_MODE: str = "single_round_trip"
+
+    # ANN index settings, the index is built after the bulk load by build_vector_indexes
+    VECTOR_INDEX_TYPE: str = "ivfflat"  # "ivfflat" or "hnsw"
+    IVFFLAT_LISTS: int = 0  # 0 derives the number of lists from the row count
+    IVFFLAT_PROBES: int = 10  # Lists scanned per query, higher is better recall and slower
+    HNSW_M: int = 16
+    HNSW_EF_CONSTRUCTION: int = 64
+    HNSW_EF_SEARCH: int = 40  # Candidate list size per query, raised to top_k if lower
+    INDEX_BUILD_MAINTENANCE_WORK_MEM: str = "512MB"
+
+    # Two-stage search: ANN on the leading dimensions of the embeddings (embedding_short column),
+    # then exact rescoring of the candidates on the full embedding
+    SHORT_EMBEDDING_DIMENSION: int = 256
+    TWO_STAGE_SEARCH_ENABLED: bool = False
+    TWO_STAGE_CANDIDATES_FACTOR: int = 10  # Candidates fetched per returned product
+    TWO_STAGE_MIN_CANDIDATES: int = 100
+
+    # Quantized first stage of the two-stage search: "none", "halfvec" (embedding_half column,
+    # half the size of the index) or "binary" (embedding_bit column searched by Hamming distance,
+    # 1/32 of the size). Takes precedence over the short embedding. Needs pgvector >= 0.7.
+    VECTOR_QUANTIZATION: str = "none"
+
+    # Filtered search: a table whose filters match at most this many rows is ranked by an exact
+    # scan of the matching rows instead of the ANN index (0 disables the selectivity probe)
+    FILTERED_SEARCH_EXACT_THRESHOLD: int = 2000
+    # pgvector >= 0.8 iterative index scan for filtered searches: "relaxed_order", "strict_order"
+    # or "off" to over-fetch instead (ef_search / probes multiplied by the factor)
+    FILTERED_SEARCH_ITERATIVE_SCAN: str = "relaxed_order"
+    FILTERED_SEARCH_OVERFETCH_FACTOR: int = 4
+
+    # Hybrid search: full-text search on the search_tsv column fused with the vector search by
+    # reciprocal rank fusion. The weights are the defaults of the request "fusion" weights.
+    HYBRID_SEARCH_ENABLED: bool = False  # Needs the search_tsv column, see the README
+    HYBRID_VECTOR_WEIGHT: float = 1.0
+    HYBRID_LEXICAL_WEIGHT: float = 1.0
+    HYBRID_RRF_K: int = 60  # Rank offset of the fusion, higher values flatten the rank differences
+    HYBRID_CANDIDATES: int = 30  # Products fetched per table by each retriever before the fusion
+    FULL_TEXT_SEARCH_CONFIG: str = "english"
+
+    # Search card: the compact product representation returned by the searches and sent to the
+    # reranker, full details are served by GET /products. Length of its feature summary.
+    SEARCH_CARD_FEATURE_SUMMARY_LENGTH: int = 160
+
+    # Product cache: the searches return ids and scores, the search cards are hydrated from this
+    # in-process cache and the misses are read in one batched query per table
+    PRODUCT_CACHE_ENABLED: bool = True
+    PRODUCT_CACHE_MAX_SIZE: int = 50_000
+    PRODUCT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # Estimated memory of the cached cards
+
+    # gzip compression of the responses larger than RESPONSE_COMPRESSION_MIN_BYTES, for clients
+    # sending Accept-Encoding: gzip. The streaming search is never compressed.
+    RESPONSE_COMPRESSION_ENABLED: bool = True
+    RESPONSE_COMPRESSION_MIN_BYTES: int = 1024
+    RESPONSE_COMPRESSION_LEVEL: int = 5
+
+    # Paginated searches ("paginate": true): the first page retrieves SEARCH_PAGE_BUFFER_SIZE
+    # products per table and buffers them, later pages are served from the buffer by cursor.
+    # The buffer lives in the memory of the worker that ran the search: with several uvicorn
+    # workers, /search/page only works if the client's requests are routed to the same worker.
+    SEARCH_PAGE_BUFFER_SIZE: int = 50
+    SEARCH_PAGE_CACHE_MAX_SIZE: int = 1_000
+    SEARCH_PAGE_TTL_SECONDS: float = 600
+
+    # Number of LLM reranks running at the same time for a batch search
+    BATCH_SEARCH_RERANK_CONCURRENCY: int = 4
+
     # Product settings
     PRODUCT_BATCH_SIZE: int = 1_000
     PRODUCT_EMBEDDING_BATCH_SIZE: int = 2_000
@@ -59,6 +189,7 @@ class Settings(BaseSettings):
         "categories",
         "details",
         "embedding",
+        "embedding_short",
     ]
 
     # Table names for in stock and out of stock products
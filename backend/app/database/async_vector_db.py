@@ -0,0 +1,542 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import psycopg
+from dotenv import load_dotenv
+from pgvector.psycopg import register_vector_async
+from psycopg_pool import AsyncConnectionPool
+
+from app.config.settings import Settings
+from app.database.vector_db import (
+    add_search_card_rows,
+    build_batch_search_params,
+    build_batch_search_query,
+    build_filter_count_query,
+    build_filter_predicates,
+    build_lexical_search_params,
+    build_lexical_search_query,
+    build_product_details_query,
+    build_search_cards_query,
+    build_search_params,
+    build_search_query,
+    build_search_settings,
+    build_stock_tables_search_query,
+    lookup_search_cards,
+    parse_product_row,
+    parse_search_row,
+    select_exact_tables,
+    split_batch_rows,
+    split_lexical_rows,
+    split_lexical_terms,
+    split_stock_tables_rows,
+)
+from app.database.product_cache import attach_search_cards
+from app.utils.logger import setup_logger
+
+load_dotenv()
+settings = Settings()
+
+
+async def register_vector_types_async(conn: psycopg.AsyncConnection) -> bool:
+    """
+    Register the pgvector types on an async connection so vectors can be sent as binary parameters.
+
+    Args:
+        conn (psycopg.AsyncConnection): The database connection
+
+    Returns:
+        bool: False if the vector extension is not installed yet
+    """
+    try:
+        await register_vector_async(conn)
+        return True
+    except psycopg.ProgrammingError:
+        return False
+
+
+class AsyncVectorDatabase:
+    """
+    Async vector database class for searching products from the request path.
+    Uses psycopg's async connections so searches do not block the event loop.
+
+    Attributes:
+        connection_params (Dict[str, Any]): Dictionary containing database connection parameters
+        pool (Optional[AsyncConnectionPool]): Connection pool to borrow connections from
+    """
+
+    def __init__(
+        self, connection_params: Dict[str, Any], pool: Optional[AsyncConnectionPool] = None
+    ):
+        """
+        Constructor for AsyncVectorDatabase class.
+
+        Args:
+            connection_params:
+                - host: Database host
+                - port: Database port
+                - user: Database username
+                - password: Database
+                - dbname: Database name
+            pool: Connection pool to borrow connections from instead of opening them
+        """
+
+        # Initialize logger
+        self.logger = setup_logger("vector_database")
+
+        # Initialize connection parameters
+        self.connection_params = connection_params
+        self.pool = pool
+        self.embedding_dimension = settings.EMBEDDING_DIMENSION
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[psycopg.AsyncConnection]:
+        """
+        Get a connection for a single search, borrowed from the pool when one is set.
+        A Postgres connection runs one query at a time, so concurrent searches each get their own.
+
+        Yields:
+            psycopg.AsyncConnection: The database connection
+
+        Raises:
+            Exception: If failed to connect to the database
+        """
+        if self.pool is not None:
+            async with self.pool.connection() as conn:
+                yield conn
+            return
+
+        try:
+            conn = await psycopg.AsyncConnection.connect(**self.connection_params)
+            await register_vector_types_async(conn)
+        except Exception as e:
+            self.logger.error(f"Failed to connect to the database: {e}")
+            raise
+
+        try:
+            yield conn
+        finally:
+            await conn.close()
+
+    async def execute_search(
+        self,
+        conn: psycopg.AsyncConnection,
+        cursor: psycopg.AsyncCursor,
+        sql: str,
+        params: Optional[Any],
+        top_k: int,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        prepare: Optional[bool] = None,
+        filtered: bool = False,
+    ) -> List[Tuple]:
+        """
+        Run a search query after setting the ANN query parameters for the current transaction.
+        Both are pipelined so they cost a single round trip.
+
+        Args:
+            conn (psycopg.AsyncConnection): The database connection
+            cursor (psycopg.AsyncCursor): Cursor of the connection
+            sql (str): The search query
+            params (Optional[Any]): Parameters of the search query
+            top_k (int): Number of products to return
+            probes (Optional[int]): ivfflat lists to scan, trades latency for recall
+            ef_search (Optional[int]): hnsw candidate list size, trades latency for recall
+            prepare (Optional[bool]): Whether to use a server-side prepared statement
+            filtered (bool): Whether the search query has filter predicates
+
+        Returns:
+            List[Tuple]: Rows returned by the search query
+        """
+        async with conn.pipeline():
+            for setting_sql, setting_params in build_search_settings(
+                top_k, probes, ef_search, filtered
+            ):
+                await cursor.execute(setting_sql, setting_params)
+            await cursor.execute(sql, params, prepare=prepare)
+            return await cursor.fetchall()
+
+    async def fetch_search_cards(
+        self, cursor: psycopg.AsyncCursor, ids_by_table: Dict[str, List[int]]
+    ) -> Dict[str, Dict[int, Dict[str, Any]]]:
+        """
+        Get the search cards of search hits from the product cache, reading the misses of all
+        tables in one query. No query is sent when every card is cached.
+
+        Args:
+            cursor (psycopg.AsyncCursor): Cursor of the search
+            ids_by_table (Dict[str, List[int]]): Ids of the hits of each table
+
+        Returns:
+            Dict[str, Dict[int, Dict[str, Any]]]: The search cards by id of each table
+        """
+        cards_by_table, missing_by_table = lookup_search_cards(ids_by_table)
+        if missing_by_table:
+            await cursor.execute(
+                build_search_cards_query(list(missing_by_table)),
+                list(missing_by_table.values()),
+                prepare=True,
+            )
+            add_search_card_rows(cards_by_table, await cursor.fetchall())
+        return cards_by_table
+
+    async def find_exact_tables(
+        self,
+        cursor: psycopg.AsyncCursor,
+        table_names: List[str],
+        predicates: str,
+        filter_params: Dict[str, Any],
+    ) -> Tuple[str, ...]:
+        """
+        Count the rows matching the filters, up to FILTERED_SEARCH_EXACT_THRESHOLD, to find the
+        tables where an exact scan of the matching rows beats the ANN index.
+
+        Args:
+            cursor (psycopg.AsyncCursor): Cursor of the search transaction
+            table_names (List[str]): Names of the searched tables
+            predicates (str): Filter predicates of build_filter_predicates
+            filter_params (Dict[str, Any]): Parameters of the predicates
+
+        Returns:
+            Tuple[str, ...]: The tables to search without the ANN index
+        """
+        if not predicates or settings.FILTERED_SEARCH_EXACT_THRESHOLD <= 0:
+            return ()
+
+        await cursor.execute(
+            build_filter_count_query(table_names, predicates),
+            {**filter_params, "filter_count_limit": settings.FILTERED_SEARCH_EXACT_THRESHOLD + 1},
+        )
+        return select_exact_tables(table_names, await cursor.fetchone())
+
+    async def search_products(
+        self,
+        query_embedding: list[float],
+        table_name: str,
+        top_k: int = 10,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for products in the database.
+
+        Args:
+            query_embedding (list[float]): Embedding of the query
+            table_name (str): Name of the table to search for products
+            top_k (int): Number of products to return
+            probes (Optional[int]): ivfflat lists to scan, trades latency for recall
+            ef_search (Optional[int]): hnsw candidate list size, trades latency for recall
+            filters (Optional[Dict[str, Any]]): Structured filters of SearchFilters
+
+        Returns:
+            results (List[Dict[str, Any]]): List of products that meet the similarity threshold
+
+        Raises:
+            Exception: If failed to search for products
+        """
+        try:
+            predicates, filter_params = build_filter_predicates(filters)
+            params = build_search_params(query_embedding, top_k, filters)
+
+            async with self.connection() as conn:
+                async with conn.cursor(binary=True) as cursor:
+                    exact_tables = await self.find_exact_tables(
+                        cursor, [table_name], predicates, filter_params
+                    )
+                    sql = build_search_query(table_name, predicates, exact=table_name in exact_tables)
+                    rows = await self.execute_search(
+                        conn, cursor, sql, params, top_k, probes, ef_search, prepare=True,
+                        filtered=bool(predicates),
+                    )
+
+                    # A relaxed iterative scan may return the rows slightly out of order
+                    hits = sorted(
+                        (parse_search_row(row) for row in rows),
+                        key=lambda product: product["similarity"] or 0.0,
+                        reverse=True,
+                    )
+                    cards = await self.fetch_search_cards(
+                        cursor, {table_name: [hit["id"] for hit in hits]}
+                    )
+
+            results = attach_search_cards(hits, cards[table_name])
+
+            self.logger.info(f"{len(results)} products found from {table_name}.")
+            return results
+
+        except Exception as e:
+            self.logger.error(f"Failed to search products: {e}")
+            raise
+
+    async def search_stock_tables(
+        self,
+        query_embedding: list[float],
+        top_k: int = 10,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Search the in-stock and out-of-stock tables.
+        Depending on VECTOR_SEARCH_MODE, both tables are fetched by one prepared statement
+        ("single_round_trip") or by two queries running concurrently ("concurrent").
+
+        Args:
+            query_embedding (list[float]): Embedding of the query
+            top_k (int): Number of products to return from each table
+            probes (Optional[int]): ivfflat lists to scan, trades latency for recall
+            ef_search (Optional[int]): hnsw candidate list size, trades latency for recall
+            filters (Optional[Dict[str, Any]]): Structured filters of SearchFilters
+
+        Returns:
+            Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: In-stock and out-of-stock results
+        """
+        if settings.VECTOR_SEARCH_MODE == "single_round_trip":
+            return await self.search_stock_tables_single_round_trip(
+                query_embedding, top_k, probes, ef_search, filters
+            )
+
+        in_stock_results, out_of_stock_results = await asyncio.gather(
+            self.search_products(
+                query_embedding=query_embedding,
+                table_name=settings.IN_STOCK_PRODUCTS_TABLE_NAME,
+                top_k=top_k,
+                probes=probes,
+                ef_search=ef_search,
+                filters=filters,
+            ),
+            self.search_products(
+                query_embedding=query_embedding,
+                table_name=settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME,
+                top_k=top_k,
+                probes=probes,
+                ef_search=ef_search,
+                filters=filters,
+            ),
+        )
+        return in_stock_results, out_of_stock_results
+
+    async def search_stock_tables_single_round_trip(
+        self,
+        query_embedding: list[float],
+        top_k: int = 10,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Search the in-stock and out-of-stock tables in a single round trip.
+        The query embedding is sent once as a binary parameter of a prepared statement.
+        Selective filters add a round trip counting the matching rows.
+
+        Args:
+            query_embedding (list[float]): Embedding of the query
+            top_k (int): Number of products to return from each table
+            probes (Optional[int]): ivfflat lists to scan, trades latency for recall
+            ef_search (Optional[int]): hnsw candidate list size, trades latency for recall
+            filters (Optional[Dict[str, Any]]): Structured filters of SearchFilters
+
+        Returns:
+            Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: In-stock and out-of-stock results
+
+        Raises:
+            Exception: If failed to search for products
+        """
+        try:
+            table_names = [settings.IN_STOCK_PRODUCTS_TABLE_NAME, settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME]
+            predicates, filter_params = build_filter_predicates(filters)
+            params = build_search_params(query_embedding, top_k, filters)
+
+            async with self.connection() as conn:
+                async with conn.cursor(binary=True) as cursor:
+                    exact_tables = await self.find_exact_tables(
+                        cursor, table_names, predicates, filter_params
+                    )
+                    sql = build_stock_tables_search_query(*table_names, predicates, exact_tables)
+                    rows = await self.execute_search(
+                        conn, cursor, sql, params, top_k, probes, ef_search, prepare=True,
+                        filtered=bool(predicates),
+                    )
+
+                    in_stock_hits, out_of_stock_hits = split_stock_tables_rows(rows)
+                    cards = await self.fetch_search_cards(cursor, {
+                        table_names[0]: [hit["id"] for hit in in_stock_hits],
+                        table_names[1]: [hit["id"] for hit in out_of_stock_hits],
+                    })
+
+            in_stock_results = attach_search_cards(in_stock_hits, cards[table_names[0]])
+            out_of_stock_results = attach_search_cards(out_of_stock_hits, cards[table_names[1]])
+
+            self.logger.info(
+                f"{len(in_stock_results)} in-stock and {len(out_of_stock_results)} out-of-stock products found."
+            )
+            return in_stock_results, out_of_stock_results
+
+        except Exception as e:
+            self.logger.error(f"Failed to search products: {e}")
+            raise
+
+    async def search_stock_tables_lexical(
+        self,
+        query_text: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Full-text search of the in-stock and out-of-stock tables in a single round trip,
+        on the GIN-indexed search_tsv column. Catches the brand names, sizes and model numbers
+        the embeddings miss.
+
+        Args:
+            query_text (str): Text of the query
+            top_k (int): Number of products to return from each table
+            filters (Optional[Dict[str, Any]]): Structured filters of SearchFilters
+
+        Returns:
+            Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: In-stock and out-of-stock results,
+                best lexical match first
+
+        Raises:
+            Exception: If failed to search for products
+        """
+        try:
+            table_names = [settings.IN_STOCK_PRODUCTS_TABLE_NAME, settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME]
+            predicates, _ = build_filter_predicates(filters)
+            num_terms = len(split_lexical_terms(query_text))
+            sql = build_lexical_search_query(*table_names, predicates, num_terms)
+            params = build_lexical_search_params(query_text, top_k, filters)
+
+            async with self.connection() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(sql, params, prepare=True)
+                    in_stock_hits, out_of_stock_hits = split_lexical_rows(await cursor.fetchall())
+                    cards = await self.fetch_search_cards(cursor, {
+                        table_names[0]: [hit["id"] for hit in in_stock_hits],
+                        table_names[1]: [hit["id"] for hit in out_of_stock_hits],
+                    })
+
+            in_stock_results = attach_search_cards(in_stock_hits, cards[table_names[0]])
+            out_of_stock_results = attach_search_cards(out_of_stock_hits, cards[table_names[1]])
+
+            self.logger.info(
+                f"{len(in_stock_results)} in-stock and {len(out_of_stock_results)} out-of-stock "
+                "products matched the full-text search."
+            )
+            return in_stock_results, out_of_stock_results
+
+        except Exception as e:
+            self.logger.error(f"Failed to search products by full text: {e}")
+            raise
+
+    async def search_products_batch(
+        self,
+        query_embeddings: List[list[float]],
+        table_name: str,
+        top_k: int = 10,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search for the products of several query embeddings in a single statement.
+
+        Args:
+            query_embeddings (List[list[float]]): Embeddings of the queries
+            table_name (str): Name of the table to search for products
+            top_k (int): Number of products to return per query
+            probes (Optional[int]): ivfflat lists to scan, trades latency for recall
+            ef_search (Optional[int]): hnsw candidate list size, trades latency for recall
+
+        Returns:
+            List[List[Dict[str, Any]]]: Products of each query, in the order of the embeddings
+
+        Raises:
+            Exception: If failed to search for products
+        """
+        if not query_embeddings:
+            return []
+
+        try:
+            sql = build_batch_search_query(table_name, len(query_embeddings))
+            params = build_batch_search_params(query_embeddings, top_k)
+
+            async with self.connection() as conn:
+                async with conn.cursor(binary=True) as cursor:
+                    rows = await self.execute_search(
+                        conn, cursor, sql, params, top_k, probes, ef_search
+                    )
+
+                    hits = split_batch_rows(rows, len(query_embeddings))
+                    cards = await self.fetch_search_cards(
+                        cursor, {table_name: [hit["id"] for query_hits in hits for hit in query_hits]}
+                    )
+
+            results = [attach_search_cards(query_hits, cards[table_name]) for query_hits in hits]
+
+            self.logger.info(
+                f"{len(rows)} products found from {table_name} for {len(query_embeddings)} queries."
+            )
+            return results
+
+        except Exception as e:
+            self.logger.error(f"Failed to search products in batch: {e}")
+            raise
+
+    async def search_stock_tables_batch(
+        self,
+        query_embeddings: List[list[float]],
+        top_k: int = 10,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+    ) -> Tuple[List[List[Dict[str, Any]]], List[List[Dict[str, Any]]]]:
+        """
+        Search both stock tables for several query embeddings, one statement per table
+        running concurrently.
+
+        Args:
+            query_embeddings (List[list[float]]): Embeddings of the queries
+            top_k (int): Number of products to return per query and table
+            probes (Optional[int]): ivfflat lists to scan, trades latency for recall
+            ef_search (Optional[int]): hnsw candidate list size, trades latency for recall
+
+        Returns:
+            Tuple[List[List[Dict[str, Any]]], List[List[Dict[str, Any]]]]:
+                In-stock and out-of-stock products of each query
+        """
+        in_stock_results, out_of_stock_results = await asyncio.gather(
+            self.search_products_batch(
+                query_embeddings, settings.IN_STOCK_PRODUCTS_TABLE_NAME, top_k, probes, ef_search
+            ),
+            self.search_products_batch(
+                query_embeddings, settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME, top_k, probes, ef_search
+            ),
+        )
+        return in_stock_results, out_of_stock_results
+
+    async def get_product(self, product_id: int, table_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the full details of a product, which the searches leave out of their search cards.
+
+        Args:
+            product_id (int): Id of the product
+            table_name (str): Name of the table of the product
+
+        Returns:
+            Optional[Dict[str, Any]]: The product, None if it does not exist
+
+        Raises:
+            Exception: If failed to get the product
+        """
+        try:
+            async with self.connection() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(
+                        build_product_details_query(table_name), (product_id,), prepare=True
+                    )
+                    row = await cursor.fetchone()
+
+            return parse_product_row(row) if row is not None else None
+
+        except Exception as e:
+            self.logger.error(f"Failed to get product: {e}")
+            raise
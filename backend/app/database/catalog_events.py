@@ -0,0 +1,148 @@
+import asyncio
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import psycopg
+
+from app.utils.logger import setup_logger
+
+logger = setup_logger("catalog_events")
+
+# Postgres channel used to broadcast product changes to every API worker
+CATALOG_CHANGED_CHANNEL = "catalog_changed"
+
+# NOTIFY payloads are limited to 8000 bytes, larger changes invalidate the whole table
+MAX_NOTIFIED_IDS = 500
+
+# Callbacks invoked with (table_name, product_ids). product_ids is None when the whole
+# table may have changed (e.g. a bulk insert, or a drop and reload that reuses ids), otherwise
+# the ids of the rewritten rows. A listener drops what depends on that table only, and every
+# write, drop or reload of a table must publish a change.
+CatalogListener = Callable[[str, Optional[List[int]]], None]
+
+_listeners: List[CatalogListener] = []
+
+
+def subscribe(listener: CatalogListener) -> None:
+    """
+    Register a callback invoked when products are inserted, rewritten or moved between stock tables.
+
+    Args:
+        listener (CatalogListener): The callback
+    """
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def unsubscribe(listener: CatalogListener) -> None:
+    """
+    Remove a callback registered with subscribe.
+
+    Args:
+        listener (CatalogListener): The callback
+    """
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def publish_products_changed(
+    table_name: str, product_ids: Optional[Iterable[int]] = None
+) -> None:
+    """
+    Notify the in-process listeners that products of a table changed.
+
+    Args:
+        table_name (str): Name of the products table
+        product_ids (Optional[Iterable[int]]): Ids of the changed products, None for the whole table
+    """
+    ids = [int(i) for i in product_ids] if product_ids is not None else None
+    for listener in list(_listeners):
+        try:
+            listener(table_name, ids)
+        except Exception as e:
+            logger.error("Catalog listener failed", extra={
+                "error": str(e),
+                "table_name": table_name
+            })
+
+
+def build_notify_payload(table_name: str, product_ids: Optional[Iterable[int]] = None) -> str:
+    """
+    Build the NOTIFY payload describing a change.
+
+    Args:
+        table_name (str): Name of the products table
+        product_ids (Optional[Iterable[int]]): Ids of the changed products, None for the whole table
+
+    Returns:
+        str: The JSON payload
+    """
+    ids = [int(i) for i in product_ids] if product_ids is not None else None
+    if ids is not None and len(ids) > MAX_NOTIFIED_IDS:
+        ids = None
+    return json.dumps({"table": table_name, "ids": ids})
+
+
+def notify_products_changed(
+    cursor: psycopg.Cursor, table_name: str, product_ids: Optional[Iterable[int]] = None
+) -> None:
+    """
+    Queue a NOTIFY in the current transaction, delivered to the API workers on commit.
+    The listeners of this process are not notified: the caller publishes the change with
+    publish_products_changed once the transaction is committed, so a rolled back write
+    invalidates nothing and a cache refilled in between cannot keep the old rows.
+
+    Args:
+        cursor (psycopg.Cursor): Cursor of the transaction writing the products
+        table_name (str): Name of the products table
+        product_ids (Optional[Iterable[int]]): Ids of the changed products, None for the whole table
+    """
+    cursor.execute(
+        "SELECT pg_notify(%s, %s)",
+        (CATALOG_CHANGED_CHANNEL, build_notify_payload(table_name, product_ids)),
+    )
+
+
+def parse_notify_payload(payload: str) -> Dict[str, Any]:
+    """
+    Parse a NOTIFY payload built by build_notify_payload.
+
+    Args:
+        payload (str): The JSON payload
+
+    Returns:
+        Dict[str, Any]: The table name and product ids
+    """
+    data = json.loads(payload)
+    return {"table": data["table"], "ids": data.get("ids")}
+
+
+async def listen_catalog_changes(
+    connection_params: Dict[str, Any], retry_delay: float = 5.0
+) -> None:
+    """
+    Forward product change notifications sent by other processes (e.g. ingestion) to the
+    in-process listeners. Runs until cancelled and reconnects if the connection drops.
+
+    Args:
+        connection_params (Dict[str, Any]): Dictionary containing database connection parameters
+        retry_delay (float): Seconds to wait before reconnecting
+    """
+    while True:
+        try:
+            conn = await psycopg.AsyncConnection.connect(**connection_params, autocommit=True)
+            async with conn:
+                await conn.execute(f"LISTEN {CATALOG_CHANGED_CHANNEL}")
+                logger.info("Listening for catalog changes")
+                async for notify in conn.notifies():
+                    try:
+                        change = parse_notify_payload(notify.payload)
+                    except (ValueError, KeyError) as e:
+                        logger.error("Invalid catalog change payload", extra={"error": str(e)})
+                        continue
+                    publish_products_changed(change["table"], change["ids"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Catalog change listener disconnected", extra={"error": str(e)})
+            await asyncio.sleep(retry_delay)
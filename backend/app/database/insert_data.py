@@ -5,7 +5,9 @@ import os
 import pandas as pd
 from dotenv import load_dotenv
 
+from app.database.numpy_vector_store import NumpyVectorStore
 from app.database.vector_db import VectorDatabase
+from app.database.vector_store import VectorStore
 from app.preprocessing.preprocess_pipeline import preprocess_data
 from app.config.settings import Settings
 from app.utils.logger import setup_logger
@@ -20,16 +22,21 @@ loggers = {
     "vector_database": setup_logger("vector_database"),
 }
 
-def init_database() -> VectorDatabase:
+def init_database() -> VectorStore:
     """
     Initialize the vector database connection and database tables.
 
     Returns:
-        VectorDatabase: Initialized vector database instance
+        VectorStore: Initialized vector store instance, selected by VECTOR_STORE_BACKEND
     """
 
     loggers["vector_database"].info("Initializing database...")
 
+    if settings.VECTOR_STORE_BACKEND == "numpy":
+        vector_db = NumpyVectorStore(settings.NUMPY_VECTOR_STORE_PATH)
+        vector_db.initialize_database()
+        return vector_db
+
     # Parse connection parameters
     connection_params = {
         "host": settings.DB_HOST,
@@ -99,6 +106,10 @@ def main():
 
         loggers["data_loader"].info("Data loading completed successfully!")
 
+        # Build the ANN indexes once the tables are loaded
+        if isinstance(vector_db, VectorDatabase):
+            vector_db.build_vector_indexes()
+
     except Exception as e:
         loggers["data_loader"].error(f"Error during data loading: {str(e)}")
         raise
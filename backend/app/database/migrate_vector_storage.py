@@ -0,0 +1,60 @@
+"""
+Convert the existing stock tables to the vector storage mode set by VECTOR_QUANTIZATION.
+
+Adds the quantized column generated from the float32 embedding (the table is rewritten once),
+then rebuilds the ANN indexes on it. The float32 embedding is kept for the exact rescoring.
+
+Usage (from the backend directory):
+    VECTOR_QUANTIZATION=binary python -m app.database.migrate_vector_storage --drop-unused
+"""
+import argparse
+
+from dotenv import load_dotenv
+
+from app.config.settings import Settings
+from app.database.vector_db import VectorDatabase
+from app.deps.db import get_connection_params
+from app.utils.logger import setup_logger
+
+load_dotenv()
+settings = Settings()
+
+logger = setup_logger("migrate_vector_storage")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--drop-unused", action="store_true",
+        help="Drop the quantized columns of the other storage modes",
+    )
+    parser.add_argument(
+        "--skip-index", action="store_true",
+        help="Only add the column, build the indexes later with build_vector_indexes",
+    )
+    args = parser.parse_args()
+
+    if settings.VECTOR_QUANTIZATION == "none":
+        parser.error("Set VECTOR_QUANTIZATION to halfvec or binary")
+
+    vector_db = VectorDatabase(get_connection_params())
+    try:
+        vector_db.connect()
+
+        logger.info(f"Migrating the stock tables to {settings.VECTOR_QUANTIZATION} storage...")
+        sizes = vector_db.migrate_quantization(settings.VECTOR_QUANTIZATION, args.drop_unused)
+
+        if not args.skip_index:
+            vector_db.build_vector_indexes()
+
+        logger.info("Vector storage migration completed successfully!", extra={"sizes": sizes})
+
+    except Exception as e:
+        logger.error(f"Error during vector storage migration: {str(e)}")
+        raise
+    finally:
+        vector_db.disconnect()
+
+
+if __name__ == "__main__":
+    main()
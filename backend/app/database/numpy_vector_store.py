@@ -0,0 +1,559 @@
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.config.settings import Settings
+from app.database.catalog_events import publish_products_changed
+from app.database.vector_db import safe_float, safe_int
+from app.database.vector_store import VectorStore
+from app.utils.logger import setup_logger
+
+settings = Settings()
+
+# Columns stored with the products, the embeddings are kept in the matrix
+PRODUCT_FIELDS = [
+    column for column in settings.PRODUCT_DB_COLUMNS if not column.startswith("embedding")
+]
+
+
+def to_json_value(value: Any) -> Any:
+    """
+    Convert a DataFrame cell to a JSON serializable value, NaN becoming None.
+
+    Args:
+        value (Any): The cell value
+
+    Returns:
+        Any: The JSON serializable value
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def parse_categories(categories: Any) -> List[str]:
+    """
+    Read the categories of a product, stored as a list or as the JSON text of a list.
+
+    Args:
+        categories (Any): The categories value
+
+    Returns:
+        List[str]: The categories, empty if they are not a list
+    """
+    if isinstance(categories, str) and categories.startswith("["):
+        try:
+            categories = json.loads(categories)
+        except json.JSONDecodeError:
+            return []
+    return categories if isinstance(categories, list) else []
+
+
+def matches_filters(product: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    """
+    Check a product against the structured search filters, with the semantics of the SQL
+    predicates of build_filter_predicates: a missing value never matches a bound.
+
+    Args:
+        product (Dict[str, Any]): The stored product
+        filters (Dict[str, Any]): The filters of SearchFilters
+
+    Returns:
+        bool: Whether the product passes every filter
+    """
+    bounds = (
+        ("min_price", "price", lambda value, bound: value >= bound),
+        ("max_price", "price", lambda value, bound: value <= bound),
+        ("min_average_rating", "average_rating", lambda value, bound: value >= bound),
+        ("min_rating_number", "rating_number", lambda value, bound: value >= bound),
+    )
+    for filter_name, field, check in bounds:
+        if filters.get(filter_name) is None:
+            continue
+        value = safe_float(product.get(field))
+        if value is None or not check(value, filters[filter_name]):
+            return False
+
+    if filters.get("stores"):
+        stores = {store.lower() for store in filters["stores"]}
+        if (product.get("store") or "").lower() not in stores:
+            return False
+    if filters.get("categories"):
+        if not set(filters["categories"]) & set(parse_categories(product.get("categories"))):
+            return False
+    if filters.get("details"):
+        details = product.get("details") or {}
+        if any(details.get(key) != value for key, value in filters["details"].items()):
+            return False
+    return True
+
+
+def get_thumbnail(images: Any) -> Optional[str]:
+    """
+    URL of the first image of a product, like the thumbnail column of the search card.
+
+    Args:
+        images (Any): The images of the product, a list of image variants
+
+    Returns:
+        Optional[str]: The large, hi_res or thumb URL of the first image, None without images
+    """
+    if not isinstance(images, list) or not images or not isinstance(images[0], dict):
+        return None
+    first_image = images[0]
+    return first_image.get("large") or first_image.get("hi_res") or first_image.get("thumb")
+
+
+def get_feature_summary(features: Any) -> str:
+    """
+    First two features of a product, like the feature_summary column of the search card.
+
+    Args:
+        features (Any): The features of the product
+
+    Returns:
+        str: The summary, truncated to SEARCH_CARD_FEATURE_SUMMARY_LENGTH
+    """
+    if not isinstance(features, list):
+        return ""
+    summary = " | ".join(str(feature) for feature in features[:2])
+    return summary[: settings.SEARCH_CARD_FEATURE_SUMMARY_LENGTH]
+
+
+def tokenize(text: str) -> set[str]:
+    """
+    Lowercase words and numbers of a text, the terms of the full-text search.
+
+    Args:
+        text (str): The text
+
+    Returns:
+        set[str]: The distinct terms
+    """
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def lexical_score(product: Dict[str, Any], terms: set[str]) -> float:
+    """
+    Score a product against the query terms like the weights of the search_tsv column:
+    a term of the title or store counts 1, a term of the features 0.4.
+
+    Args:
+        product (Dict[str, Any]): The stored product
+        terms (set[str]): Terms of the query
+
+    Returns:
+        float: The score, 0 when no term matches
+    """
+    header = tokenize(f"{product.get('title') or ''} {product.get('store') or ''}")
+    features = product.get("features")
+    body = tokenize(" ".join(str(f) for f in features) if isinstance(features, list) else str(features or ""))
+    return len(terms & header) + 0.4 * len(terms & (body - header))
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    In-process vector store without dependencies besides NumPy.
+    The L2-normalized embeddings of each table are kept in a contiguous float32 matrix memory-mapped
+    from disk, and top-k searches are a matrix-vector product followed by argpartition.
+    Products are stored next to the matrix as JSON lines, row i of the matrix being line i.
+
+    Attributes:
+        data_dir (str): Directory holding the table files
+        embedding_dimension (int): Dimension of the embeddings
+    """
+
+    def __init__(
+        self,
+        data_dir: str = settings.NUMPY_VECTOR_STORE_PATH,
+        embedding_dimension: int = settings.EMBEDDING_DIMENSION,
+        initial_capacity: int = 1024,
+    ):
+        """
+        Constructor for NumpyVectorStore class.
+
+        Args:
+            data_dir (str): Directory holding the table files
+            embedding_dimension (int): Dimension of the embeddings
+            initial_capacity (int): Rows allocated when a table file is created
+        """
+        self.logger = setup_logger("numpy_vector_store")
+
+        self.data_dir = data_dir
+        self.embedding_dimension = embedding_dimension
+        self.initial_capacity = initial_capacity
+        self.table_names = [
+            settings.IN_STOCK_PRODUCTS_TABLE_NAME,
+            settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME,
+        ]
+
+        # table name -> {"matrix": memmap, "size": rows in use, "products": list, "hashes": set}
+        self._tables: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _matrix_path(self, table_name: str) -> str:
+        return os.path.join(self.data_dir, f"{table_name}.npy")
+
+    def _products_path(self, table_name: str) -> str:
+        return os.path.join(self.data_dir, f"{table_name}.jsonl")
+
+    def _create_matrix(self, table_name: str, capacity: int) -> np.memmap:
+        return np.lib.format.open_memmap(
+            self._matrix_path(table_name),
+            mode="w+",
+            dtype=np.float32,
+            shape=(capacity, self.embedding_dimension),
+        )
+
+    def _load_table(self, table_name: str) -> Dict[str, Any]:
+        """
+        Open the files of a table, creating them if missing.
+        """
+        table = self._tables.get(table_name)
+        if table is not None:
+            return table
+
+        os.makedirs(self.data_dir, exist_ok=True)
+        if os.path.exists(self._matrix_path(table_name)):
+            matrix = np.load(self._matrix_path(table_name), mmap_mode="r+")
+        else:
+            matrix = self._create_matrix(table_name, self.initial_capacity)
+
+        products = []
+        if os.path.exists(self._products_path(table_name)):
+            with open(self._products_path(table_name), "r") as f:
+                products = [json.loads(line) for line in f]
+
+        table = {
+            "matrix": matrix,
+            "size": len(products),
+            "products": products,
+            "hashes": {product["unique_hash"] for product in products},
+        }
+        self._tables[table_name] = table
+        return table
+
+    def _grow(self, table_name: str, table: Dict[str, Any], min_capacity: int) -> None:
+        """
+        Reallocate the matrix of a table with at least min_capacity rows, doubling its size.
+        """
+        capacity = max(min_capacity, 2 * len(table["matrix"]))
+        old_matrix = table["matrix"]
+        tmp_path = self._matrix_path(table_name) + ".tmp"
+
+        new_matrix = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.float32, shape=(capacity, self.embedding_dimension)
+        )
+        new_matrix[: table["size"]] = old_matrix[: table["size"]]
+        new_matrix.flush()
+        del new_matrix, old_matrix
+        table["matrix"] = None
+
+        os.replace(tmp_path, self._matrix_path(table_name))
+        table["matrix"] = np.load(self._matrix_path(table_name), mmap_mode="r+")
+        self.logger.info(f"Grew {table_name} to {capacity} rows")
+
+    def initialize_database(self) -> None:
+        """
+        Create the empty stock tables, dropping the existing ones.
+        """
+        with self._lock:
+            os.makedirs(self.data_dir, exist_ok=True)
+            for table_name in self.table_names:
+                self._tables.pop(table_name, None)
+                for path in (self._matrix_path(table_name), self._products_path(table_name)):
+                    if os.path.exists(path):
+                        os.remove(path)
+                self._load_table(table_name)
+
+        for table_name in self.table_names:
+            publish_products_changed(table_name)
+        self.logger.info("Vector store initialized successfully")
+
+    def batch_insert_product(self, products: List[Dict[str, Any]], embeddings: np.ndarray, table_name: str) -> int:
+        """
+        Append products to a table, skipping the duplicates like the unique_hash constraint of Postgres.
+
+        Args:
+            products (List[Dict[str, Any]]): The products, without their embeddings
+            embeddings (np.ndarray): The embeddings, one row per product
+            table_name (str): Name of the table to insert products into
+
+        Returns:
+            int: Number of inserted products
+        """
+        with self._lock:
+            table = self._load_table(table_name)
+
+            new_products, new_rows = [], []
+            for product, embedding in zip(products, embeddings):
+                unique_hash = hashlib.md5(
+                    f"{product.get('title') or ''}{product.get('description') or ''}"
+                    f"{product.get('store') or ''}".encode("utf-8")
+                ).hexdigest()
+                if unique_hash in table["hashes"]:
+                    continue
+                table["hashes"].add(unique_hash)
+                new_products.append({
+                    **product,
+                    "id": table["size"] + len(new_products) + 1,
+                    "unique_hash": unique_hash,
+                })
+                new_rows.append(embedding)
+
+            if not new_products:
+                return 0
+
+            start, end = table["size"], table["size"] + len(new_products)
+            if end > len(table["matrix"]):
+                self._grow(table_name, table, end)
+
+            vectors = np.asarray(new_rows, dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            table["matrix"][start:end] = vectors / norms
+            table["matrix"].flush()
+
+            # The products file is written last, its line count is the number of valid rows
+            with open(self._products_path(table_name), "a") as f:
+                for product in new_products:
+                    f.write(json.dumps(product) + "\n")
+
+            table["products"].extend(new_products)
+            table["size"] = end
+
+        publish_products_changed(table_name)
+        self.logger.info(f"Inserted batch of {len(new_products)} products into {table_name}")
+        return len(new_products)
+
+    def insert_products_information(self, df_product: pd.DataFrame) -> None:
+        """
+        Insert products into the stock table matching their inventory_status.
+
+        Args:
+            df_product (pd.DataFrame): DataFrame containing products
+
+        Raises:
+            ValueError: If required columns are missing
+        """
+        if df_product.empty:
+            self.logger.warning("No products information to insert")
+            return
+
+        missing_columns = [
+            col for col in settings.PRODUCT_DB_COLUMNS if col not in df_product.columns
+        ]
+        if missing_columns:
+            raise ValueError(f"Missing required columns: {missing_columns}")
+
+        for stock_status, table_name in (
+            ("in_stock", settings.IN_STOCK_PRODUCTS_TABLE_NAME),
+            ("out_of_stock", settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME),
+        ):
+            df_table = df_product[df_product["inventory_status"] == stock_status]
+            if df_table.empty:
+                continue
+
+            products = [
+                {column: to_json_value(row[column]) for column in PRODUCT_FIELDS}
+                for _, row in df_table.iterrows()
+            ]
+            embeddings = np.asarray(df_table["embedding"].to_list(), dtype=np.float32)
+            self.batch_insert_product(products, embeddings, table_name)
+
+        self.logger.info(f"Successfully inserted {len(df_product)} products into the vector store")
+
+    def _top_k(self, scores: np.ndarray, top_k: int) -> np.ndarray:
+        """
+        Indices of the top_k highest scores of each row, best first.
+        """
+        k = min(top_k, scores.shape[-1])
+        if k <= 0:
+            return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+
+        # argpartition is O(n), only the k best are sorted
+        candidates = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+        order = np.argsort(-np.take_along_axis(scores, candidates, axis=-1), axis=-1)
+        return np.take_along_axis(candidates, order, axis=-1)
+
+    def _to_result(self, product: Dict[str, Any], similarity: float) -> Dict[str, Any]:
+        """
+        Format a product as the search card returned by the Postgres search.
+        """
+        return {
+            "id": product["id"],
+            "title": product.get("title"),
+            "average_rating": safe_float(product.get("average_rating")),
+            "rating_number": safe_int(product.get("rating_number")),
+            "price": safe_float(product.get("price")),
+            "thumbnail": get_thumbnail(product.get("images")),
+            "feature_summary": get_feature_summary(product.get("features")),
+            "similarity": safe_float(similarity),
+        }
+
+    def _to_product(self, product: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Format a product like the full product details of the Postgres store.
+        """
+        return {
+            "id": product["id"],
+            "title": product.get("title"),
+            "average_rating": safe_float(product.get("average_rating")),
+            "rating_number": safe_int(product.get("rating_number")),
+            "features": product.get("features"),
+            "description": product.get("description"),
+            "price": safe_float(product.get("price")),
+            "images": product.get("images"),
+            "store": product.get("store"),
+            "categories": product.get("categories"),
+            "details": product.get("details") or {},
+        }
+
+    def _snapshot(self, table_name: str) -> tuple[np.ndarray, List[Dict[str, Any]]]:
+        with self._lock:
+            table = self._load_table(table_name)
+            return table["matrix"][: table["size"]], table["products"][: table["size"]]
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def search_products(
+        self,
+        query_embedding: list[float],
+        table_name: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for products in a table by exact cosine similarity.
+
+        Args:
+            query_embedding (list[float]): Embedding of the query
+            table_name (str): Name of the table to search for products
+            top_k (int): Number of products to return
+            filters (Optional[Dict[str, Any]]): Structured filters of SearchFilters
+
+        Returns:
+            results (List[Dict[str, Any]]): Products with their similarity, most similar first
+        """
+        matrix, products = self._snapshot(table_name)
+        query = self._normalize(np.asarray(query_embedding, dtype=np.float32))
+
+        scores = matrix @ query
+        if filters:
+            # Rows failing the filters can never reach the top k
+            mask = np.fromiter(
+                (matches_filters(product, filters) for product in products),
+                dtype=bool, count=len(products),
+            )
+            top_k = min(top_k, int(mask.sum()))
+            scores = np.where(mask, scores, -np.inf)
+
+        results = [self._to_result(products[i], scores[i]) for i in self._top_k(scores, top_k)]
+
+        self.logger.info(f"{len(results)} products found from {table_name}.")
+        return results
+
+    def get_product(self, product_id: int, table_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the full details of a product. Ids are the 1-based rows of the table.
+
+        Args:
+            product_id (int): Id of the product
+            table_name (str): Name of the table of the product
+
+        Returns:
+            Optional[Dict[str, Any]]: The product, None if it does not exist
+        """
+        _, products = self._snapshot(table_name)
+        if not 1 <= product_id <= len(products):
+            return None
+        return self._to_product(products[product_id - 1])
+
+    def search_stock_tables_lexical(
+        self,
+        query_text: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Full-text search of both tables by counting the query terms of each product.
+
+        Args:
+            query_text (str): Text of the query
+            top_k (int): Number of products to return from each table
+            filters (Optional[Dict[str, Any]]): Structured filters of SearchFilters
+
+        Returns:
+            Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: In-stock and out-of-stock results,
+                best lexical match first
+        """
+        terms = tokenize(query_text)
+        results = []
+        for table_name in self.table_names:
+            _, products = self._snapshot(table_name)
+            scored = [
+                (score, product)
+                for product in products
+                if (score := lexical_score(product, terms)) > 0
+                and (not filters or matches_filters(product, filters))
+            ]
+            scored.sort(key=lambda item: item[0], reverse=True)
+            results.append([
+                {**self._to_result(product, None), "lexical_score": score}
+                for score, product in scored[:top_k]
+            ])
+        return results[0], results[1]
+
+    def search_products_batch(
+        self, query_embeddings: List[list[float]], table_name: str, top_k: int = 10
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search for the products of several query embeddings with a single matrix product.
+
+        Args:
+            query_embeddings (List[list[float]]): Embeddings of the queries
+            table_name (str): Name of the table to search for products
+            top_k (int): Number of products to return per query
+
+        Returns:
+            List[List[Dict[str, Any]]]: Products of each query, in the order of the embeddings
+        """
+        if not len(query_embeddings):
+            return []
+
+        matrix, products = self._snapshot(table_name)
+        queries = self._normalize(np.asarray(query_embeddings, dtype=np.float32))
+
+        scores = queries @ matrix.T
+        top = self._top_k(scores, top_k)
+        return [
+            [self._to_result(products[i], scores[q, i]) for i in top[q]]
+            for q in range(len(queries))
+        ]
+
+
+@lru_cache(maxsize=1)
+def get_numpy_vector_store() -> NumpyVectorStore:
+    """
+    Initialize the process-wide NumPy vector store and save it in the cache.
+
+    Returns:
+        NumpyVectorStore: The NumPy vector store.
+    """
+    return NumpyVectorStore()
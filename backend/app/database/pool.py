@@ -0,0 +1,146 @@
+from typing import Any, Dict, Optional
+
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from app.config.settings import Settings
+from app.database.async_vector_db import register_vector_types_async
+from app.database.vector_db import register_vector_types
+from app.utils.logger import setup_logger
+
+settings = Settings()
+
+logger = setup_logger("database_pool")
+
+# Process-wide pools, created once in the app lifespan
+_pool: Optional[ConnectionPool] = None
+_async_pool: Optional[AsyncConnectionPool] = None
+
+
+def create_pool(connection_params: Dict[str, Any]) -> ConnectionPool:
+    """
+    Create a sync connection pool. Connections are health-checked when borrowed
+    and have the pgvector types registered when created.
+
+    Args:
+        connection_params (Dict[str, Any]): Dictionary containing database connection parameters
+
+    Returns:
+        ConnectionPool: The (not yet opened) connection pool
+    """
+    return ConnectionPool(
+        kwargs=connection_params,
+        min_size=settings.DB_POOL_MIN_SIZE,
+        max_size=settings.DB_POOL_MAX_SIZE,
+        max_idle=settings.DB_POOL_MAX_IDLE,
+        max_lifetime=settings.DB_POOL_MAX_LIFETIME,
+        timeout=settings.DB_POOL_TIMEOUT,
+        check=ConnectionPool.check_connection,
+        configure=register_vector_types,
+        name="vector_db_sync",
+        open=False,
+    )
+
+
+def create_async_pool(connection_params: Dict[str, Any]) -> AsyncConnectionPool:
+    """
+    Create an async connection pool. Connections are health-checked when borrowed
+    and have the pgvector types registered when created.
+
+    Args:
+        connection_params (Dict[str, Any]): Dictionary containing database connection parameters
+
+    Returns:
+        AsyncConnectionPool: The (not yet opened) connection pool
+    """
+    return AsyncConnectionPool(
+        kwargs=connection_params,
+        min_size=settings.DB_POOL_MIN_SIZE,
+        max_size=settings.DB_POOL_MAX_SIZE,
+        max_idle=settings.DB_POOL_MAX_IDLE,
+        max_lifetime=settings.DB_POOL_MAX_LIFETIME,
+        timeout=settings.DB_POOL_TIMEOUT,
+        check=AsyncConnectionPool.check_connection,
+        configure=register_vector_types_async,
+        name="vector_db_async",
+        open=False,
+    )
+
+
+async def open_pools(connection_params: Dict[str, Any]) -> None:
+    """
+    Open the process-wide sync and async pools.
+    Connections are established in the background so startup does not wait for the database.
+
+    Args:
+        connection_params (Dict[str, Any]): Dictionary containing database connection parameters
+    """
+    global _pool, _async_pool
+
+    if _pool is None:
+        _pool = create_pool(connection_params)
+        _pool.open(wait=False)
+
+    if _async_pool is None:
+        _async_pool = create_async_pool(connection_params)
+        await _async_pool.open(wait=False)
+
+    logger.info("Database connection pools opened", extra={
+        "min_size": settings.DB_POOL_MIN_SIZE,
+        "max_size": settings.DB_POOL_MAX_SIZE,
+    })
+
+
+async def close_pools() -> None:
+    """
+    Close the process-wide sync and async pools.
+    """
+    global _pool, _async_pool
+
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+    logger.info("Database connection pools closed")
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Get the process-wide sync pool.
+
+    Raises:
+        RuntimeError: If the pool has not been opened
+    """
+    if _pool is None:
+        raise RuntimeError("Database connection pool is not open")
+    return _pool
+
+
+def get_async_pool() -> AsyncConnectionPool:
+    """
+    Get the process-wide async pool.
+
+    Raises:
+        RuntimeError: If the pool has not been opened
+    """
+    if _async_pool is None:
+        raise RuntimeError("Async database connection pool is not open")
+    return _async_pool
+
+
+def get_pool_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Get the statistics of the open pools (size, available connections, waiting requests, errors...).
+
+    Returns:
+        Dict[str, Dict[str, int]]: Statistics keyed by pool variant
+    """
+    stats = {}
+    if _pool is not None:
+        stats["sync"] = _pool.get_stats()
+    if _async_pool is not None:
+        stats["async"] = _async_pool.get_stats()
+    return stats
@@ -0,0 +1,158 @@
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config.settings import Settings
+from app.database.catalog_events import subscribe
+from app.utils.cache import LRUCache
+from app.utils.logger import setup_logger
+
+settings = Settings()
+
+logger = setup_logger("product_cache")
+
+# Rough overhead in bytes of a cached dict and its key beyond the JSON size of the card
+ENTRY_OVERHEAD_BYTES = 400
+
+
+def estimate_card_size(card: Dict[str, Any]) -> int:
+    """
+    Estimate the memory used by a cached search card.
+
+    Args:
+        card (Dict[str, Any]): The search card
+
+    Returns:
+        int: The estimated size in bytes
+    """
+    return len(json.dumps(card, default=str)) + ENTRY_OVERHEAD_BYTES
+
+
+class ProductCache:
+    """
+    Cache of the search cards of the products, keyed on (table name, product id).
+    The searches only return ids and scores, popular products are then hydrated from this cache
+    instead of being read again from Postgres. Bounded by entry count and by estimated bytes.
+
+    Attributes:
+        entries (LRUCache): The cached search cards
+    """
+
+    def __init__(self, max_size: int, max_bytes: Optional[int] = None):
+        """
+        Constructor for ProductCache class.
+
+        Args:
+            max_size (int): Maximum number of cached products
+            max_bytes (Optional[int]): Maximum estimated size of the cached products
+        """
+        self.entries = LRUCache(
+            max_size=max_size, max_bytes=max_bytes, sizeof=estimate_card_size
+        )
+        self.invalidations = 0
+
+    def lookup(self, table_name: str, product_ids: List[int]) -> Tuple[Dict[int, Dict[str, Any]], List[int]]:
+        """
+        Get the cached search cards of products.
+
+        Args:
+            table_name (str): Name of the products table
+            product_ids (List[int]): Ids of the products
+
+        Returns:
+            Tuple[Dict[int, Dict[str, Any]], List[int]]: The cached cards by id and the missing ids
+        """
+        cards, missing_ids = {}, []
+        for product_id in dict.fromkeys(product_ids):
+            card = self.entries.get((table_name, product_id))
+            if card is None:
+                missing_ids.append(product_id)
+            else:
+                cards[product_id] = card
+        return cards, missing_ids
+
+    def store(self, table_name: str, cards: List[Dict[str, Any]]) -> None:
+        """
+        Cache search cards read from a products table.
+
+        Args:
+            table_name (str): Name of the products table
+            cards (List[Dict[str, Any]]): The search cards, with their id
+        """
+        for card in cards:
+            self.entries.set((table_name, card["id"]), card)
+
+    def invalidate(self, table_name: str, product_ids: Optional[List[int]] = None) -> None:
+        """
+        Drop the cards of rewritten products.
+        Without product ids the table may have been reloaded, reusing ids, so every card of the
+        table is dropped.
+
+        Args:
+            table_name (str): Name of the products table
+            product_ids (Optional[List[int]]): Ids of the changed products, None for the whole table
+        """
+        if product_ids is None:
+            dropped = sum(
+                self.entries.delete(key) for key in self.entries.keys() if key[0] == table_name
+            )
+        else:
+            dropped = sum(
+                self.entries.delete((table_name, int(product_id))) for product_id in product_ids
+            )
+        self.invalidations += dropped
+
+        if dropped:
+            logger.info("Product cache invalidated", extra={
+                "table_name": table_name,
+                "dropped": dropped
+            })
+
+    def clear(self) -> None:
+        """
+        Remove all cached cards.
+        """
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters. Hits and misses count product ids, not searches.
+
+        Returns:
+            Dict[str, Any]: Counters of the cached cards
+        """
+        return {**self.entries.stats(), "invalidations": self.invalidations}
+
+
+def attach_search_cards(
+    hits: List[Dict[str, Any]], cards: Dict[int, Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Merge the search hits (id and scores) with the search cards of their products, keeping the
+    order of the hits. Hits whose product was deleted since the search are dropped.
+
+    Args:
+        hits (List[Dict[str, Any]]): The search hits
+        cards (Dict[int, Dict[str, Any]]): The search cards by id
+
+    Returns:
+        List[Dict[str, Any]]: The hydrated search results, new dicts the cached cards are not shared with
+    """
+    return [{**cards[hit["id"]], **hit} for hit in hits if hit["id"] in cards]
+
+
+@lru_cache(maxsize=1)
+def get_product_cache() -> ProductCache:
+    """
+    Initialize the process-wide product cache and save it in the cache.
+    The cache is subscribed to catalog changes so the cards of rewritten products are dropped.
+
+    Returns:
+        ProductCache: The product cache.
+    """
+    cache = ProductCache(
+        max_size=settings.PRODUCT_CACHE_MAX_SIZE,
+        max_bytes=settings.PRODUCT_CACHE_MAX_BYTES,
+    )
+    subscribe(cache.invalidate)
+    return cache
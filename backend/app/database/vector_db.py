@@ -2,29 +2,945 @@ import os
 import json
 import math
 
+import numpy as np
 import pandas as pd
 import psycopg
+from pgvector.psycopg import register_vector
+from psycopg import sql
+from psycopg.types.json import Jsonb
+from psycopg_pool import ConnectionPool
 
 from dotenv import load_dotenv
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Optional
 
 from app.config.settings import Settings
+from app.database.catalog_events import notify_products_changed, publish_products_changed
+from app.database.product_cache import attach_search_cards, get_product_cache
+from app.database.vector_store import VectorStore
 from app.utils.logger import setup_logger
+from app.utils.vectors import shorten_embedding
 
 load_dotenv()
 settings = Settings()
 
 
-class VectorDatabase:
+def safe_float(value: Any) -> float | None:
+    """
+    Convert a value to float, handling NaN values by converting them to None.
+    """
+    try:
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return None
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def safe_int(value: Any) -> int | None:
+    """
+    Convert a value to int, handling NaN values by converting them to None.
+    """
+    try:
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return None
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+# Distance ranking the candidates of the first stage of the two-stage search, per mode.
+# {embedding} and {short_embedding} are the SQL expressions of the query vectors.
+FIRST_STAGE_DISTANCES = {
+    "short": "embedding_short <=> {short_embedding}",
+    "halfvec": "embedding_half <=> {embedding}::halfvec({dimension})",
+    "binary": "embedding_bit <~> binary_quantize({embedding})::bit({dimension})",
+}
+
+# Column, index name suffix and operator class of the ANN index, per first stage mode
+# (None is the single-stage search on the full embedding)
+ANN_INDEXES = {
+    None: ("embedding", "emb_cos_idx", "vector_cosine_ops"),
+    "short": ("embedding_short", "emb_short_cos_idx", "vector_cosine_ops"),
+    "halfvec": ("embedding_half", "emb_half_cos_idx", "halfvec_cosine_ops"),
+    "binary": ("embedding_bit", "emb_bit_hamming_idx", "bit_hamming_ops"),
+}
+
+# Quantized copies of the embedding, generated by Postgres so inserts and moves need no change
+QUANTIZED_COLUMNS = {
+    "halfvec": (
+        "embedding_half",
+        "HALFVEC({dimension}) GENERATED ALWAYS AS (embedding::halfvec({dimension})) STORED",
+    ),
+    "binary": (
+        "embedding_bit",
+        "BIT({dimension}) GENERATED ALWAYS AS (binary_quantize(embedding)::bit({dimension})) STORED",
+    ),
+}
+
+# Full-text search document of the hybrid search: title and store rank above the features.
+# Generated by Postgres like the quantized columns.
+SEARCH_TSV_COLUMN = (
+    "search_tsv",
+    "TSVECTOR GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('{config}', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('{config}', coalesce(store, '')), 'A') || "
+    "setweight(jsonb_to_tsvector('{config}', coalesce(features, '[]'::jsonb), '[\"string\"]'), 'B')"
+    ") STORED",
+)
+
+# Search card of a product: small generated columns stored inline in the heap row, so the
+# searches select them instead of detoasting features, description, images and details.
+# {summary_length} is the length of the feature summary.
+SEARCH_CARD_COLUMNS = {
+    "thumbnail": (
+        "TEXT GENERATED ALWAYS AS (coalesce("
+        "images->0->>'large', images->0->>'hi_res', images->0->>'thumb')) STORED"
+    ),
+    "feature_summary": (
+        "TEXT GENERATED ALWAYS AS (left("
+        "coalesce(features->>0, '') || coalesce(' | ' || (features->>1), ''), {summary_length})) STORED"
+    ),
+}
+
+# Columns of the search cards hydrating the search hits, parsed by parse_search_card_row.
+# The searches themselves only return ids and scores.
+SEARCH_CARD_SELECT = """id,
+            title,
+            average_rating,
+            rating_number,
+            price::float,  -- Convert price to float
+            thumbnail,
+            feature_summary"""
+
+# Columns of the full product details, parsed by parse_product_row
+PRODUCT_DETAILS_SELECT = """id,
+            title,
+            average_rating,
+            rating_number,
+            features,
+            description,
+            price::float,
+            images,
+            store,
+            categories,
+            details"""
+
+# Words of the query sent to the full-text search, each one is bound as its own parameter
+MAX_LEXICAL_TERMS = 32
+
+
+def get_first_stage_mode() -> Optional[str]:
+    """
+    Get the first stage of the two-stage search from the settings.
+    A quantized column takes precedence over the short embedding.
+
+    Returns:
+        Optional[str]: "halfvec", "binary", "short", or None for a single-stage search
+    """
+    if settings.VECTOR_QUANTIZATION != "none":
+        if settings.VECTOR_QUANTIZATION not in QUANTIZED_COLUMNS:
+            raise ValueError(f"Unknown vector quantization: {settings.VECTOR_QUANTIZATION}")
+        return settings.VECTOR_QUANTIZATION
+    if settings.TWO_STAGE_SEARCH_ENABLED:
+        return "short"
+    return None
+
+
+def derive_num_candidates(top_k: int) -> int:
+    """
+    Number of candidates the two-stage search fetches in its first stage before rescoring.
+
+    Args:
+        top_k (int): Number of products to return
+
+    Returns:
+        int: The number of candidates
+    """
+    return max(top_k * settings.TWO_STAGE_CANDIDATES_FACTOR, settings.TWO_STAGE_MIN_CANDIDATES, top_k)
+
+
+# categories holds the JSON text of a list, exposed as jsonb for the ?| operator and its GIN index
+CATEGORIES_JSONB = "(CASE WHEN left(categories, 1) = '[' THEN categories::jsonb END)"
+
+# Indexes backing the structured filters and the full-text search, created by build_vector_indexes
+FILTER_INDEXES = {
+    "price_idx": "USING btree (price)",
+    "average_rating_idx": "USING btree (average_rating)",
+    "rating_number_idx": "USING btree (rating_number)",
+    "store_idx": "USING btree (lower(store))",
+    "categories_idx": f"USING gin ({CATEGORIES_JSONB})",
+    "details_idx": "USING gin (details jsonb_path_ops)",
+    "search_tsv_idx": "USING gin (search_tsv)",
+}
+
+
+def build_filter_predicates(filters: Optional[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Build the SQL predicates of the structured search filters.
+
+    Args:
+        filters (Optional[Dict[str, Any]]): The filters of SearchFilters, without the unset ones
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: The predicates joined with AND (empty without filters) and
+            their named parameters
+    """
+    predicates, params = [], {}
+    if not filters:
+        return "", params
+
+    if filters.get("min_price") is not None:
+        predicates.append("price >= %(filter_min_price)s")
+        params["filter_min_price"] = filters["min_price"]
+    if filters.get("max_price") is not None:
+        predicates.append("price <= %(filter_max_price)s")
+        params["filter_max_price"] = filters["max_price"]
+    if filters.get("min_average_rating") is not None:
+        predicates.append("average_rating >= %(filter_min_average_rating)s")
+        params["filter_min_average_rating"] = filters["min_average_rating"]
+    if filters.get("min_rating_number") is not None:
+        predicates.append("rating_number >= %(filter_min_rating_number)s")
+        params["filter_min_rating_number"] = filters["min_rating_number"]
+    if filters.get("stores"):
+        predicates.append("lower(store) = ANY(%(filter_stores)s)")
+        params["filter_stores"] = [store.lower() for store in filters["stores"]]
+    if filters.get("categories"):
+        predicates.append(f"{CATEGORIES_JSONB} ?| %(filter_categories)s")
+        params["filter_categories"] = list(filters["categories"])
+    if filters.get("details"):
+        predicates.append("details @> %(filter_details)s")
+        params["filter_details"] = Jsonb(filters["details"])
+
+    return " AND ".join(predicates), params
+
+
+def build_filter_count_query(table_names: List[str], predicates: str) -> str:
+    """
+    Build a query counting the rows matching the filters in each table, stopping at
+    %(filter_count_limit)s rows so unselective filters stay cheap.
+
+    Args:
+        table_names (List[str]): Names of the tables
+        predicates (str): The predicates of build_filter_predicates
+
+    Returns:
+        str: The SQL query, returning one count per table
+    """
+    counts = ",\n".join(
+        f"(SELECT count(*) FROM (SELECT 1 FROM {table_name} WHERE {predicates} "
+        f"LIMIT %(filter_count_limit)s) AS matching)"
+        for table_name in table_names
+    )
+    return f"SELECT {counts}"
+
+
+def build_two_stage_source(
+    table_name: str,
+    embedding: str,
+    short_embedding: Optional[str],
+    num_candidates: str,
+    alias: str = "candidates",
+    predicates: str = "",
+) -> str:
+    """
+    Build the FROM source of the two-stage search: the ANN candidates ranked on the short or
+    quantized embedding. The outer query rescores them exactly on the full embedding.
+
+    Args:
+        table_name (str): Name of the table to search for products
+        embedding (str): SQL expression of the query embedding
+        short_embedding (Optional[str]): SQL expression of the short query embedding
+        num_candidates (str): SQL expression of the number of candidates
+        alias (str): Alias of the candidates subquery
+        predicates (str): Filter predicates applied to the candidates
+
+    Returns:
+        str: The SQL subquery
+    """
+    distance = FIRST_STAGE_DISTANCES[get_first_stage_mode()].format(
+        embedding=embedding,
+        short_embedding=short_embedding,
+        dimension=settings.EMBEDDING_DIMENSION,
+    )
+    where = f"\n            WHERE {predicates}" if predicates else ""
+    return f"""(
+            SELECT *
+            FROM {table_name}{where}
+            ORDER BY {distance}
+            LIMIT {num_candidates}
+        ) AS {alias}"""
+
+
+def build_search_params(
+    query_embedding: list[float], top_k: int, filters: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Build the parameters of the stock tables search query.
+
+    Args:
+        query_embedding (list[float]): Embedding of the query
+        top_k (int): Number of products to return from each table
+        filters (Optional[Dict[str, Any]]): The structured search filters
+
+    Returns:
+        Dict[str, Any]: The query parameters, vectors as float32 arrays for the binary format
+    """
+    params = {
+        "embedding": np.asarray(query_embedding, dtype=np.float32),
+        "top_k": top_k,
+    }
+    first_stage = get_first_stage_mode()
+    if first_stage == "short":
+        params["short_embedding"] = np.asarray(
+            shorten_embedding(query_embedding, settings.SHORT_EMBEDDING_DIMENSION), dtype=np.float32
+        )
+    if first_stage is not None:
+        params["num_candidates"] = derive_num_candidates(top_k)
+    params.update(build_filter_predicates(filters)[1])
+    return params
+
+
+def build_products_query(
+    table_name: str,
+    embedding: str,
+    top_k: str,
+    short_embedding: Optional[str] = None,
+    num_candidates: Optional[str] = None,
+    predicates: str = "",
+    exact: bool = False,
+    stock_status: Optional[str] = None,
+) -> str:
+    """
+    Build the query selecting the top-k products of a table.
+    The ANN index is used unless exact is set, in which case the filtered rows are ranked by a
+    sequential distance computation: faster and exact when the filters match few rows.
+
+    Args:
+        table_name (str): Name of the table to search for products
+        embedding (str): SQL expression of the query embedding
+        top_k (str): SQL expression of the number of products to return
+        short_embedding (Optional[str]): SQL expression of the short query embedding
+        num_candidates (Optional[str]): SQL expression of the number of two-stage candidates
+        predicates (str): Filter predicates of build_filter_predicates
+        exact (bool): Whether to skip the ANN index
+        stock_status (Optional[str]): Stock status returned as first column, if set
+
+    Returns:
+        str: The SQL query
+    """
+    where = f"\n        WHERE\n            {predicates}" if predicates else ""
+    source = table_name
+    if not exact and get_first_stage_mode() is not None:
+        source = build_two_stage_source(
+            table_name, embedding, short_embedding, num_candidates, predicates=predicates
+        )
+        where = ""
+
+    # "+ 0" hides the distance from the planner so the ANN index is not used
+    order_by = f"(embedding <=> {embedding}) + 0" if exact else f"embedding <=> {embedding}"
+    stock_status_column = f"\n            '{stock_status}' AS stock_status," if stock_status else ""
+
+    return f"""
+        SELECT{stock_status_column}
+            id,
+            1 - (embedding <=> {embedding}) AS similarity
+        FROM
+            {source}{where}
+        ORDER BY
+            {order_by}
+        LIMIT
+            {top_k}"""
+
+
+def build_search_query(table_name: str, predicates: str = "", exact: bool = False) -> str:
+    """
+    Build the cosine similarity search query for a products table.
+    Like build_stock_tables_search_query, the embedding and top_k are bound as parameters so the
+    statement can be prepared and the vector is sent in pgvector's binary format.
+
+    Args:
+        table_name (str): Name of the table to search for products
+        predicates (str): Filter predicates of build_filter_predicates
+        exact (bool): Whether to skip the ANN index
+
+    Returns:
+        str: The SQL query, with the placeholders of build_search_params
+    """
+    return build_products_query(
+        table_name,
+        "%(embedding)s",
+        "%(top_k)s",
+        "%(short_embedding)s",
+        "%(num_candidates)s",
+        predicates,
+        exact,
+    )
+
+
+def build_stock_tables_search_query(
+    in_stock_table_name: str,
+    out_of_stock_table_name: str,
+    predicates: str = "",
+    exact_tables: Tuple[str, ...] = (),
+) -> str:
+    """
+    Build a single query returning the top-k products of both stock tables.
+    The embedding and top_k are bound as parameters so the statement can be prepared once per
+    connection and the vector is sent a single time in pgvector's binary format.
+
+    Args:
+        in_stock_table_name (str): Name of the in-stock products table
+        out_of_stock_table_name (str): Name of the out-of-stock products table
+        predicates (str): Filter predicates of build_filter_predicates
+        exact_tables (Tuple[str, ...]): Tables searched without the ANN index
+
+    Returns:
+        str: The SQL query, with the placeholders of build_search_params
+    """
+    def select(stock_status: str, table_name: str) -> str:
+        return build_products_query(
+            table_name,
+            "%(embedding)s",
+            "%(top_k)s",
+            "%(short_embedding)s",
+            "%(num_candidates)s",
+            predicates,
+            exact=table_name in exact_tables,
+            stock_status=stock_status,
+        )
+
+    return (
+        f"({select('in_stock', in_stock_table_name)})\n"
+        "UNION ALL\n"
+        f"({select('out_of_stock', out_of_stock_table_name)})"
+    )
+
+
+def split_lexical_terms(query_text: str) -> List[str]:
+    """
+    Split the text of a full-text search into the words bound as parameters.
+
+    Args:
+        query_text (str): Text of the query
+
+    Returns:
+        List[str]: At most MAX_LEXICAL_TERMS words, a single empty one for a blank query
+    """
+    return query_text.split()[:MAX_LEXICAL_TERMS] or [""]
+
+
+def build_lexical_query(num_terms: int) -> sql.Composed:
+    """
+    Build the tsquery of a full-text search: any word of the query may match, so the words are
+    parsed separately and their tsqueries ORed. ts_rank_cd ranks the documents matching more of
+    them first.
+
+    Args:
+        num_terms (int): Number of words of the query
+
+    Returns:
+        sql.Composed: The tsquery expression, with the placeholders of build_lexical_search_params
+    """
+    return sql.SQL(" || ").join(
+        sql.SQL("plainto_tsquery({ts_config}::regconfig, {term})").format(
+            ts_config=sql.Placeholder("ts_config"), term=sql.Placeholder(f"query_term_{i}")
+        )
+        for i in range(num_terms)
+    )
+
+
+def build_lexical_search_query(
+    in_stock_table_name: str,
+    out_of_stock_table_name: str,
+    predicates: str = "",
+    num_terms: int = 1,
+) -> sql.Composed:
+    """
+    Build a single full-text search query returning the best matches of both stock tables.
+
+    Args:
+        in_stock_table_name (str): Name of the in-stock products table
+        out_of_stock_table_name (str): Name of the out-of-stock products table
+        predicates (str): Filter predicates of build_filter_predicates
+        num_terms (int): Number of words of the query, see split_lexical_terms
+
+    Returns:
+        sql.Composed: The SQL query, with the placeholders of build_lexical_search_params
+    """
+    filters = sql.SQL(f" AND {predicates}" if predicates else "")
+
+    def select(stock_status: str, table_name: str) -> sql.Composed:
+        return sql.SQL("""
+        SELECT
+            {stock_status} AS stock_status,
+            id,
+            ts_rank_cd(search_tsv, lexical_query) AS lexical_score
+        FROM
+            {table_name},
+            (SELECT {lexical_query} AS lexical_query) AS lexical_terms
+        WHERE
+            search_tsv @@ lexical_query{filters}
+        ORDER BY
+            lexical_score DESC
+        LIMIT
+            %(top_k)s""").format(
+            stock_status=sql.Literal(stock_status),
+            table_name=sql.Identifier(table_name),
+            lexical_query=build_lexical_query(num_terms),
+            filters=filters,
+        )
+
+    return sql.SQL("({})\nUNION ALL\n({})").format(
+        select("in_stock", in_stock_table_name),
+        select("out_of_stock", out_of_stock_table_name),
+    )
+
+
+def build_lexical_search_params(
+    query_text: str, top_k: int, filters: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Build the parameters of the full-text search query.
+
+    Args:
+        query_text (str): Text of the query
+        top_k (int): Number of products to return from each table
+        filters (Optional[Dict[str, Any]]): The structured search filters
+
+    Returns:
+        Dict[str, Any]: The query parameters
+    """
+    return {
+        **{f"query_term_{i}": term for i, term in enumerate(split_lexical_terms(query_text))},
+        "ts_config": settings.FULL_TEXT_SEARCH_CONFIG,
+        "top_k": top_k,
+        **build_filter_predicates(filters)[1],
+    }
+
+
+def split_lexical_rows(
+    rows: List[Tuple],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Split the rows of the full-text search query into in-stock and out-of-stock hits,
+    best lexical match first. The hits have a lexical_score and no similarity.
+
+    Args:
+        rows (List[Tuple]): Rows returned by the full-text search query
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: In-stock and out-of-stock products
+    """
+    results = {"in_stock": [], "out_of_stock": []}
+    for stock_status, product_id, lexical_score in rows:
+        product = parse_search_row((product_id, None))
+        product["lexical_score"] = safe_float(lexical_score)
+        results[stock_status].append(product)
+
+    for products in results.values():
+        products.sort(key=lambda p: p["lexical_score"] or 0.0, reverse=True)
+    return results["in_stock"], results["out_of_stock"]
+
+
+def split_stock_tables_rows(
+    rows: List[Tuple],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Split the rows of the stock tables search query into in-stock and out-of-stock hits.
+
+    Args:
+        rows (List[Tuple]): Rows returned by the stock tables search query
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: In-stock and out-of-stock products
+    """
+    in_stock_results = []
+    out_of_stock_results = []
+    for stock_status, *row in rows:
+        product = parse_search_row(tuple(row))
+        if stock_status == "in_stock":
+            in_stock_results.append(product)
+        else:
+            out_of_stock_results.append(product)
+
+    # Keep the similarity order of each table, independent of how Postgres appended the branches
+    in_stock_results.sort(key=lambda p: p["similarity"] or 0.0, reverse=True)
+    out_of_stock_results.sort(key=lambda p: p["similarity"] or 0.0, reverse=True)
+
+    return in_stock_results, out_of_stock_results
+
+
+def build_batch_search_query(table_name: str, num_queries: int) -> str:
+    """
+    Build a query returning the top-k products of a table for several query embeddings at once.
+    The embeddings are bound as a VALUES list and each one runs its own index scan through a LATERAL join.
+
+    Args:
+        table_name (str): Name of the table to search for products
+        num_queries (int): Number of query embeddings
+
+    Returns:
+        str: The SQL query, with one placeholder per embedding followed by a top_k placeholder.
+            With the two-stage search the number of candidates precedes top_k, and on the short
+            embedding each embedding is followed by its short embedding.
+    """
+    first_stage = get_first_stage_mode()
+    if first_stage == "short":
+        values = ", ".join(f"({i}, %s::vector, %s::vector)" for i in range(num_queries))
+    else:
+        values = ", ".join(f"({i}, %s::vector, NULL::vector)" for i in range(num_queries))
+
+    if first_stage is None:
+        source = f"{table_name} AS t"
+    else:
+        source = build_two_stage_source(
+            table_name, "q.embedding", "q.short_embedding", "%s", alias="t"
+        )
+
+    return f"""
+        SELECT
+            q.query_index,
+            p.*
+        FROM
+            (VALUES {values}) AS q(query_index, embedding, short_embedding)
+        CROSS JOIN LATERAL (
+            SELECT
+                id,
+                1 - (t.embedding <=> q.embedding) AS similarity
+            FROM
+                {source}
+            ORDER BY
+                t.embedding <=> q.embedding
+            LIMIT
+                %s
+        ) AS p
+        ORDER BY
+            q.query_index,
+            p.similarity DESC;
+    """
+
+
+def build_batch_search_params(query_embeddings: List[list[float]], top_k: int) -> List[Any]:
+    """
+    Build the parameters of the batch search query.
+
+    Args:
+        query_embeddings (List[list[float]]): Embeddings of the queries
+        top_k (int): Number of products to return per query
+
+    Returns:
+        List[Any]: The query parameters, in the order of the placeholders of build_batch_search_query
+    """
+    first_stage = get_first_stage_mode()
+    if first_stage is None:
+        return [np.asarray(e, dtype=np.float32) for e in query_embeddings] + [top_k]
+
+    params: List[Any] = []
+    for embedding in query_embeddings:
+        params.append(np.asarray(embedding, dtype=np.float32))
+        if first_stage == "short":
+            params.append(np.asarray(
+                shorten_embedding(embedding, settings.SHORT_EMBEDDING_DIMENSION), dtype=np.float32
+            ))
+    return params + [derive_num_candidates(top_k), top_k]
+
+
+def split_batch_rows(rows: List[Tuple], num_queries: int) -> List[List[Dict[str, Any]]]:
+    """
+    Group the rows of the batch search query by query.
+
+    Args:
+        rows (List[Tuple]): Rows returned by the batch search query
+        num_queries (int): Number of query embeddings
+
+    Returns:
+        List[List[Dict[str, Any]]]: Products of each query, in the order of the embeddings
+    """
+    results: List[List[Dict[str, Any]]] = [[] for _ in range(num_queries)]
+    for query_index, *row in rows:
+        results[query_index].append(parse_search_row(tuple(row)))
+    return results
+
+
+def derive_ivfflat_lists(row_count: int) -> int:
+    """
+    Derive the number of ivfflat lists from the row count, following the pgvector guidance:
+    rows / 1000 up to 1M rows and sqrt(rows) above.
+
+    Args:
+        row_count (int): Number of rows in the table
+
+    Returns:
+        int: The number of lists
+    """
+    if row_count <= 1_000_000:
+        return max(1, row_count // 1000)
+    return int(math.sqrt(row_count))
+
+
+def build_search_settings(
+    top_k: int,
+    probes: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    filtered: bool = False,
+) -> List[Tuple[str, Tuple]]:
+    """
+    Build the statements setting the ANN query parameters for the current transaction only.
+    set_config is used instead of SET LOCAL so the values can be bound as parameters.
+    A filtered search keeps scanning the index until enough rows pass the filters
+    (iterative scan), or over-fetches when iterative scans are disabled.
+
+    Args:
+        top_k (int): Number of products to return
+        probes (Optional[int]): ivfflat lists to scan, defaults to IVFFLAT_PROBES
+        ef_search (Optional[int]): hnsw candidate list size, defaults to HNSW_EF_SEARCH
+        filtered (bool): Whether the search has filter predicates
+
+    Returns:
+        List[Tuple[str, Tuple]]: The statements and their parameters
+    """
+    if get_first_stage_mode() is not None:
+        # The ANN scan returns the candidates, not top_k
+        top_k = derive_num_candidates(top_k)
+
+    iterative_scan = settings.FILTERED_SEARCH_ITERATIVE_SCAN if filtered else "off"
+    if iterative_scan not in ("off", "relaxed_order", "strict_order"):
+        raise ValueError(f"Unknown iterative scan mode: {iterative_scan}")
+    overfetch = settings.FILTERED_SEARCH_OVERFETCH_FACTOR if filtered and iterative_scan == "off" else 1
+
+    statements = []
+    if settings.VECTOR_INDEX_TYPE == "hnsw":
+        # hnsw cannot return more rows than its candidate list
+        ef_search = max(ef_search or settings.HNSW_EF_SEARCH, top_k) * overfetch
+        statements.append(("SELECT set_config('hnsw.ef_search', %s, true)", (str(ef_search),)))
+    else:
+        probes = (probes or settings.IVFFLAT_PROBES) * overfetch
+        statements.append(("SELECT set_config('ivfflat.probes', %s, true)", (str(probes),)))
+
+    if iterative_scan != "off":
+        # ivfflat only supports relaxed_order
+        if settings.VECTOR_INDEX_TYPE != "hnsw":
+            iterative_scan = "relaxed_order"
+        statements.append((
+            f"SELECT set_config('{settings.VECTOR_INDEX_TYPE}.iterative_scan', %s, true)",
+            (iterative_scan,),
+        ))
+    return statements
+
+
+def select_exact_tables(table_names: List[str], counts: Tuple[int, ...]) -> Tuple[str, ...]:
+    """
+    Select the tables whose filters are selective enough to be searched by an exact scan.
+
+    Args:
+        table_names (List[str]): Names of the tables, in the order of build_filter_count_query
+        counts (Tuple[int, ...]): Matching rows of each table, capped at the threshold + 1
+
+    Returns:
+        Tuple[str, ...]: The tables to search without the ANN index
+    """
+    threshold = settings.FILTERED_SEARCH_EXACT_THRESHOLD
+    return tuple(
+        table_name for table_name, count in zip(table_names, counts) if count <= threshold
+    )
+
+
+def register_vector_types(conn: psycopg.Connection) -> bool:
+    """
+    Register the pgvector types on a connection so vectors can be sent as binary parameters.
+
+    Args:
+        conn (psycopg.Connection): The database connection
+
+    Returns:
+        bool: False if the vector extension is not installed yet
+    """
+    try:
+        register_vector(conn)
+        return True
+    except psycopg.ProgrammingError:
+        return False
+
+
+def parse_search_row(row: Tuple) -> Dict[str, Any]:
+    """
+    Convert a row returned by the search queries into a search hit, hydrated afterwards with
+    the search card of the product.
+
+    Args:
+        row (Tuple): Row with the product id and its similarity
+
+    Returns:
+        Dict[str, Any]: The search hit
+    """
+    product_id, similarity = row
+    return {"id": product_id, "similarity": safe_float(similarity)}
+
+
+def parse_search_card_row(row: Tuple) -> Dict[str, Any]:
+    """
+    Convert a row with the SEARCH_CARD_SELECT columns into a search card.
+
+    Args:
+        row (Tuple): Row returned by the search cards query
+
+    Returns:
+        Dict[str, Any]: The search card of the product
+    """
+    id, title, average_rating, rating_number, price, thumbnail, feature_summary = row
+
+    return {
+        "id": id,
+        "title": title,
+        "average_rating": safe_float(average_rating),
+        "rating_number": safe_int(rating_number),
+        "price": safe_float(price),
+        "thumbnail": thumbnail,
+        "feature_summary": feature_summary or "",
+    }
+
+
+def build_search_cards_query(table_names: List[str]) -> str:
+    """
+    Build a single query reading the search cards of products of several tables by id.
+
+    Args:
+        table_names (List[str]): Names of the products tables
+
+    Returns:
+        str: The SQL query, with one array of ids per table. The first column is the table name.
+    """
+    return "\nUNION ALL\n".join(
+        f"""
+        SELECT
+            '{table_name}' AS table_name,
+            {SEARCH_CARD_SELECT}
+        FROM
+            {table_name}
+        WHERE
+            id = ANY(%s::bigint[])"""
+        for table_name in table_names
+    )
+
+
+def lookup_search_cards(
+    ids_by_table: Dict[str, List[int]],
+) -> Tuple[Dict[str, Dict[int, Dict[str, Any]]], Dict[str, List[int]]]:
+    """
+    Get the search cards of search hits from the product cache.
+
+    Args:
+        ids_by_table (Dict[str, List[int]]): Ids of the hits of each table
+
+    Returns:
+        Tuple[Dict[str, Dict[int, Dict[str, Any]]], Dict[str, List[int]]]: The cached cards by id
+            of each table and the ids to read from the tables that have misses
+    """
+    cards_by_table, missing_by_table = {}, {}
+    for table_name, product_ids in ids_by_table.items():
+        if settings.PRODUCT_CACHE_ENABLED:
+            cards, missing_ids = get_product_cache().lookup(table_name, product_ids)
+        else:
+            cards, missing_ids = {}, list(dict.fromkeys(product_ids))
+        cards_by_table[table_name] = cards
+        if missing_ids:
+            missing_by_table[table_name] = missing_ids
+    return cards_by_table, missing_by_table
+
+
+def add_search_card_rows(
+    cards_by_table: Dict[str, Dict[int, Dict[str, Any]]], rows: List[Tuple]
+) -> None:
+    """
+    Add the rows of the search cards query to the cards of each table and to the product cache.
+
+    Args:
+        cards_by_table (Dict[str, Dict[int, Dict[str, Any]]]): The cards by id of each table
+        rows (List[Tuple]): Rows returned by the search cards query
+    """
+    fetched_by_table: Dict[str, List[Dict[str, Any]]] = {}
+    for table_name, *row in rows:
+        card = parse_search_card_row(tuple(row))
+        cards_by_table[table_name][card["id"]] = card
+        fetched_by_table.setdefault(table_name, []).append(card)
+
+    if settings.PRODUCT_CACHE_ENABLED:
+        for table_name, cards in fetched_by_table.items():
+            get_product_cache().store(table_name, cards)
+
+
+def parse_product_row(row: Tuple) -> Dict[str, Any]:
+    """
+    Convert a row with the PRODUCT_DETAILS_SELECT columns into the full product details.
+
+    Args:
+        row (Tuple): Row returned by the product details query
+
+    Returns:
+        Dict[str, Any]: Product dictionary
+    """
+    (
+        id,
+        title,
+        average_rating,
+        rating_number,
+        features,
+        description,
+        price,
+        images,
+        store,
+        categories,
+        details,
+    ) = row
+
+    if isinstance(details, str):
+        details = json.loads(details)
+
+    return {
+        "id": id,
+        "title": title,
+        "average_rating": safe_float(average_rating),
+        "rating_number": safe_int(rating_number),
+        "features": features,
+        "description": description,
+        "price": safe_float(price),
+        "images": images,
+        "store": store,
+        "categories": categories,
+        "details": details or {},
+    }
+
+
+def build_product_details_query(table_name: str) -> str:
+    """
+    Build the query returning the full details of a product, by id.
+
+    Args:
+        table_name (str): Name of the products table
+
+    Returns:
+        str: The SQL query, with a single id placeholder
+    """
+    return f"""
+        SELECT
+            {PRODUCT_DETAILS_SELECT}
+        FROM
+            {table_name}
+        WHERE
+            id = %s"""
+
+
+class VectorDatabase(VectorStore):
     """
     Vector database class for storing and searching products.
     Postgresql and pgvector are used to store embeddings and perform similarity search.
 
     Attributes:
         connection_params (Dict[str, Any]): Dictionary containing database connection parameters
+        pool (Optional[ConnectionPool]): Connection pool to borrow the connection from
     """
 
-    def __init__(self, connection_params: Dict[str, Any]):
+    def __init__(self, connection_params: Dict[str, Any], pool: Optional[ConnectionPool] = None):
         """
         Constructor for VectorDatabase class.
 
@@ -35,6 +951,7 @@ class VectorDatabase:
                 - user: Database username
                 - password: Database 
                 - dbname: Database name
+            pool: Connection pool to borrow the connection from instead of opening one
         """
 
         # Initialize logger
@@ -42,6 +959,7 @@ class VectorDatabase:
 
         # Initialize connection parameters
         self.connection_params = connection_params
+        self.pool = pool
         self.conn = None
         self.embedding_dimension = settings.EMBEDDING_DIMENSION
 
@@ -53,8 +971,14 @@ class VectorDatabase:
             Exception: If failed to connect to the database
         """
         try:
+            if self.pool is not None:
+                self.conn = self.pool.getconn()
+                self.logger.info("Borrowed a connection from the pool")
+                return
+
             self.conn = psycopg.connect(**self.connection_params)
             self.conn.cursor()
+            register_vector_types(self.conn)
             self.logger.info("Connected to the database")
         except Exception as e:
             self.logger.error(f"Failed to connect to the database: {e}")
@@ -62,13 +986,17 @@ class VectorDatabase:
 
     def disconnect(self) -> None:
         """
-        Disconnect from the database.
+        Disconnect from the database. Pooled connections are returned to the pool.
 
         Raises:
             Exception: If failed to disconnect from the database
         """
 
-        if self.conn:
+        if self.conn and self.pool is not None:
+            self.pool.putconn(self.conn)
+            self.conn = None
+            self.logger.info("Returned the connection to the pool")
+        elif self.conn:
             self.conn.close()
             self.conn = None
             self.logger.info("Disconnected from the database")
@@ -88,6 +1016,7 @@ class VectorDatabase:
             cursor = self.conn.cursor()
 
             cursor.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+            register_vector_types(self.conn)
 
             cursor.execute("DROP TABLE IF EXISTS in_stock_products")
             cursor.execute("DROP TABLE IF EXISTS out_of_stock_products")
@@ -106,6 +1035,7 @@ class VectorDatabase:
                                 categories      TEXT,                          
                                 details         JSONB,                          
                                 embedding       VECTOR({self.embedding_dimension}),  -- pgvector column
+                                embedding_short VECTOR({settings.SHORT_EMBEDDING_DIMENSION}),  -- leading dimensions of embedding, renormalized
                                 unique_hash     TEXT GENERATED ALWAYS AS (MD5(title || description || store)) STORED,
                                 UNIQUE (unique_hash) -- Use unique_hash to prevent duplicate products
                             );
@@ -125,24 +1055,37 @@ class VectorDatabase:
                                 categories      TEXT,                          
                                 details         JSONB,                          
                                 embedding       VECTOR({self.embedding_dimension}),  -- pgvector column
+                                embedding_short VECTOR({settings.SHORT_EMBEDDING_DIMENSION}),  -- leading dimensions of embedding, renormalized
                                 unique_hash     TEXT GENERATED ALWAYS AS (MD5(title || description || store)) STORED,
                                 UNIQUE (unique_hash) -- Use unique_hash to prevent duplicate products
                             );
                            """)
 
-            # Create indexes using ivfflat index to speed up cosine similarity search
-            cursor.execute("""
-                           CREATE INDEX IF NOT EXISTS in_stock_emb_cos_idx
-                           ON in_stock_products USING ivfflat (embedding vector_cosine_ops)
-                           """)
+            # NOTE: The vector indexes are built by build_vector_indexes after the bulk load,
+            # ivfflat centroids computed on empty tables are useless.
 
-            # Create indexes using ivfflat index to speed up cosine similarity search
-            cursor.execute("""
-                           CREATE INDEX IF NOT EXISTS out_of_stock_emb_cos_idx
-                           ON out_of_stock_products USING ivfflat (embedding vector_cosine_ops)
-                           """)
+            for table_name in (
+                settings.IN_STOCK_PRODUCTS_TABLE_NAME,
+                settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME,
+            ):
+                self.add_search_tsv_column(cursor, table_name)
+                self.add_search_card_columns(cursor, table_name)
+
+            if settings.VECTOR_QUANTIZATION != "none":
+                for table_name in (
+                    settings.IN_STOCK_PRODUCTS_TABLE_NAME,
+                    settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME,
+                ):
+                    self.add_quantized_column(cursor, table_name, settings.VECTOR_QUANTIZATION)
+
+            # The dropped tables restart their ids, cached products and rankings are stale
+            table_names = (settings.IN_STOCK_PRODUCTS_TABLE_NAME, settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME)
+            for table_name in table_names:
+                notify_products_changed(cursor, table_name)
 
             self.conn.commit()
+            for table_name in table_names:
+                publish_products_changed(table_name)
             self.logger.info("Database initialized successfully")
 
         except Exception as e:
@@ -155,6 +1098,184 @@ class VectorDatabase:
             if "cursor" in locals():
                 cursor.close()
 
+    def add_quantized_column(self, cursor: psycopg.Cursor, table_name: str, quantization: str) -> None:
+        """
+        Add the quantized copy of the embedding to a products table, if missing.
+        The column is generated from embedding, so existing rows are converted by the table rewrite.
+
+        Args:
+            cursor (psycopg.Cursor): Cursor of the current transaction
+            table_name (str): Name of the products table
+            quantization (str): "halfvec" or "binary"
+        """
+        if quantization not in QUANTIZED_COLUMNS:
+            raise ValueError(f"Unknown vector quantization: {quantization}")
+
+        column, definition = QUANTIZED_COLUMNS[quantization]
+        cursor.execute(f"""
+                       ALTER TABLE {table_name}
+                       ADD COLUMN IF NOT EXISTS {column} {definition.format(dimension=self.embedding_dimension)}
+                       """)
+        self.logger.info(f"Added {quantization} column {column} to {table_name}")
+
+    def add_search_tsv_column(self, cursor: psycopg.Cursor, table_name: str) -> None:
+        """
+        Add the full-text search document of the hybrid search to a products table, if missing.
+
+        Args:
+            cursor (psycopg.Cursor): Cursor of the current transaction
+            table_name (str): Name of the products table
+        """
+        column, definition = SEARCH_TSV_COLUMN
+        cursor.execute(f"""
+                       ALTER TABLE {table_name}
+                       ADD COLUMN IF NOT EXISTS {column} {definition.format(config=settings.FULL_TEXT_SEARCH_CONFIG)}
+                       """)
+
+    def add_search_card_columns(self, cursor: psycopg.Cursor, table_name: str) -> None:
+        """
+        Add the generated search card columns to a products table, if missing.
+        Postgres keeps them in sync with images and features on every insert and move.
+
+        Args:
+            cursor (psycopg.Cursor): Cursor of the current transaction
+            table_name (str): Name of the products table
+        """
+        for column, definition in SEARCH_CARD_COLUMNS.items():
+            definition = definition.format(summary_length=int(settings.SEARCH_CARD_FEATURE_SUMMARY_LENGTH))
+            cursor.execute(f"""
+                           ALTER TABLE {table_name}
+                           ADD COLUMN IF NOT EXISTS {column} {definition}
+                           """)
+
+    def migrate_quantization(self, quantization: str, drop_unused: bool = False) -> Dict[str, Any]:
+        """
+        Convert the stock tables to a quantized storage mode: add the quantized column and report
+        the size of the tables. The ANN indexes must be rebuilt afterwards with build_vector_indexes.
+
+        Args:
+            quantization (str): "halfvec" or "binary"
+            drop_unused (bool): Drop the quantized columns of the other modes
+
+        Returns:
+            Dict[str, Any]: Size in bytes of each table (heap, TOAST and indexes) after the migration
+
+        Raises:
+            Exception: If failed to migrate the tables
+        """
+        try:
+            if not self.conn:
+                self.connect()
+
+            cursor = self.conn.cursor()
+            sizes = {}
+            for table_name in (
+                settings.IN_STOCK_PRODUCTS_TABLE_NAME,
+                settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME,
+            ):
+                self.add_quantized_column(cursor, table_name, quantization)
+
+                if drop_unused:
+                    for mode, (column, _) in QUANTIZED_COLUMNS.items():
+                        if mode != quantization:
+                            cursor.execute(f"ALTER TABLE {table_name} DROP COLUMN IF EXISTS {column}")
+
+                self.conn.commit()
+
+                cursor.execute("SELECT pg_total_relation_size(%s::regclass)", (table_name,))
+                sizes[table_name] = cursor.fetchone()[0]
+
+            self.logger.info(f"Migrated the stock tables to {quantization} storage", extra={"sizes": sizes})
+            return sizes
+
+        except Exception as e:
+            if self.conn:
+                self.conn.rollback()
+            self.logger.error(f"Failed to migrate the vector storage: {e}")
+            raise
+
+        finally:
+            if "cursor" in locals():
+                cursor.close()
+
+    def build_vector_indexes(self) -> None:
+        """
+        Build the ANN and filter indexes of both stock tables. Must run after the bulk load:
+        ivfflat derives its centroids from the rows present when the index is built.
+        The index type and its parameters come from the VECTOR_INDEX_TYPE, IVFFLAT_* and HNSW_* settings.
+        With a two-stage search the index is built on the short or quantized column instead of embedding.
+
+        Raises:
+            Exception: If failed to build the indexes
+        """
+        try:
+            if not self.conn:
+                self.connect()
+
+            cursor = self.conn.cursor()
+            cursor.execute(
+                "SELECT set_config('maintenance_work_mem', %s, false)",
+                (settings.INDEX_BUILD_MAINTENANCE_WORK_MEM,),
+            )
+
+            # Only the column searched by the first stage is indexed, the two-stage search
+            # rescores its candidates on the full embedding without an index
+            column, index_suffix, opclass = ANN_INDEXES[get_first_stage_mode()]
+
+            table_prefixes = {
+                settings.IN_STOCK_PRODUCTS_TABLE_NAME: "in_stock",
+                settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME: "out_of_stock",
+            }
+            for table_name, prefix in table_prefixes.items():
+                index_name = f"{prefix}_{index_suffix}"
+                for _, suffix, _ in ANN_INDEXES.values():
+                    cursor.execute(f"DROP INDEX IF EXISTS {prefix}_{suffix}")
+
+                if settings.VECTOR_INDEX_TYPE == "hnsw":
+                    index_options = (
+                        f"m = {int(settings.HNSW_M)}, "
+                        f"ef_construction = {int(settings.HNSW_EF_CONSTRUCTION)}"
+                    )
+                elif settings.VECTOR_INDEX_TYPE == "ivfflat":
+                    cursor.execute(f"SELECT count(*) FROM {table_name}")
+                    row_count = cursor.fetchone()[0]
+                    lists = settings.IVFFLAT_LISTS or derive_ivfflat_lists(row_count)
+                    index_options = f"lists = {int(lists)}"
+                else:
+                    raise ValueError(f"Unknown vector index type: {settings.VECTOR_INDEX_TYPE}")
+
+                # Create the index to speed up cosine similarity search
+                cursor.execute(f"""
+                               CREATE INDEX {index_name}
+                               ON {table_name} USING {settings.VECTOR_INDEX_TYPE} ({column} {opclass})
+                               WITH ({index_options})
+                               """)
+
+                # B-tree and GIN indexes of the structured search filters and the full-text search
+                self.add_search_tsv_column(cursor, table_name)
+                self.add_search_card_columns(cursor, table_name)
+                for filter_suffix, filter_index in FILTER_INDEXES.items():
+                    cursor.execute(
+                        f"CREATE INDEX IF NOT EXISTS {prefix}_{filter_suffix} ON {table_name} {filter_index}"
+                    )
+
+                cursor.execute(f"ANALYZE {table_name}")
+                self.conn.commit()
+
+                self.logger.info(
+                    f"Built {settings.VECTOR_INDEX_TYPE} index {index_name} on {table_name}.{column} ({index_options})"
+                )
+
+        except Exception as e:
+            if self.conn:
+                self.conn.rollback()
+            self.logger.error(f"Failed to build vector indexes: {e}")
+            raise
+
+        finally:
+            if "cursor" in locals():
+                cursor.close()
+
     def batch_insert_product(
         self,
         products_tuple: Tuple,
@@ -187,15 +1308,17 @@ class VectorDatabase:
                 INSERT INTO {table}
                     (title, average_rating, rating_number, features,
                     description, price, images, store, categories,
-                    details, embedding)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    details, embedding, embedding_short)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 ON CONFLICT (unique_hash) DO NOTHING
             """.format(table=table_name)
 
             for i in range(0, len(products_tuple), batch_size):
                 chunk = products_tuple[i : i + batch_size]
                 cursor.executemany(sql, chunk)
+                notify_products_changed(cursor, table_name)
                 self.conn.commit()
+                publish_products_changed(table_name)
                 self.logger.info(
                     f"Inserted batch of {len(chunk)} products into {table_name}"
                 )
@@ -214,8 +1337,125 @@ class VectorDatabase:
             if "cursor" in locals():
                 cursor.close()
 
+    def move_product(self, product_id: int, source_table: str, target_table: str) -> int:
+        """
+        Move a product between stock tables, e.g. when it goes out of stock or is restocked.
+
+        Args:
+            product_id (int): Id of the product in the source table
+            source_table (str): Name of the table the product is moved from
+            target_table (str): Name of the table the product is moved to
+
+        Returns:
+            int: Id of the product in the target table
+
+        Raises:
+            ValueError: If the product does not exist in the source table
+            Exception: If failed to move the product
+        """
+        try:
+            if not self.conn:
+                self.connect()
+
+            cursor = self.conn.cursor()
+
+            columns = ", ".join(settings.PRODUCT_DB_COLUMNS)
+            cursor.execute(
+                f"""
+                INSERT INTO {target_table} ({columns})
+                SELECT {columns} FROM {source_table} WHERE id = %s
+                RETURNING id
+                """,
+                (product_id,),
+            )
+            row = cursor.fetchone()
+            if row is None:
+                raise ValueError(f"Product {product_id} not found in {source_table}")
+            new_product_id = row[0]
+
+            cursor.execute(f"DELETE FROM {source_table} WHERE id = %s", (product_id,))
+
+            notify_products_changed(cursor, source_table, [product_id])
+            notify_products_changed(cursor, target_table)
+            self.conn.commit()
+            publish_products_changed(source_table, [product_id])
+            publish_products_changed(target_table)
+
+            self.logger.info(
+                f"Moved product {product_id} from {source_table} to {target_table} as {new_product_id}"
+            )
+            return new_product_id
+
+        except Exception as e:
+            if self.conn:
+                self.conn.rollback()
+            self.logger.error(f"Failed to move product: {e}")
+            raise
+
+        finally:
+            if "cursor" in locals():
+                cursor.close()
+
+    def find_exact_tables(
+        self,
+        cursor: psycopg.Cursor,
+        table_names: List[str],
+        predicates: str,
+        filter_params: Dict[str, Any],
+    ) -> Tuple[str, ...]:
+        """
+        Count the rows matching the filters, up to FILTERED_SEARCH_EXACT_THRESHOLD, to find the
+        tables where an exact scan of the matching rows beats the ANN index.
+
+        Args:
+            cursor (psycopg.Cursor): Cursor of the search transaction
+            table_names (List[str]): Names of the searched tables
+            predicates (str): Filter predicates of build_filter_predicates
+            filter_params (Dict[str, Any]): Parameters of the predicates
+
+        Returns:
+            Tuple[str, ...]: The tables to search without the ANN index
+        """
+        if not predicates or settings.FILTERED_SEARCH_EXACT_THRESHOLD <= 0:
+            return ()
+
+        cursor.execute(
+            build_filter_count_query(table_names, predicates),
+            {**filter_params, "filter_count_limit": settings.FILTERED_SEARCH_EXACT_THRESHOLD + 1},
+        )
+        return select_exact_tables(table_names, cursor.fetchone())
+
+    def fetch_search_cards(
+        self, cursor: psycopg.Cursor, ids_by_table: Dict[str, List[int]]
+    ) -> Dict[str, Dict[int, Dict[str, Any]]]:
+        """
+        Get the search cards of search hits from the product cache, reading the misses of all
+        tables in one query.
+
+        Args:
+            cursor (psycopg.Cursor): Cursor of the search
+            ids_by_table (Dict[str, List[int]]): Ids of the hits of each table
+
+        Returns:
+            Dict[str, Dict[int, Dict[str, Any]]]: The search cards by id of each table
+        """
+        cards_by_table, missing_by_table = lookup_search_cards(ids_by_table)
+        if missing_by_table:
+            cursor.execute(
+                build_search_cards_query(list(missing_by_table)), list(missing_by_table.values())
+            )
+            add_search_card_rows(cards_by_table, cursor.fetchall())
+        return cards_by_table
+
     def search_products(
-        self, query_embedding: list[float], table_name: str, top_k: int = 10
+        self,
+        query_embedding: list[float],
+        table_name: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        *,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
         """
         Search for products in the database.
@@ -224,6 +1464,9 @@ class VectorDatabase:
             query_embedding (list[float]): Embedding of the query
             table_name (str): Name of the table to search for products
             top_k (int): Number of products to return
+            filters (Optional[Dict[str, Any]]): Structured filters of SearchFilters
+            probes (Optional[int]): ivfflat lists to scan, trades latency for recall
+            ef_search (Optional[int]): hnsw candidate list size, trades latency for recall
 
         Returns:
             results (List[Dict[str, Any]]): List of products that meet the similarity threshold
@@ -235,99 +1478,30 @@ class VectorDatabase:
             if not self.conn:
                 self.connect()
 
-            cursor = self.conn.cursor()
-
-            embedding_str = str(query_embedding)
-            embedding_array = (
-                f"ARRAY{embedding_str}::vector({self.embedding_dimension})"
+            cursor = self.conn.cursor(binary=True)
+
+            predicates, filter_params = build_filter_predicates(filters)
+            exact_tables = self.find_exact_tables(cursor, [table_name], predicates, filter_params)
+            sql = build_search_query(table_name, predicates, exact=table_name in exact_tables)
+            params = build_search_params(query_embedding, top_k, filters)
+
+            # Send the ANN parameters and the query in a single round trip
+            with self.conn.pipeline():
+                for setting_sql, setting_params in build_search_settings(
+                    top_k, probes, ef_search, filtered=bool(predicates)
+                ):
+                    cursor.execute(setting_sql, setting_params)
+                cursor.execute(sql, params, prepare=True)
+                rows = cursor.fetchall()
+
+            # A relaxed iterative scan may return the rows slightly out of order
+            hits = sorted(
+                (parse_search_row(row) for row in rows),
+                key=lambda product: product["similarity"] or 0.0,
+                reverse=True,
             )
-
-            sql = f"""
-                SELECT
-                    id,
-                    title,
-                    average_rating,
-                    rating_number,
-                    features,
-                    description,
-                    price::float,  -- Convert price to float
-                    images,
-                    store,
-                    categories,
-                    details,
-                    1 - (embedding <=> {embedding_array}) AS similarity
-                FROM 
-                    {table_name}
-                ORDER BY
-                    embedding <=> {embedding_array}
-                LIMIT 
-                    {top_k};
-            """
-
-            cursor.execute(sql)
-
-            results = []
-            for row in cursor.fetchall():
-                (
-                    id,
-                    title,
-                    average_rating,
-                    rating_number,
-                    features,
-                    description,
-                    price,
-                    images,
-                    store,
-                    categories,
-                    details_json,
-                    similarity,
-                ) = row
-
-                if details_json:
-                    if isinstance(details_json, str):
-                        details = json.loads(details_json)
-                    else:
-                        details = {}
-                else:
-                    details = {}
-
-                # Handle NaN values by converting them to None
-                def safe_float(value):
-                    try:
-                        if value is None or (
-                            isinstance(value, float) and math.isnan(value)
-                        ):
-                            return None
-                        return float(value)
-                    except (ValueError, TypeError):
-                        return None
-
-                def safe_int(value):
-                    try:
-                        if value is None or (
-                            isinstance(value, float) and math.isnan(value)
-                        ):
-                            return None
-                        return int(value)
-                    except (ValueError, TypeError):
-                        return None
-
-                results.append(
-                    {
-                        "id": id,
-                        "title": title,
-                        "average_rating": safe_float(average_rating),
-                        "rating_number": safe_int(rating_number),
-                        "features": features,
-                        "description": description,
-                        "price": safe_float(price),
-                        "images": images,
-                        "store": store,
-                        "categories": categories,
-                        "details": details,
-                        "similarity": safe_float(similarity),
-                    }
-                )
+            cards = self.fetch_search_cards(cursor, {table_name: [hit["id"] for hit in hits]})
+            results = attach_search_cards(hits, cards[table_name])
 
             self.logger.info(f"{len(results)} products found from {table_name}.")
             return results
@@ -340,6 +1514,106 @@ class VectorDatabase:
             if "cursor" in locals():
                 cursor.close()
 
+    def search_stock_tables(
+        self,
+        query_embedding: list[float],
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        *,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Search the in-stock and out-of-stock tables in a single round trip.
+        The query embedding is sent once as a binary parameter of a prepared statement.
+
+        Args:
+            query_embedding (list[float]): Embedding of the query
+            top_k (int): Number of products to return from each table
+            filters (Optional[Dict[str, Any]]): Structured filters of SearchFilters
+            probes (Optional[int]): ivfflat lists to scan, trades latency for recall
+            ef_search (Optional[int]): hnsw candidate list size, trades latency for recall
+
+        Returns:
+            Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: In-stock and out-of-stock results
+
+        Raises:
+            Exception: If failed to search for products
+        """
+        try:
+            if not self.conn:
+                self.connect()
+
+            cursor = self.conn.cursor(binary=True)
+
+            table_names = [settings.IN_STOCK_PRODUCTS_TABLE_NAME, settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME]
+            predicates, filter_params = build_filter_predicates(filters)
+            exact_tables = self.find_exact_tables(cursor, table_names, predicates, filter_params)
+
+            sql = build_stock_tables_search_query(*table_names, predicates, exact_tables)
+            params = build_search_params(query_embedding, top_k, filters)
+
+            # Send the ANN parameters and the query in a single round trip
+            with self.conn.pipeline():
+                for setting_sql, setting_params in build_search_settings(
+                    top_k, probes, ef_search, filtered=bool(predicates)
+                ):
+                    cursor.execute(setting_sql, setting_params)
+                cursor.execute(sql, params, prepare=True)
+                rows = cursor.fetchall()
+
+            in_stock_hits, out_of_stock_hits = split_stock_tables_rows(rows)
+            cards = self.fetch_search_cards(cursor, {
+                table_names[0]: [hit["id"] for hit in in_stock_hits],
+                table_names[1]: [hit["id"] for hit in out_of_stock_hits],
+            })
+            in_stock_results = attach_search_cards(in_stock_hits, cards[table_names[0]])
+            out_of_stock_results = attach_search_cards(out_of_stock_hits, cards[table_names[1]])
+
+            self.logger.info(
+                f"{len(in_stock_results)} in-stock and {len(out_of_stock_results)} out-of-stock products found."
+            )
+            return in_stock_results, out_of_stock_results
+
+        except Exception as e:
+            self.logger.error(f"Failed to search products: {e}")
+            raise
+
+        finally:
+            if "cursor" in locals():
+                cursor.close()
+
+    def get_product(self, product_id: int, table_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the full details of a product, which the searches leave out of their search cards.
+
+        Args:
+            product_id (int): Id of the product
+            table_name (str): Name of the table of the product
+
+        Returns:
+            Optional[Dict[str, Any]]: The product, None if it does not exist
+
+        Raises:
+            Exception: If failed to get the product
+        """
+        try:
+            if not self.conn:
+                self.connect()
+
+            cursor = self.conn.cursor()
+            cursor.execute(build_product_details_query(table_name), (product_id,))
+            row = cursor.fetchone()
+            return parse_product_row(row) if row is not None else None
+
+        except Exception as e:
+            self.logger.error(f"Failed to get product: {e}")
+            raise
+
+        finally:
+            if "cursor" in locals():
+                cursor.close()
+
     def insert_products_information(self, df_product: pd.DataFrame) -> None:
         """
         insert products information into the database.
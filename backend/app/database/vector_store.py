@@ -0,0 +1,234 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from app.config.settings import Settings
+
+settings = Settings()
+
+
+class VectorStore(ABC):
+    """
+    Interface of the stores holding the products and their embeddings.
+    Implemented by VectorDatabase (Postgres + pgvector) and NumpyVectorStore (in-process).
+    """
+
+    def connect(self) -> None:
+        """
+        Connect to the store. Nothing to do for in-process stores.
+        """
+
+    def disconnect(self) -> None:
+        """
+        Disconnect from the store. Nothing to do for in-process stores.
+        """
+
+    @abstractmethod
+    def initialize_database(self) -> None:
+        """
+        Create the empty stock tables, dropping the existing ones.
+        """
+
+    @abstractmethod
+    def insert_products_information(self, df_product: pd.DataFrame) -> None:
+        """
+        Insert products into the stock table matching their inventory_status.
+
+        Args:
+            df_product (pd.DataFrame): DataFrame containing products with the PRODUCT_DB_COLUMNS
+        """
+
+    @abstractmethod
+    def search_products(
+        self,
+        query_embedding: list[float],
+        table_name: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for the products most similar to a query.
+
+        Args:
+            query_embedding (list[float]): Embedding of the query
+            table_name (str): Name of the table to search for products
+            top_k (int): Number of products to return
+            filters (Optional[Dict[str, Any]]): Structured filters of SearchFilters
+
+        Returns:
+            List[Dict[str, Any]]: Products with their similarity, most similar first
+        """
+
+    @abstractmethod
+    def get_product(self, product_id: int, table_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the full details of a product, which the searches leave out of their search cards.
+
+        Args:
+            product_id (int): Id of the product
+            table_name (str): Name of the table of the product
+
+        Returns:
+            Optional[Dict[str, Any]]: The product, None if it does not exist
+        """
+
+    def search_stock_tables(
+        self,
+        query_embedding: list[float],
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Search the in-stock and out-of-stock tables.
+
+        Args:
+            query_embedding (list[float]): Embedding of the query
+            top_k (int): Number of products to return from each table
+            filters (Optional[Dict[str, Any]]): Structured filters of SearchFilters
+
+        Returns:
+            Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: In-stock and out-of-stock results
+        """
+        return (
+            self.search_products(
+                query_embedding, settings.IN_STOCK_PRODUCTS_TABLE_NAME, top_k, filters=filters
+            ),
+            self.search_products(
+                query_embedding, settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME, top_k, filters=filters
+            ),
+        )
+
+    def search_stock_tables_lexical(
+        self,
+        query_text: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Full-text search of the in-stock and out-of-stock tables.
+        Stores without a text index return no match, leaving the hybrid search to the vectors.
+
+        Args:
+            query_text (str): Text of the query
+            top_k (int): Number of products to return from each table
+            filters (Optional[Dict[str, Any]]): Structured filters of SearchFilters
+
+        Returns:
+            Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: In-stock and out-of-stock results,
+                best lexical match first
+        """
+        return [], []
+
+    def search_products_batch(
+        self, query_embeddings: List[list[float]], table_name: str, top_k: int = 10
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search for the products of several query embeddings.
+
+        Args:
+            query_embeddings (List[list[float]]): Embeddings of the queries
+            table_name (str): Name of the table to search for products
+            top_k (int): Number of products to return per query
+
+        Returns:
+            List[List[Dict[str, Any]]]: Products of each query, in the order of the embeddings
+        """
+        return [self.search_products(e, table_name, top_k) for e in query_embeddings]
+
+
+class AsyncVectorStore:
+    """
+    Async facade with the search methods of AsyncVectorDatabase over a synchronous VectorStore.
+    Searches run in a worker thread so they do not block the event loop.
+
+    Attributes:
+        store (VectorStore): The wrapped store
+    """
+
+    def __init__(self, store: VectorStore):
+        """
+        Constructor for AsyncVectorStore class.
+
+        Args:
+            store (VectorStore): The wrapped store
+        """
+        self.store = store
+
+    async def search_products(
+        self,
+        query_embedding: list[float],
+        table_name: str,
+        top_k: int = 10,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for products in a table. probes and ef_search only apply to pgvector indexes.
+        """
+        return await asyncio.to_thread(
+            self.store.search_products,
+            query_embedding,
+            table_name,
+            top_k=top_k,
+            filters=filters,
+        )
+
+    async def search_stock_tables(
+        self,
+        query_embedding: list[float],
+        top_k: int = 10,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Search the in-stock and out-of-stock tables. probes and ef_search only apply to pgvector indexes.
+        """
+        return await asyncio.to_thread(
+            self.store.search_stock_tables, query_embedding, top_k=top_k, filters=filters
+        )
+
+    async def search_stock_tables_lexical(
+        self,
+        query_text: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Full-text search of the in-stock and out-of-stock tables.
+        """
+        return await asyncio.to_thread(
+            self.store.search_stock_tables_lexical, query_text, top_k=top_k, filters=filters
+        )
+
+    async def search_stock_tables_batch(
+        self,
+        query_embeddings: List[list[float]],
+        top_k: int = 10,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+    ) -> Tuple[List[List[Dict[str, Any]]], List[List[Dict[str, Any]]]]:
+        """
+        Search both stock tables for several query embeddings. probes and ef_search only apply
+        to pgvector indexes.
+        """
+        in_stock_results, out_of_stock_results = await asyncio.gather(
+            asyncio.to_thread(
+                self.store.search_products_batch,
+                query_embeddings, settings.IN_STOCK_PRODUCTS_TABLE_NAME, top_k,
+            ),
+            asyncio.to_thread(
+                self.store.search_products_batch,
+                query_embeddings, settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME, top_k,
+            ),
+        )
+        return in_stock_results, out_of_stock_results
+
+    async def get_product(self, product_id: int, table_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the full details of a product.
+        """
+        return await asyncio.to_thread(self.store.get_product, product_id, table_name)
@@ -1,6 +1,8 @@
-from .db import get_db, DB
+from .db import get_db, get_async_db, DB, AsyncDB
 
 __all__ = [
     'get_db',
-    'DB'
+    'get_async_db',
+    'DB',
+    'AsyncDB'
 ]
\ No newline at end of file
@@ -3,21 +3,29 @@ from typing import Annotated
 
 from fastapi import Depends
 from app.database.vector_db import VectorDatabase
+from app.database.async_vector_db import AsyncVectorDatabase
+from app.database.numpy_vector_store import get_numpy_vector_store
+from app.database.pool import get_pool, get_async_pool
+from app.database.vector_store import AsyncVectorStore
 from app.config.settings import Settings
 
 settings = Settings()
 
 
-def get_db():
-    """Dependency to get database connection"""
-    connection_params = {
+def get_connection_params() -> dict:
+    """Database connection parameters from settings"""
+    return {
         "host": settings.DB_HOST,
         "port": settings.DB_PORT,
         "user": settings.DB_USER,
         "password": settings.DB_PASSWORD,
         "dbname": settings.DB_NAME,
     }
-    db = VectorDatabase(connection_params)
+
+
+def get_db():
+    """Dependency to get a database connection borrowed from the pool"""
+    db = VectorDatabase(get_connection_params(), pool=get_pool())
     try:
         db.connect()
         yield db
@@ -25,5 +33,14 @@ def get_db():
         db.disconnect()
 
 
+async def get_async_db():
+    """Dependency to get the async database used by the search endpoints"""
+    if settings.VECTOR_STORE_BACKEND == "numpy":
+        yield AsyncVectorStore(get_numpy_vector_store())
+        return
+    yield AsyncVectorDatabase(get_connection_params(), pool=get_async_pool())
+
+
 # Type alias for dependency injection
 DB = Annotated[VectorDatabase, Depends(get_db)]
+AsyncDB = Annotated[AsyncVectorDatabase, Depends(get_async_db)]
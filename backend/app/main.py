@@ -1,15 +1,38 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+import asyncio
+import contextlib
+import hashlib
+import json
 import os
+import time
+from contextlib import asynccontextmanager
+from typing import Literal
 
-from app.schemas import QueryValidationBase
+from pydantic import ValidationError
+
+from app.schemas import QueryValidationBase, BatchQueryValidationBase, SearchPageQuery, SearchResponse
 from dotenv import load_dotenv
-from app.deps import DB
-from app.ai_utils.llm_reranker import rerank_search_results
-from app.ai_utils.embeddings import get_embedding
+from app.deps import AsyncDB
+from app.deps.db import get_connection_params
+from app.database.pool import open_pools, close_pools, get_pool_stats
+from app.database.catalog_events import listen_catalog_changes
+from app.database.product_cache import get_product_cache
+from app.ai_utils.llm_reranker import rerank_search_results_async, rerank_stock_tables_async
+from app.ai_utils.embeddings import get_embedding_async, batch_embedding_async
+from app.ai_utils.embedding_cache import get_embedding_cache, normalize_query
+from app.ai_utils.semantic_cache import get_semantic_cache, build_search_scope
+from app.ai_utils.rerank_cache import get_rerank_cache
+from app.ai_utils.page_cache import get_search_page_cache
+from app.ai_utils.fallback_ranker import get_ranker_stats
+from app.ai_utils.prompt_compaction import get_encoding
+from app.ai_utils.rerank_cascade import get_cascade_stats
+from app.utils.compression import ResponseCompressionMiddleware
+from app.utils.fusion import reciprocal_rank_fusion
 from app.utils.logger import setup_logger
+from app.utils.single_flight import get_search_single_flight
 from app.config.settings import get_settings
 
 load_dotenv()
@@ -19,9 +42,34 @@ settings = get_settings()
 
 logger = setup_logger("fashion_ecommerce")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the process-wide database connection pools and catalog listener for the lifetime of the app"""
+    # Load the reranker tokenizers before the first search, off the event loop: their files may
+    # have to be downloaded
+    for model in {settings.RERANKER_MODEL_NAME, settings.RERANKER_ESCALATION_MODEL_NAME}:
+        await asyncio.to_thread(get_encoding, model)
+
+    if settings.VECTOR_STORE_BACKEND == "numpy":
+        # The in-process store needs no connection and publishes its changes in-process
+        yield
+        return
+
+    await open_pools(get_connection_params())
+    catalog_listener = asyncio.create_task(listen_catalog_changes(get_connection_params()))
+    try:
+        yield
+    finally:
+        catalog_listener.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await catalog_listener
+        await close_pools()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
+    lifespan=lifespan,
 )
 
 # Get CORS origins from environment variable or use defaults for development
@@ -41,15 +89,208 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress the large JSON responses, the streaming search sends its events uncompressed
+if settings.RESPONSE_COMPRESSION_ENABLED:
+    app.add_middleware(
+        ResponseCompressionMiddleware,
+        minimum_size=settings.RESPONSE_COMPRESSION_MIN_BYTES,
+        compresslevel=settings.RESPONSE_COMPRESSION_LEVEL,
+        excluded_paths=["/search/stream"],
+    )
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
-# Search products endpoint
-@app.post("/search")
-async def search_products(query: QueryValidationBase, db: DB):
+# Runtime statistics endpoint
+@app.get("/stats")
+async def runtime_stats():
+    """Runtime statistics of the search service"""
+    return {
+        "db_pool": get_pool_stats(),
+        "embedding_cache": get_embedding_cache().stats(),
+        "semantic_cache": get_semantic_cache().stats(),
+        "rerank_cache": get_rerank_cache().stats(),
+        "product_cache": get_product_cache().stats(),
+        "search_pages": get_search_page_cache().stats(),
+        "reranker": get_ranker_stats().stats(),
+        "rerank_cascade": get_cascade_stats().stats(),
+        "search_coalescing": get_search_single_flight().stats(),
+    }
+
+def label_stock_status(results: list[dict], stock_status: str) -> list[dict]:
+    """Add the stock status to each search result"""
+    for result in results:
+        result["stock_status"] = stock_status
+    return results
+
+
+def get_search_filters(query: QueryValidationBase) -> dict | None:
+    """Structured filters of a search request, without the unset ones"""
+    if query.filters is None:
+        return None
+    return query.filters.model_dump(exclude_none=True) or None
+
+
+def get_fusion_weights(query: QueryValidationBase) -> tuple[float, float] | None:
+    """Vector and lexical weights of the hybrid search, None for a vector-only search"""
+    if not settings.HYBRID_SEARCH_ENABLED:
+        return None
+
+    fusion = query.fusion
+    vector_weight = settings.HYBRID_VECTOR_WEIGHT
+    lexical_weight = settings.HYBRID_LEXICAL_WEIGHT
+    if fusion is not None:
+        vector_weight = fusion.vector if fusion.vector is not None else vector_weight
+        lexical_weight = fusion.lexical if fusion.lexical is not None else lexical_weight
+    return vector_weight, lexical_weight
+
+
+def build_query_search_scope(query: QueryValidationBase, filters: dict | None) -> str:
+    """Semantic cache scope of a search request"""
+    return build_search_scope(
+        top_k=query.top_k,
+        filters=json.dumps(filters, sort_keys=True),
+        fusion=get_fusion_weights(query),
+        priority=query.priority,
+    )
+
+
+async def timed(awaitable, timings: dict, stage: str):
+    """Await a search stage and record its latency in milliseconds"""
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[stage] = round((time.perf_counter() - start) * 1000, 1)
+
+
+async def retrieve_candidates(
+    query: QueryValidationBase,
+    query_embedding: list[float],
+    filters: dict | None,
+    db,
+    timings: dict,
+    num_results: int | None = None,
+) -> tuple[list[dict], list[dict]]:
+    """
+    Retrieve the products of both stock tables to rerank, query.top_k per table unless num_results
+    is given (deeper results buffered by a paginated search).
+    The hybrid search runs the vector and full-text searches concurrently and fuses each table's
+    results by reciprocal rank fusion, catching the brand names, sizes and model numbers the
+    embeddings miss.
+    """
+    top_k = num_results or query.top_k
+    fusion_weights = get_fusion_weights(query)
+    if fusion_weights is None:
+        return await timed(
+            db.search_stock_tables(query_embedding=query_embedding, top_k=top_k, filters=filters),
+            timings,
+            "vector_search",
+        )
+
+    async def no_results():
+        return [], []
+
+    # A retriever with a zero weight cannot change the fused ranking, so it is not queried
+    vector_weight, lexical_weight = fusion_weights
+    num_candidates = max(settings.HYBRID_CANDIDATES, top_k)
+    vector_results, lexical_results = await asyncio.gather(
+        timed(
+            db.search_stock_tables(query_embedding=query_embedding, top_k=num_candidates, filters=filters),
+            timings,
+            "vector_search",
+        ) if vector_weight > 0 else no_results(),
+        timed(
+            db.search_stock_tables_lexical(query.query, top_k=num_candidates, filters=filters),
+            timings,
+            "lexical_search",
+        ) if lexical_weight > 0 else no_results(),
+        return_exceptions=True,
+    )
+    if isinstance(vector_results, BaseException):
+        raise vector_results
+    if isinstance(lexical_results, BaseException) and not isinstance(lexical_results, Exception):
+        raise lexical_results
+    if isinstance(lexical_results, Exception):
+        # E.g. a table created without the search_tsv column, the search degrades to the vector ranking
+        logger.error(
+            "Full-text search failed, using the vector search results alone",
+            extra={"error": str(lexical_results), "error_type": type(lexical_results).__name__},
+        )
+        if vector_weight <= 0:
+            vector_results = await timed(
+                db.search_stock_tables(query_embedding=query_embedding, top_k=top_k, filters=filters),
+                timings,
+                "vector_search",
+            )
+        return tuple(table_results[:top_k] for table_results in vector_results)
+
+    start = time.perf_counter()
+    in_stock_results, out_of_stock_results = (
+        reciprocal_rank_fusion(
+            [vector_table_results, lexical_table_results],
+            [vector_weight, lexical_weight],
+            k=settings.HYBRID_RRF_K,
+            top_k=top_k,
+        )
+        for vector_table_results, lexical_table_results in zip(vector_results, lexical_results)
+    )
+    timings["fusion"] = round((time.perf_counter() - start) * 1000, 1)
+    return in_stock_results, out_of_stock_results
+
+
+def get_rankers(in_stock_results: list[dict], out_of_stock_results: list[dict]) -> dict:
+    """Ranker that produced each stock table's list: "llm" or "fallback", None for an empty list"""
+    return {
+        stock_status: results[0].get("ranker") if results else None
+        for stock_status, results in (
+            ("in_stock", in_stock_results), ("out_of_stock", out_of_stock_results)
+        )
+    }
+
+
+def cache_search_response(
+    query_embedding: list[float],
+    search_scope: str,
+    response: dict,
+    in_stock_results: list[dict],
+    out_of_stock_results: list[dict],
+) -> None:
+    """Store a final search response in the semantic cache, unless a table fell back to the local ranker"""
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return
+    if any(
+        product.get("ranker") == "fallback"
+        for products in (
+            response["recommended_in_stock_products"], response["recommended_out_of_stock_products"]
+        )
+        for product in products
+    ):
+        return
+
+    get_semantic_cache().store(
+        query_embedding,
+        search_scope,
+        response,
+        product_ids={
+            settings.IN_STOCK_PRODUCTS_TABLE_NAME: [p["id"] for p in in_stock_results],
+            settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME: [p["id"] for p in out_of_stock_results],
+        },
+    )
+
+
+def build_search_flight_key(query: QueryValidationBase) -> str:
+    """Single-flight key of a search request: the normalized query text and every other request field"""
+    request = query.model_dump(mode="json")
+    request["query"] = normalize_query(query.query)
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+async def run_search(query: QueryValidationBase, db) -> dict:
+    """Run a search request: embedding, retrieval of both tables, reranking and response caching"""
     try:
         logger.info("Received search request", extra={
             "query": query.query,
@@ -58,48 +299,69 @@ async def search_products(query: QueryValidationBase, db: DB):
         })
         print(f"Received query: {query.query}")
 
+        # Latency of each search stage in milliseconds
+        timings = {}
+
         # Get embedding for the query
-        query_embedding = get_embedding(query.query)
+        query_embedding = await timed(get_embedding_async(query.query), timings, "embedding")
 
-        # Search in in_stock_products table
-        in_stock_results = db.search_products(
-            query_embedding=query_embedding,
-            table_name=settings.IN_STOCK_PRODUCTS_TABLE_NAME,
-            top_k=query.top_k,
-        )
-        logger.info(f"Found {len(in_stock_results)} in-stock products")
+        # Serve near-duplicate queries from the semantic cache without reranking. A paginated
+        # search needs its candidates buffered, so it is never served from the cache.
+        filters = get_search_filters(query)
+        search_scope = build_query_search_scope(query, filters)
+        if settings.SEMANTIC_CACHE_ENABLED and not query.paginate:
+            cached_response = get_semantic_cache().lookup(query_embedding, search_scope)
+            if cached_response is not None:
+                return {**cached_response, "latency_ms": timings}
 
-        # Search in out_of_stock_products table
-        out_of_stock_results = db.search_products(
-            query_embedding=query_embedding,
-            table_name=settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME,
-            top_k=query.top_k,
+        # Search in_stock_products and out_of_stock_products tables, deeper for a paginated search
+        num_results = max(settings.SEARCH_PAGE_BUFFER_SIZE, query.top_k) if query.paginate else None
+        in_stock_candidates, out_of_stock_candidates = await retrieve_candidates(
+            query, query_embedding, filters, db, timings, num_results=num_results
         )
-        logger.info(f"Found {len(out_of_stock_results)} out-of-stock products")
+        logger.info(f"Found {len(in_stock_candidates)} in-stock products")
+        logger.info(f"Found {len(out_of_stock_candidates)} out-of-stock products")
 
         # Add stock status to results
-        for result in in_stock_results:
-            result["stock_status"] = "in_stock"
-        for result in out_of_stock_results:
-            result["stock_status"] = "out_of_stock"
-
-        # Rerank search results using LLM
-        reranked_in_stock_results = rerank_search_results(
-            products_search_results=in_stock_results,
-            stock_status="in_stock",
-            query=query.query,
-        )
-        reranked_out_of_stock_results = rerank_search_results(
-            products_search_results=out_of_stock_results,
-            stock_status="out_of_stock",
-            query=query.query,
+        label_stock_status(in_stock_candidates, "in_stock")
+        label_stock_status(out_of_stock_candidates, "out_of_stock")
+
+        # Only the first page is reranked, later pages are served from the buffer in search order
+        in_stock_results = in_stock_candidates[:query.top_k]
+        out_of_stock_results = out_of_stock_candidates[:query.top_k]
+
+        # Rerank both search results using LLM, in one combined call unless RERANK_MODE is "per_table"
+        reranked_in_stock_results, reranked_out_of_stock_results = await timed(
+            rerank_stock_tables_async(
+                in_stock_results=in_stock_results,
+                out_of_stock_results=out_of_stock_results,
+                query=query.query,
+                high_value=query.priority == "high",
+            ),
+            timings,
+            "rerank",
         )
 
-        return {
+        response = {
             "status": "success",
             "recommended_in_stock_products": reranked_in_stock_results,
             "recommended_out_of_stock_products": reranked_out_of_stock_results,
+            "ranker": get_rankers(reranked_in_stock_results, reranked_out_of_stock_results),
         }
+
+        if query.paginate:
+            next_cursor = get_search_page_cache().store(
+                in_stock_candidates, out_of_stock_candidates, page_size=query.top_k
+            )
+            logger.info("Search completed", extra={"latency_ms": timings})
+            return {**response, "latency_ms": timings, "next_cursor": next_cursor}
+
+        cache_search_response(
+            query_embedding, search_scope, response, in_stock_results, out_of_stock_results
+        )
+
+        logger.info("Search completed", extra={"latency_ms": timings})
+        return {**response, "latency_ms": timings}
     except ValueError as e:
         logger.error("Validation error", extra={"error": str(e)})
         raise HTTPException(status_code=422, detail=str(e))
@@ -109,6 +371,288 @@ async def search_products(query: QueryValidationBase, db: DB):
             status_code=500, detail=f"Error processing search request: {str(e)}"
         )
 
+
+# Search products endpoint. The typed response is serialized by pydantic-core and orjson
+# instead of jsonable_encoder and the stdlib json.
+@app.post("/search", response_model=SearchResponse, response_class=ORJSONResponse)
+async def search_products(query: QueryValidationBase, db: AsyncDB):
+    """
+    Search the products of both stock tables. Concurrent identical requests are coalesced: the
+    first one runs the search, the others wait for it and share its response.
+    """
+    if not settings.SEARCH_COALESCING_ENABLED:
+        return await run_search(query, db)
+    return await get_search_single_flight().do(
+        build_search_flight_key(query), lambda: run_search(query, db)
+    )
+
+
+# Next pages of a paginated search
+@app.post("/search/page", response_model=SearchResponse, response_class=ORJSONResponse)
+async def search_products_page(page: SearchPageQuery):
+    """
+    Serve the next page of a search made with "paginate": true from its buffered candidates, in
+    search order: no embedding, database or reranker call. Returns 410 once the buffer expired or
+    its products changed, the search must then be run again. The buffer is only held by the
+    worker that ran the search, a cursor sent to another uvicorn worker also returns 410.
+    """
+    try:
+        start = time.perf_counter()
+        buffered_page = get_search_page_cache().get_page(page.cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if buffered_page is None:
+        raise HTTPException(
+            status_code=410, detail="Search results expired, run the search again."
+        )
+
+    in_stock_page, out_of_stock_page, next_cursor = buffered_page
+    return {
+        "status": "success",
+        "recommended_in_stock_products": in_stock_page,
+        "recommended_out_of_stock_products": out_of_stock_page,
+        "latency_ms": {"page": round((time.perf_counter() - start) * 1000, 1)},
+        "next_cursor": next_cursor,
+    }
+
+
+def to_ndjson(event: dict) -> bytes:
+    """Serialize a stream event as one line of newline-delimited JSON"""
+    return (json.dumps(event, default=str) + "\n").encode("utf-8")
+
+
+async def stream_search_events(query: QueryValidationBase, db):
+    """
+    Yield the search events of a query:
+        - "search_results": raw (or hybrid fused) search hits of both tables, as soon as they are retrieved
+        - "ranked_item": one reranked product of a stock table, as soon as the LLM output contains it
+        - "reranked": the reranked products of one stock table, as soon as its LLM call completes
+        - "done" once both tables are reranked, or "error" if the search failed
+    """
+    try:
+        query_embedding = await get_embedding_async(query.query)
+
+        filters = get_search_filters(query)
+        search_scope = build_query_search_scope(query, filters)
+        if settings.SEMANTIC_CACHE_ENABLED:
+            cached_response = get_semantic_cache().lookup(query_embedding, search_scope)
+            if cached_response is not None:
+                for stock_status in ("in_stock", "out_of_stock"):
+                    yield to_ndjson({
+                        "event": "reranked",
+                        "stock_status": stock_status,
+                        "products": cached_response[f"recommended_{stock_status}_products"],
+                    })
+                yield to_ndjson({"event": "done", "status": "success"})
+                return
+
+        timings = {}
+        in_stock_results, out_of_stock_results = await retrieve_candidates(
+            query, query_embedding, filters, db, timings
+        )
+        label_stock_status(in_stock_results, "in_stock")
+        label_stock_status(out_of_stock_results, "out_of_stock")
+
+        yield to_ndjson({
+            "event": "search_results",
+            "recommended_in_stock_products": in_stock_results,
+            "recommended_out_of_stock_products": out_of_stock_results,
+            "latency_ms": timings,
+        })
+
+        # One rerank call per table, so the first table's ranking is streamed as soon as it is ready,
+        # and each ranked product as soon as the LLM output contains it
+        rerank_events: asyncio.Queue = asyncio.Queue()
+
+        async def rerank(products: list[dict], stock_status: str):
+            try:
+                reranked = await rerank_search_results_async(
+                    products_search_results=products,
+                    stock_status=stock_status,
+                    query=query.query,
+                    high_value=query.priority == "high",
+                    on_item=lambda product: rerank_events.put_nowait({
+                        "event": "ranked_item",
+                        "stock_status": stock_status,
+                        "product": product,
+                    }),
+                )
+                rerank_events.put_nowait({
+                    "event": "reranked",
+                    "stock_status": stock_status,
+                    "products": reranked,
+                })
+            except Exception as e:
+                rerank_events.put_nowait(e)
+
+        reranked_results = {}
+        rerank_tasks = [
+            asyncio.create_task(rerank(in_stock_results, "in_stock")),
+            asyncio.create_task(rerank(out_of_stock_results, "out_of_stock")),
+        ]
+        try:
+            while len(reranked_results) < len(rerank_tasks):
+                event = await rerank_events.get()
+                if isinstance(event, Exception):
+                    raise event
+                if event["event"] == "reranked":
+                    reranked_results[event["stock_status"]] = event["products"]
+                yield to_ndjson(event)
+        finally:
+            # The client may disconnect before both reranks complete
+            for task in rerank_tasks:
+                task.cancel()
+
+        response = {
+            "status": "success",
+            "recommended_in_stock_products": reranked_results["in_stock"],
+            "recommended_out_of_stock_products": reranked_results["out_of_stock"],
+        }
+        cache_search_response(
+            query_embedding, search_scope, response, in_stock_results, out_of_stock_results
+        )
+
+        yield to_ndjson({"event": "done", "status": "success"})
+
+    except Exception as e:
+        logger.error("Search stream error", extra={"error": str(e)})
+        yield to_ndjson({
+            "event": "error",
+            "detail": f"Error processing search request: {str(e)}",
+        })
+
+
+# Streaming search endpoint
+@app.post("/search/stream")
+async def search_products_stream(query: QueryValidationBase, db: AsyncDB):
+    """
+    Stream the search results as newline-delimited JSON events, so product cards can be rendered
+    from the vector search hits before the LLM reranks complete.
+    """
+    logger.info("Received streaming search request", extra={
+        "query": query.query,
+        "top_k": query.top_k,
+    })
+    return StreamingResponse(
+        stream_search_events(query, db),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Batch search endpoint
+@app.post("/search/batch")
+async def search_products_batch(batch: BatchQueryValidationBase, db: AsyncDB):
+    """
+    Search many queries in one request: one embeddings call for all queries, one vector search
+    statement per stock table and optional reranking with bounded concurrency.
+    Results are returned in the order of the queries, and an invalid query only fails its own entry.
+    """
+    try:
+        logger.info("Received batch search request", extra={
+            "num_queries": len(batch.queries),
+            "top_k": batch.top_k,
+            "rerank": batch.rerank
+        })
+
+        results: list[dict | None] = [None] * len(batch.queries)
+
+        # Validate each query on its own so one bad query does not fail the batch
+        valid_indexes = []
+        for i, query_text in enumerate(batch.queries):
+            try:
+                QueryValidationBase(query=query_text, top_k=batch.top_k)
+                valid_indexes.append(i)
+            except ValidationError as e:
+                results[i] = {
+                    "query": query_text,
+                    "status": "error",
+                    "detail": e.errors()[0]["msg"],
+                }
+
+        if valid_indexes:
+            valid_queries = [batch.queries[i] for i in valid_indexes]
+            query_embeddings = await batch_embedding_async(valid_queries)
+            in_stock_lists, out_of_stock_lists = await db.search_stock_tables_batch(
+                query_embeddings, top_k=batch.top_k
+            )
+
+            semaphore = asyncio.Semaphore(
+                batch.max_concurrency or settings.BATCH_SEARCH_RERANK_CONCURRENCY
+            )
+
+            async def search_result(query_text, in_stock_results, out_of_stock_results):
+                label_stock_status(in_stock_results, "in_stock")
+                label_stock_status(out_of_stock_results, "out_of_stock")
+
+                if batch.rerank:
+                    async with semaphore:
+                        in_stock_results, out_of_stock_results = await rerank_stock_tables_async(
+                            in_stock_results, out_of_stock_results, query_text
+                        )
+
+                return {
+                    "query": query_text,
+                    "status": "success",
+                    "recommended_in_stock_products": in_stock_results,
+                    "recommended_out_of_stock_products": out_of_stock_results,
+                }
+
+            query_results = await asyncio.gather(
+                *(
+                    search_result(query_text, in_stock_results, out_of_stock_results)
+                    for query_text, in_stock_results, out_of_stock_results in zip(
+                        valid_queries, in_stock_lists, out_of_stock_lists
+                    )
+                ),
+                return_exceptions=True,
+            )
+
+            for i, query_result in zip(valid_indexes, query_results):
+                if isinstance(query_result, Exception):
+                    logger.error("Batch query failed", extra={"error": str(query_result)})
+                    query_result = {
+                        "query": batch.queries[i],
+                        "status": "error",
+                        "detail": f"Error processing search request: {str(query_result)}",
+                    }
+                results[i] = query_result
+
+        return {"status": "success", "results": results}
+
+    except Exception as e:
+        logger.error("Batch search error", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=500, detail=f"Error processing batch search request: {str(e)}"
+        )
+
+
+# Product details endpoint
+@app.get("/products/{stock_status}/{product_id}")
+async def get_product_details(stock_status: Literal["in_stock", "out_of_stock"], product_id: int, db: AsyncDB):
+    """
+    Full details of a product (features, description, images, details...), which the searches
+    leave out of the search cards they return. Ids are unique within a stock table only.
+    """
+    table_name = (
+        settings.IN_STOCK_PRODUCTS_TABLE_NAME
+        if stock_status == "in_stock"
+        else settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME
+    )
+    try:
+        product = await db.get_product(product_id, table_name)
+    except Exception as e:
+        logger.error("Product details error", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=500, detail=f"Error getting product details: {str(e)}"
+        )
+
+    if product is None:
+        raise HTTPException(status_code=404, detail=f"Product {product_id} not found.")
+    product["stock_status"] = stock_status
+    return {"status": "success", "product": product}
+
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     logger.error("Request validation error", extra={
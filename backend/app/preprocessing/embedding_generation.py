@@ -4,6 +4,7 @@ from tqdm import tqdm
 from app.ai_utils.embeddings import batch_embedding
 from app.config.settings import Settings
 from app.utils.logger import setup_logger
+from app.utils.vectors import shorten_embeddings
 
 logger = setup_logger("embedding_generation")
 
@@ -14,14 +15,14 @@ def products_description_embedding(
 ) -> pd.DataFrame:
     """
     Embeds product title and descriptions. 
-    Loads embeddings back into DataFrame.
+    Loads embeddings back into DataFrame, with their shortened version used by the two-stage search.
 
     Args:
         df (pd.DataFrame): DataFrame containing products
         batch_size (int): Batch size for embedding products description
 
     Returns:
-        df (pd.DataFrame): DataFrame with embedding column
+        df (pd.DataFrame): DataFrame with embedding and embedding_short columns
     """
     logger.info("Starting embedding process", extra={"num_products": len(df)})
 
@@ -42,6 +43,7 @@ def products_description_embedding(
         all_embeddings.extend(batch_embeddings)
 
     df["embedding"] = all_embeddings
+    df["embedding_short"] = shorten_embeddings(all_embeddings, settings.SHORT_EMBEDDING_DIMENSION)
 
     logger.info("Embedding process completed", extra={"num_products": len(df)})
     return df
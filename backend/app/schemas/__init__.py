@@ -1,3 +1,4 @@
-from .query_shema import QueryValidationBase
+from .query_shema import QueryValidationBase, BatchQueryValidationBase, SearchFilters, FusionWeights, SearchPageQuery
+from .response_schema import SearchProduct, SearchResponse
 
-__all__ = ["QueryValidationBase", "SearchQuery"]
\ No newline at end of file
+__all__ = ["QueryValidationBase", "BatchQueryValidationBase", "SearchFilters", "FusionWeights", "SearchPageQuery", "SearchProduct", "SearchResponse", "SearchQuery"]
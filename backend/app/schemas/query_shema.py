@@ -1,12 +1,86 @@
 import re
 
-from pydantic import BaseModel, field_validator
-from typing import Optional
+from pydantic import BaseModel, field_validator, model_validator
+from typing import Literal, Optional
+
+# Maximum number of values of a list filter
+MAX_FILTER_VALUES = 20
+
+
+class SearchFilters(BaseModel):
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    min_average_rating: Optional[float] = None
+    min_rating_number: Optional[int] = None
+    stores: Optional[list[str]] = None
+    categories: Optional[list[str]] = None
+    details: Optional[dict[str, str]] = None
+
+    @field_validator("min_price", "max_price", "min_rating_number")
+    @classmethod
+    def validate_non_negative(cls, v):
+        if v is not None and v < 0:
+            raise ValueError("Filter values cannot be negative.")
+        return v
+
+    @field_validator("min_average_rating")
+    @classmethod
+    def validate_min_average_rating(cls, v):
+        if v is not None and (v < 0 or v > 5):
+            raise ValueError("Minimum average rating must be between 0 and 5.")
+        return v
+
+    @field_validator("stores", "categories")
+    @classmethod
+    def validate_values(cls, v):
+        if v is None:
+            return v
+        values = [value.strip() for value in v if value.strip()]
+        if len(values) > MAX_FILTER_VALUES:
+            raise ValueError(f"Cannot filter on more than {MAX_FILTER_VALUES} values.")
+        return values or None
+
+    @field_validator("details")
+    @classmethod
+    def validate_details(cls, v):
+        if v is not None and len(v) > MAX_FILTER_VALUES:
+            raise ValueError(f"Cannot filter on more than {MAX_FILTER_VALUES} details.")
+        return v or None
+
+    @model_validator(mode="after")
+    def validate_price_range(self):
+        if self.min_price is not None and self.max_price is not None and self.min_price > self.max_price:
+            raise ValueError("Minimum price cannot be greater than maximum price.")
+        return self
+
+
+class FusionWeights(BaseModel):
+    vector: Optional[float] = None
+    lexical: Optional[float] = None
+
+    @field_validator("vector", "lexical")
+    @classmethod
+    def validate_weight(cls, v):
+        if v is not None and (v < 0 or v > 10):
+            raise ValueError("Fusion weights must be between 0 and 10.")
+        return v
+
+    @model_validator(mode="after")
+    def validate_not_all_zero(self):
+        if self.vector == 0 and self.lexical == 0:
+            raise ValueError("At least one fusion weight must be positive.")
+        return self
 
 
 class QueryValidationBase(BaseModel):
     query: str
     top_k: Optional[int] = 10
+    filters: Optional[SearchFilters] = None
+    fusion: Optional[FusionWeights] = None
+    # Buffer deeper results and return a cursor to fetch them with POST /search/page
+    paginate: bool = False
+    # "high" sends the rerank straight to the larger model of the reranker cascade
+    priority: Literal["standard", "high"] = "standard"
 
     @field_validator("query")
     @classmethod
@@ -51,7 +125,51 @@ class QueryValidationBase(BaseModel):
         if v is not None and (v < 1 or v > 10):
             raise ValueError("Top k must be between 1 and 10.")
         return v if v is not None else 10
-        
-    
-    
-    
\ No newline at end of file
+
+
+# Maximum length of a page cursor
+MAX_CURSOR_LENGTH = 256
+
+
+class SearchPageQuery(BaseModel):
+    cursor: str
+
+    @field_validator("cursor")
+    @classmethod
+    def validate_cursor(cls, v):
+        if not v.strip() or len(v) > MAX_CURSOR_LENGTH:
+            raise ValueError("Invalid page cursor.")
+        return v.strip()
+
+
+# Maximum number of queries accepted by the batch search endpoint
+MAX_BATCH_QUERIES = 256
+
+
+class BatchQueryValidationBase(BaseModel):
+    queries: list[str]
+    top_k: Optional[int] = 10
+    rerank: bool = False
+    max_concurrency: Optional[int] = None
+
+    @field_validator("queries")
+    @classmethod
+    def validate_queries(cls, v):
+        # Each query is validated individually by the endpoint, so one bad query does not fail the batch
+        if not v:
+            raise ValueError("Queries cannot be empty.")
+        if len(v) > MAX_BATCH_QUERIES:
+            raise ValueError(f"Cannot search more than {MAX_BATCH_QUERIES} queries at once.")
+        return v
+
+    @field_validator("top_k")
+    @classmethod
+    def validate_top_k(cls, v):
+        return QueryValidationBase.validate_top_k(v)
+
+    @field_validator("max_concurrency")
+    @classmethod
+    def validate_max_concurrency(cls, v):
+        if v is not None and (v < 1 or v > 32):
+            raise ValueError("Max concurrency must be between 1 and 32.")
+        return v
@@ -0,0 +1,54 @@
+from pydantic import BaseModel, field_validator
+from typing import Optional
+
+
+class SearchProduct(BaseModel):
+    # Search card of the product
+    id: int
+    title: str
+    average_rating: Optional[float] = None
+    rating_number: Optional[int] = None
+    price: Optional[float] = None
+    thumbnail: Optional[str] = None
+    feature_summary: str = ""
+    stock_status: Optional[str] = None
+
+    # Search scores
+    similarity: Optional[float] = None
+    lexical_score: Optional[float] = None
+    fusion_score: Optional[float] = None
+
+    # Reranker output
+    rank: Optional[int] = None
+    rerank_score: Optional[float] = None
+    reason: Optional[str] = None
+    # "llm", or "fallback" when the local ranker replaced a late or failed LLM call
+    ranker: Optional[str] = None
+
+    @field_validator("rank", mode="before")
+    @classmethod
+    def validate_rank(cls, v):
+        # The reranker output comes from the LLM, a malformed value must not fail the response
+        try:
+            return int(float(v)) if v is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    @field_validator("rerank_score", mode="before")
+    @classmethod
+    def validate_rerank_score(cls, v):
+        try:
+            return float(v) if v is not None else None
+        except (TypeError, ValueError):
+            return None
+
+
+class SearchResponse(BaseModel):
+    status: str = "success"
+    recommended_in_stock_products: list[SearchProduct]
+    recommended_out_of_stock_products: list[SearchProduct]
+    latency_ms: Optional[dict[str, float]] = None
+    # Ranker of each stock table's list
+    ranker: Optional[dict[str, Optional[str]]] = None
+    # Cursor of the next page of a paginated search, None on the last page
+    next_cursor: Optional[str] = None
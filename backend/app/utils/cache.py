@@ -0,0 +1,185 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache with an optional time-to-live per entry and an optional
+    memory budget.
+
+    Attributes:
+        max_size (int): Maximum number of entries kept in the cache
+        ttl_seconds (Optional[float]): Seconds an entry stays valid, None for no expiry
+        max_bytes (Optional[int]): Maximum total size of the entries, None for no limit
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        """
+        Constructor for LRUCache class.
+
+        Args:
+            max_size (int): Maximum number of entries kept in the cache
+            ttl_seconds (Optional[float]): Seconds an entry stays valid, None for no expiry
+            clock (Callable[[], float]): Time source, injectable for tests
+            on_evict (Optional[Callable[[Hashable, Any], None]]): Called with the key and value of
+                entries evicted or expired, e.g. to maintain secondary indexes
+            max_bytes (Optional[int]): Maximum total size of the entries, None for no limit
+            sizeof (Optional[Callable[[Any], int]]): Size in bytes of a value, required with max_bytes
+        """
+        if max_bytes is not None and sizeof is None:
+            raise ValueError("A max_bytes limit needs a sizeof function.")
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._on_evict = on_evict
+        self._sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Get a value and mark it as most recently used.
+
+        Args:
+            key (Hashable): The cache key
+
+        Returns:
+            Optional[Any]: The cached value, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at, size = entry
+            if expires_at >= self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+            del self._entries[key]
+            self._bytes -= size
+            self.expirations += 1
+            self.misses += 1
+
+        self._notify_evicted([(key, value)])
+        return None
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entries above max_size or max_bytes.
+        A value larger than max_bytes is not stored.
+
+        Args:
+            key (Hashable): The cache key
+            value (Any): The value to cache
+            ttl_seconds (Optional[float]): Seconds this entry stays valid, None for the cache's ttl_seconds
+        """
+        if ttl_seconds is None:
+            ttl_seconds = self.ttl_seconds
+        expires_at = self._clock() + ttl_seconds if ttl_seconds is not None else float("inf")
+        size = self._sizeof(value) if self._sizeof is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.delete(key)
+            return
+
+        evicted = []
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._entries) > self.max_size or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                evicted_key, (evicted_value, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                evicted.append((evicted_key, evicted_value))
+                self.evictions += 1
+
+        self._notify_evicted(evicted)
+
+    def _notify_evicted(self, entries: list) -> None:
+        if self._on_evict is None:
+            return
+        for key, value in entries:
+            self._on_evict(key, value)
+
+    def delete(self, key: Hashable) -> bool:
+        """
+        Remove an entry if present.
+
+        Args:
+            key (Hashable): The cache key
+
+        Returns:
+            bool: Whether the entry was present
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+        return entry is not None
+
+    def clear(self) -> None:
+        """
+        Remove all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def keys(self) -> list:
+        """
+        Get a snapshot of the keys, least recently used first. Expired entries are included.
+
+        Returns:
+            list: The cache keys
+        """
+        with self._lock:
+            return list(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dict[str, Any]: Size, hits, misses, hit ratio, evictions and expirations
+        """
+        lookups = self.hits + self.misses
+        stats = {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+        if self.max_bytes is not None:
+            stats["bytes"] = self._bytes
+            stats["max_bytes"] = self.max_bytes
+        return stats
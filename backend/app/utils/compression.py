@@ -0,0 +1,39 @@
+from typing import Iterable
+
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class ResponseCompressionMiddleware(GZipMiddleware):
+    """
+    gzip responses above a size threshold for clients accepting it, except on the streaming
+    endpoints: the compressor would buffer their events instead of sending them as they come.
+
+    Attributes:
+        excluded_paths (frozenset[str]): Paths whose responses are never compressed
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        compresslevel: int = 5,
+        excluded_paths: Iterable[str] = (),
+    ):
+        """
+        Constructor for ResponseCompressionMiddleware class.
+
+        Args:
+            app (ASGIApp): The wrapped application
+            minimum_size (int): Responses smaller than this many bytes are sent uncompressed
+            compresslevel (int): gzip compression level, 1 (fastest) to 9 (smallest)
+            excluded_paths (Iterable[str]): Paths whose responses are never compressed
+        """
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.excluded_paths = frozenset(excluded_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
@@ -0,0 +1,49 @@
+from typing import Any, Dict, List, Sequence
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: Sequence[List[Dict[str, Any]]],
+    weights: Sequence[float],
+    k: int = 60,
+    top_k: int | None = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fuse ranked product lists by weighted reciprocal rank fusion.
+    A product scores sum(weight / (k + rank)) over the lists it appears in (rank from 1), so
+    the fusion only needs ranks and products found by several retrievers rise to the top.
+
+    Args:
+        ranked_lists (Sequence[List[Dict[str, Any]]]): Product lists, best first
+        weights (Sequence[float]): Weight of each list, 0 to ignore a list
+        k (int): Rank offset, higher values flatten the rank differences
+        top_k (int | None): Number of products to return, all of them if None
+
+    Returns:
+        List[Dict[str, Any]]: The fused products with their fusion_score, best first.
+            A product found by several lists merges their fields (similarity, lexical_score...)
+    """
+    if len(ranked_lists) != len(weights):
+        raise ValueError("Reciprocal rank fusion needs one weight per ranked list.")
+
+    scores: Dict[Any, float] = {}
+    products: Dict[Any, Dict[str, Any]] = {}
+    for ranked_list, weight in zip(ranked_lists, weights):
+        if weight <= 0:
+            continue
+        for rank, product in enumerate(ranked_list, start=1):
+            product_id = product["id"]
+            scores[product_id] = scores.get(product_id, 0.0) + weight / (k + rank)
+            if product_id in products:
+                # Only fill the missing fields, e.g. the lexical_score of a vector hit
+                fused = products[product_id]
+                fused.update(
+                    {key: value for key, value in product.items() if fused.get(key) is None}
+                )
+            else:
+                products[product_id] = dict(product)
+
+    # Ties keep the order of the first list the products were found in
+    fused_ids = sorted(scores, key=lambda product_id: scores[product_id], reverse=True)
+    if top_k is not None:
+        fused_ids = fused_ids[:top_k]
+    return [{**products[product_id], "fusion_score": scores[product_id]} for product_id in fused_ids]
@@ -0,0 +1,277 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config.settings import Settings
+from app.utils.logger import setup_logger
+
+settings = Settings()
+
+logger = setup_logger("single_flight")
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent computations: the first caller of a key runs it, the callers
+    arriving while it is in flight wait for it and share its result (or its error).
+    Within a process the computation runs as a task of its own, so a leader request that is
+    cancelled does not cancel it for the waiting callers.
+    With a shared file, workers on the same host coalesce too: the first worker takes a lease on
+    the key in a SQLite table, the others poll for the JSON result it publishes. A worker stops
+    waiting and computes the result itself when the lease is released without a result, expires,
+    or the shared file fails. The SQLite calls run in worker threads, a busy file does not
+    block the event loop.
+
+    Attributes:
+        shared_path (Optional[str]): Path of the SQLite file, None to coalesce per process only
+        lease_seconds (float): Seconds after which an unfinished flight of another worker is abandoned
+        poll_seconds (float): Interval between two checks for another worker's result
+        result_ttl_seconds (float): Seconds a published result stays readable
+    """
+
+    def __init__(
+        self,
+        shared_path: Optional[str] = None,
+        lease_seconds: float = 15.0,
+        poll_seconds: float = 0.02,
+        result_ttl_seconds: float = 5.0,
+    ):
+        """
+        Constructor for SingleFlight class.
+
+        Args:
+            shared_path (Optional[str]): Path of the SQLite file, None to coalesce per process only
+            lease_seconds (float): Seconds after which an unfinished flight of another worker is abandoned
+            poll_seconds (float): Interval between two checks for another worker's result
+            result_ttl_seconds (float): Seconds a published result stays readable
+        """
+        self.shared_path = shared_path
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.result_ttl_seconds = result_ttl_seconds
+
+        self.flights = 0
+        self.coalesced = 0
+        self.shared_coalesced = 0
+        self.shared_abandoned = 0
+        self.shared_errors = 0
+
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._shared_conn: Optional[sqlite3.Connection] = None
+        self._shared_lock = threading.Lock()
+        if shared_path:
+            self._open_shared_store()
+
+    def _open_shared_store(self) -> None:
+        """
+        Open the SQLite file in WAL mode so several processes can read while one writes.
+        """
+        try:
+            self._shared_conn = sqlite3.connect(
+                self.shared_path, timeout=1.0, check_same_thread=False, isolation_level=None
+            )
+            self._shared_conn.execute("PRAGMA journal_mode=WAL")
+            self._shared_conn.execute("PRAGMA synchronous=NORMAL")
+            self._shared_conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS flights (
+                    flight_key  TEXT PRIMARY KEY,
+                    flight_id   TEXT NOT NULL,
+                    expires_at  REAL NOT NULL
+                )
+                """
+            )
+            self._shared_conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS flight_results (
+                    flight_id   TEXT PRIMARY KEY,
+                    result      TEXT NOT NULL,
+                    created_at  REAL NOT NULL
+                )
+                """
+            )
+        except sqlite3.Error as e:
+            logger.error("Failed to open the single-flight file", extra={
+                "error": str(e),
+                "path": self.shared_path
+            })
+            self._shared_conn = None
+
+    async def do(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run a computation once for all the concurrent callers of a key.
+
+        Args:
+            key (str): The key of the computation, identical requests must share it
+            compute (Callable[[], Awaitable[Any]]): Runs the computation. With a shared file its
+                result must be JSON serializable.
+
+        Returns:
+            Any: The result of the computation, shared by all the callers of the flight
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+
+        self.flights += 1
+        task = asyncio.ensure_future(self._run(key, compute))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Every caller may have been cancelled, the error must not be reported as never retrieved
+        if not task.cancelled():
+            task.exception()
+
+    async def _run(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        if self._shared_conn is None:
+            return await compute()
+
+        flight_id = uuid.uuid4().hex
+        leader_id = await asyncio.to_thread(self._acquire_lease, key, flight_id)
+        if leader_id is not None and leader_id != flight_id:
+            found, result = await self._wait_for_result(key, leader_id)
+            if found:
+                self.shared_coalesced += 1
+                return result
+            # The other worker's flight failed or was abandoned, compute without it
+            return await compute()
+
+        try:
+            result = await compute()
+            if leader_id is not None:
+                await asyncio.to_thread(self._publish_result, flight_id, result)
+            return result
+        finally:
+            if leader_id is not None:
+                await asyncio.to_thread(self._release_lease, key, flight_id)
+
+    def _acquire_lease(self, key: str, flight_id: str) -> Optional[str]:
+        """
+        Take the lease of a key, or find the flight of the worker holding it.
+
+        Returns:
+            Optional[str]: The flight id holding the lease, flight_id if taken, None if the shared file failed
+        """
+        now = time.time()
+        try:
+            with self._shared_lock:
+                self._shared_conn.execute("DELETE FROM flights WHERE expires_at < ?", (now,))
+                self._shared_conn.execute(
+                    "INSERT OR IGNORE INTO flights (flight_key, flight_id, expires_at) VALUES (?, ?, ?)",
+                    (key, flight_id, now + self.lease_seconds),
+                )
+                row = self._shared_conn.execute(
+                    "SELECT flight_id FROM flights WHERE flight_key = ?", (key,)
+                ).fetchone()
+            return row[0] if row is not None else None
+        except sqlite3.Error as e:
+            self.shared_errors += 1
+            logger.error("Single-flight lease failed", extra={"error": str(e)})
+            return None
+
+    async def _wait_for_result(self, key: str, leader_id: str) -> tuple[bool, Any]:
+        """
+        Poll for the result of another worker's flight until it is published, or the lease is
+        released or expires.
+
+        Returns:
+            tuple[bool, Any]: Whether the result was found, and the result
+        """
+        while True:
+            try:
+                row, lease = await asyncio.to_thread(self._read_result, key, leader_id)
+            except sqlite3.Error as e:
+                self.shared_errors += 1
+                logger.error("Single-flight result read failed", extra={"error": str(e)})
+                return False, None
+
+            if row is not None:
+                return True, json.loads(row[0])
+            if lease is None:
+                self.shared_abandoned += 1
+                return False, None
+            await asyncio.sleep(self.poll_seconds)
+
+    def _read_result(self, key: str, leader_id: str) -> tuple[Optional[tuple], Optional[tuple]]:
+        """
+        Read the result of another worker's flight and whether its lease still holds.
+        """
+        with self._shared_lock:
+            row = self._shared_conn.execute(
+                "SELECT result FROM flight_results WHERE flight_id = ?", (leader_id,)
+            ).fetchone()
+            lease = self._shared_conn.execute(
+                "SELECT 1 FROM flights WHERE flight_key = ? AND flight_id = ? AND expires_at >= ?",
+                (key, leader_id, time.time()),
+            ).fetchone()
+        return row, lease
+
+    def _publish_result(self, flight_id: str, result: Any) -> None:
+        now = time.time()
+        try:
+            with self._shared_lock:
+                self._shared_conn.execute(
+                    "DELETE FROM flight_results WHERE created_at < ?", (now - self.result_ttl_seconds,)
+                )
+                self._shared_conn.execute(
+                    "INSERT OR REPLACE INTO flight_results (flight_id, result, created_at) VALUES (?, ?, ?)",
+                    (flight_id, json.dumps(result, default=str), now),
+                )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            self.shared_errors += 1
+            logger.error("Single-flight result write failed", extra={"error": str(e)})
+
+    def _release_lease(self, key: str, flight_id: str) -> None:
+        try:
+            with self._shared_lock:
+                self._shared_conn.execute(
+                    "DELETE FROM flights WHERE flight_key = ? AND flight_id = ?", (key, flight_id)
+                )
+        except sqlite3.Error as e:
+            self.shared_errors += 1
+            logger.error("Single-flight lease release failed", extra={"error": str(e)})
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the coalescing counters.
+
+        Returns:
+            Dict[str, Any]: Flights run, requests coalesced in the process and across workers
+        """
+        return {
+            "in_flight": len(self._inflight),
+            "flights": self.flights,
+            "coalesced": self.coalesced,
+            "shared": {
+                "enabled": self._shared_conn is not None,
+                "coalesced": self.shared_coalesced,
+                "abandoned": self.shared_abandoned,
+                "errors": self.shared_errors,
+            },
+        }
+
+
+@lru_cache(maxsize=1)
+def get_search_single_flight() -> SingleFlight:
+    """
+    Initialize the process-wide coalescer of identical searches and save it in the cache.
+
+    Returns:
+        SingleFlight: The search coalescer.
+    """
+    return SingleFlight(
+        shared_path=settings.SEARCH_COALESCING_PATH or None,
+        lease_seconds=settings.SEARCH_COALESCING_LEASE_SECONDS,
+        poll_seconds=settings.SEARCH_COALESCING_POLL_SECONDS,
+        result_ttl_seconds=settings.SEARCH_COALESCING_RESULT_TTL_SECONDS,
+    )
@@ -0,0 +1,43 @@
+from typing import List
+
+import numpy as np
+
+
+def shorten_embedding(embedding: List[float], dimension: int) -> List[float]:
+    """
+    Shorten an embedding to its first dimensions and renormalize it.
+    text-embedding-3 models are trained so their leading dimensions form a usable embedding
+    (Matryoshka representation), so the short vector can be searched on its own.
+
+    Args:
+        embedding (List[float]): The full embedding
+        dimension (int): Number of leading dimensions to keep
+
+    Returns:
+        List[float]: The L2-normalized short embedding
+    """
+    vector = np.asarray(embedding, dtype=np.float32)[:dimension]
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector = vector / norm
+    return vector.tolist()
+
+
+def shorten_embeddings(embeddings: List[List[float]], dimension: int) -> List[List[float]]:
+    """
+    Shorten a batch of embeddings to their first dimensions and renormalize them.
+
+    Args:
+        embeddings (List[List[float]]): The full embeddings
+        dimension (int): Number of leading dimensions to keep
+
+    Returns:
+        List[List[float]]: The L2-normalized short embeddings
+    """
+    if not len(embeddings):
+        return []
+
+    vectors = np.asarray(embeddings, dtype=np.float32)[:, :dimension]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).tolist()
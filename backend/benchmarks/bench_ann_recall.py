@@ -0,0 +1,455 @@
+"""
+Benchmark the recall and latency of the pgvector ANN indexes against a live Postgres + pgvector database.
+
+A synthetic (clustered, L2-normalized) or sampled product set is loaded into a scratch table,
+the exact cosine top-k of every query is computed with NumPy as ground truth, and each index
+configuration is built and queried with a sweep of search parameters. The report contains,
+per configuration: recall@k, p50/p95/p99 latency, index build time and index size.
+
+Configurations are given as "<index>:<build params>:<search param>=<values>", e.g.
+    exact
+    ivfflat:lists=100:probes=1,5,10,20
+    hnsw:m=16,ef_construction=64:ef_search=20,40,80,160
+
+The product tables are never modified, everything happens in the scratch table (dropped at the end
+unless --keep-table is given).
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_ann_recall --rows 100000 --queries 200 --top-k 10 --output ann_report.json
+    python -m benchmarks.bench_ann_recall --source sample --config hnsw:m=32,ef_construction=128:ef_search=40,80
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import psycopg
+
+from app.config.settings import Settings
+from app.database.vector_db import derive_ivfflat_lists, register_vector_types
+from app.deps.db import get_connection_params
+from benchmarks.bench_stock_tables_search import summarize
+
+settings = Settings()
+
+BENCH_TABLE_NAME = "ann_bench_vectors"
+BENCH_INDEX_NAME = "ann_bench_vectors_emb_idx"
+
+DEFAULT_CONFIGS = [
+    "exact",
+    "ivfflat:lists=auto:probes=1,5,10,20,40",
+    "hnsw:m=16,ef_construction=64:ef_search=20,40,80,160",
+]
+
+
+def parse_config(spec: str) -> Dict[str, Any]:
+    """
+    Parse a configuration spec.
+
+    Args:
+        spec (str): "exact" or "<ivfflat|hnsw>:<key=value,...>:<search param>=<value,...>"
+
+    Returns:
+        Dict[str, Any]: The index type, build parameters, search parameter name and values
+
+    Raises:
+        ValueError: If the spec is invalid
+    """
+    parts = spec.split(":")
+    index_type = parts[0]
+
+    if index_type == "exact":
+        return {"index_type": "exact", "build_params": {}, "search_param": None, "search_values": [None]}
+
+    if index_type not in ("ivfflat", "hnsw") or len(parts) != 3:
+        raise ValueError(f"Invalid index configuration: {spec}")
+
+    build_params = dict(item.split("=", 1) for item in parts[1].split(",") if item)
+    search_param, values = parts[2].split("=", 1)
+
+    expected = "probes" if index_type == "ivfflat" else "ef_search"
+    if search_param != expected:
+        raise ValueError(f"{index_type} is tuned with {expected}, got {search_param}")
+
+    return {
+        "index_type": index_type,
+        "build_params": build_params,
+        "search_param": search_param,
+        "search_values": [int(v) for v in values.split(",")],
+    }
+
+
+def generate_synthetic_vectors(
+    num_rows: int, dimension: int, num_clusters: int = 100, seed: int = 0
+) -> np.ndarray:
+    """
+    Generate L2-normalized vectors grouped around random centers.
+    Clustered data is closer to real embeddings than uniform noise, on which every ANN index looks bad.
+
+    Args:
+        num_rows (int): Number of vectors
+        dimension (int): Dimension of the vectors
+        num_clusters (int): Number of cluster centers
+        seed (int): Random seed
+
+    Returns:
+        np.ndarray: float32 array of shape (num_rows, dimension)
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((num_clusters, dimension)).astype(np.float32)
+    assignments = rng.integers(0, num_clusters, size=num_rows)
+    vectors = centers[assignments] + 0.5 * rng.standard_normal((num_rows, dimension)).astype(np.float32)
+    return normalize_rows(vectors)
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize each row, so the dot product equals the cosine similarity.
+
+    Args:
+        vectors (np.ndarray): Array of shape (n, dimension)
+
+    Returns:
+        np.ndarray: float32 array of normalized rows
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+def make_queries(vectors: np.ndarray, num_queries: int, noise: float = 0.1, seed: int = 1) -> np.ndarray:
+    """
+    Build query vectors by perturbing random stored vectors, so queries land in populated regions.
+
+    Args:
+        vectors (np.ndarray): The stored vectors
+        num_queries (int): Number of queries
+        noise (float): Standard deviation of the perturbation
+        seed (int): Random seed
+
+    Returns:
+        np.ndarray: float32 array of shape (num_queries, dimension)
+    """
+    rng = np.random.default_rng(seed)
+    picked = vectors[rng.integers(0, len(vectors), size=num_queries)]
+    return normalize_rows(picked + noise * rng.standard_normal(picked.shape).astype(np.float32))
+
+
+def exact_top_k(
+    vectors: np.ndarray, queries: np.ndarray, top_k: int, chunk_size: int = 256
+) -> np.ndarray:
+    """
+    Compute the exact cosine top-k ids (row positions) of each query by brute force.
+
+    Args:
+        vectors (np.ndarray): L2-normalized stored vectors
+        queries (np.ndarray): L2-normalized query vectors
+        top_k (int): Number of neighbours per query
+        chunk_size (int): Queries scored per matrix product, bounds memory use
+
+    Returns:
+        np.ndarray: int64 array of shape (num_queries, top_k), best first
+    """
+    top_k = min(top_k, len(vectors))
+    results = np.empty((len(queries), top_k), dtype=np.int64)
+
+    for start in range(0, len(queries), chunk_size):
+        scores = queries[start:start + chunk_size] @ vectors.T
+        # argpartition is O(n), only the k best are sorted
+        candidates = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1)
+        results[start:start + chunk_size] = np.take_along_axis(candidates, order, axis=1)
+
+    return results
+
+
+def recall_at_k(retrieved: List[List[int]], ground_truth: np.ndarray) -> float:
+    """
+    Mean fraction of the exact top-k found by the index.
+
+    Args:
+        retrieved (List[List[int]]): Ids returned for each query
+        ground_truth (np.ndarray): Exact ids of each query
+
+    Returns:
+        float: The recall@k
+    """
+    if len(ground_truth) == 0:
+        return 0.0
+
+    hits = [
+        len(set(ids) & set(truth.tolist())) / len(truth)
+        for ids, truth in zip(retrieved, ground_truth)
+    ]
+    return float(np.mean(hits))
+
+
+def sample_product_vectors(conn: psycopg.Connection, num_rows: int) -> np.ndarray:
+    """
+    Sample stored product embeddings from both stock tables.
+
+    Args:
+        conn (psycopg.Connection): The database connection
+        num_rows (int): Maximum number of vectors
+
+    Returns:
+        np.ndarray: float32 array of L2-normalized embeddings
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT embedding FROM (
+                SELECT embedding FROM {settings.IN_STOCK_PRODUCTS_TABLE_NAME}
+                UNION ALL
+                SELECT embedding FROM {settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME}
+            ) AS products
+            ORDER BY random()
+            LIMIT %s
+            """,
+            (num_rows,),
+        )
+        rows = cursor.fetchall()
+
+    if not rows:
+        raise RuntimeError("The product tables are empty, use --source synthetic")
+
+    return normalize_rows(np.stack([np.asarray(row[0], dtype=np.float32) for row in rows]))
+
+
+def load_vectors(conn: psycopg.Connection, vectors: np.ndarray) -> float:
+    """
+    (Re)create the scratch table and load the vectors with a binary COPY.
+    The row id is the position in the vectors array, so it matches the ground truth.
+
+    Args:
+        conn (psycopg.Connection): The database connection
+        vectors (np.ndarray): The vectors to load
+
+    Returns:
+        float: Load time in seconds
+    """
+    start = time.perf_counter()
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE_NAME}")
+        cursor.execute(
+            f"CREATE TABLE {BENCH_TABLE_NAME} (id BIGINT PRIMARY KEY, embedding vector({vectors.shape[1]}))"
+        )
+        with cursor.copy(f"COPY {BENCH_TABLE_NAME} (id, embedding) FROM STDIN WITH (FORMAT BINARY)") as copy:
+            copy.set_types(["int8", "vector"])
+            for i, vector in enumerate(vectors):
+                copy.write_row((i, vector))
+        cursor.execute(f"ANALYZE {BENCH_TABLE_NAME}")
+    conn.commit()
+    return time.perf_counter() - start
+
+
+def build_index(conn: psycopg.Connection, config: Dict[str, Any], num_rows: int) -> Dict[str, Any]:
+    """
+    Build the index of a configuration on the scratch table.
+
+    Args:
+        conn (psycopg.Connection): The database connection
+        config (Dict[str, Any]): The parsed configuration
+        num_rows (int): Number of rows in the scratch table
+
+    Returns:
+        Dict[str, Any]: The resolved build parameters, build time and index size
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP INDEX IF EXISTS {BENCH_INDEX_NAME}")
+        conn.commit()
+
+        if config["index_type"] == "exact":
+            return {"build_params": {}, "build_time_s": 0.0, "index_size_bytes": 0}
+
+        build_params = dict(config["build_params"])
+        if config["index_type"] == "ivfflat" and build_params.get("lists", "auto") == "auto":
+            build_params["lists"] = derive_ivfflat_lists(num_rows)
+        options = ", ".join(f"{key} = {int(value)}" for key, value in build_params.items())
+
+        cursor.execute(
+            "SELECT set_config('maintenance_work_mem', %s, false)",
+            (settings.INDEX_BUILD_MAINTENANCE_WORK_MEM,),
+        )
+        start = time.perf_counter()
+        cursor.execute(
+            f"CREATE INDEX {BENCH_INDEX_NAME} ON {BENCH_TABLE_NAME} "
+            f"USING {config['index_type']} (embedding vector_cosine_ops)"
+            + (f" WITH ({options})" if options else "")
+        )
+        conn.commit()
+        build_time = time.perf_counter() - start
+
+        cursor.execute("SELECT pg_relation_size(%s::regclass)", (BENCH_INDEX_NAME,))
+        index_size = cursor.fetchone()[0]
+        conn.commit()
+
+    return {
+        "build_params": {key: int(value) for key, value in build_params.items()},
+        "build_time_s": round(build_time, 3),
+        "index_size_bytes": int(index_size),
+    }
+
+
+def run_queries(
+    conn: psycopg.Connection,
+    queries: np.ndarray,
+    top_k: int,
+    index_type: str,
+    search_param: Optional[str],
+    search_value: Optional[int],
+) -> tuple[List[List[int]], List[float]]:
+    """
+    Run the queries one by one and time them, the way /search does.
+
+    Args:
+        conn (psycopg.Connection): The database connection
+        queries (np.ndarray): The query vectors
+        top_k (int): Number of neighbours per query
+        index_type (str): "exact", "ivfflat" or "hnsw", the exact scan runs without an index
+        search_param (Optional[str]): "probes" or "ef_search"
+        search_value (Optional[int]): Value of the search parameter
+
+    Returns:
+        tuple[List[List[int]], List[float]]: Ids returned per query and latencies in seconds
+    """
+    sql = (
+        f"SELECT id FROM {BENCH_TABLE_NAME} "
+        "ORDER BY embedding <=> %(embedding)s LIMIT %(top_k)s"
+    )
+    retrieved, latencies = [], []
+
+    with conn.cursor() as cursor:
+        # Session-level setting, so it is not part of the timed round trip
+        if search_param is not None:
+            cursor.execute(
+                f"SELECT set_config('{index_type}.{search_param}', %s, false)", (str(search_value),)
+            )
+        conn.commit()
+
+        for query in queries:
+            start = time.perf_counter()
+            cursor.execute(sql, {"embedding": query, "top_k": top_k}, prepare=True)
+            rows = cursor.fetchall()
+            latencies.append(time.perf_counter() - start)
+            retrieved.append([row[0] for row in rows])
+        conn.commit()
+
+    return retrieved, latencies
+
+
+def run_benchmark(
+    conn: psycopg.Connection,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    configs: List[Dict[str, Any]],
+    top_k: int,
+    warmup: int = 10,
+) -> List[Dict[str, Any]]:
+    """
+    Build every configuration and sweep its search parameter.
+
+    Args:
+        conn (psycopg.Connection): The database connection, with the scratch table loaded
+        vectors (np.ndarray): The loaded vectors
+        queries (np.ndarray): The query vectors
+        configs (List[Dict[str, Any]]): The parsed configurations
+        top_k (int): Number of neighbours per query
+        warmup (int): Untimed queries run before each measurement
+
+    Returns:
+        List[Dict[str, Any]]: One result per configuration and search parameter value
+    """
+    ground_truth = exact_top_k(vectors, queries, top_k)
+    results = []
+
+    for config in configs:
+        build = build_index(conn, config, len(vectors))
+
+        for search_value in config["search_values"]:
+            run_queries(
+                conn, queries[:warmup], top_k,
+                config["index_type"], config["search_param"], search_value,
+            )
+            retrieved, latencies = run_queries(
+                conn, queries, top_k,
+                config["index_type"], config["search_param"], search_value,
+            )
+
+            result = {
+                "index_type": config["index_type"],
+                **build,
+                "search_params": (
+                    {config["search_param"]: search_value} if config["search_param"] else {}
+                ),
+                f"recall@{top_k}": round(recall_at_k(retrieved, ground_truth), 4),
+                **summarize(latencies),
+            }
+            results.append(result)
+            print(json.dumps(result), file=sys.stderr)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", choices=("synthetic", "sample"), default="synthetic")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dimension", type=int, default=settings.EMBEDDING_DIMENSION)
+    parser.add_argument("--clusters", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--config", action="append", dest="configs",
+        help="Index configuration to benchmark, repeatable (default: exact, ivfflat and hnsw sweeps)",
+    )
+    parser.add_argument("--output", help="Path of the JSON report, printed to stdout if omitted")
+    parser.add_argument("--keep-table", action="store_true", help="Keep the scratch table afterwards")
+    args = parser.parse_args()
+
+    configs = [parse_config(spec) for spec in (args.configs or DEFAULT_CONFIGS)]
+
+    conn = psycopg.connect(**get_connection_params())
+    try:
+        conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        conn.commit()
+        register_vector_types(conn)
+
+        if args.source == "sample":
+            vectors = sample_product_vectors(conn, args.rows)
+        else:
+            vectors = generate_synthetic_vectors(args.rows, args.dimension, args.clusters, args.seed)
+        queries = make_queries(vectors, args.queries, seed=args.seed + 1)
+
+        load_time = load_vectors(conn, vectors)
+        results = run_benchmark(conn, vectors, queries, configs, args.top_k, args.warmup)
+
+        report = {
+            "source": args.source,
+            "rows": int(len(vectors)),
+            "dimension": int(vectors.shape[1]),
+            "queries": int(len(queries)),
+            "top_k": args.top_k,
+            "load_time_s": round(load_time, 3),
+            "results": results,
+        }
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+        else:
+            print(json.dumps(report, indent=2))
+    finally:
+        if not args.keep_table:
+            conn.rollback()
+            conn.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE_NAME}")
+            conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Benchmark the memory footprint and recall of the quantized vector storage modes against a live
+Postgres + pgvector (>= 0.7) database.
+
+The vectors are loaded into a scratch table (see bench_ann_recall) with the halfvec and binary
+columns generated the same way as in the stock tables. For each storage mode:
+    - float32: ANN on embedding, the current baseline
+    - halfvec: ANN on embedding_half, exact rescoring on embedding
+    - binary: ANN on embedding_bit by Hamming distance, exact rescoring on embedding
+the report contains the column size per row, the index size, build time, recall@k and latency.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_quantization --rows 100000 --index-type hnsw --candidates 100,200,400
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import psycopg
+
+from app.config.settings import Settings
+from app.database.vector_db import (
+    ANN_INDEXES,
+    FIRST_STAGE_DISTANCES,
+    QUANTIZED_COLUMNS,
+    derive_ivfflat_lists,
+    register_vector_types,
+)
+from app.deps.db import get_connection_params
+from benchmarks.bench_ann_recall import (
+    BENCH_INDEX_NAME,
+    BENCH_TABLE_NAME,
+    exact_top_k,
+    generate_synthetic_vectors,
+    load_vectors,
+    make_queries,
+    recall_at_k,
+    sample_product_vectors,
+)
+from benchmarks.bench_stock_tables_search import summarize
+
+settings = Settings()
+
+STORAGE_MODES = {
+    # Storage mode -> first stage mode of the search, None for the single-stage float32 search
+    "float32": None,
+    "halfvec": "halfvec",
+    "binary": "binary",
+}
+
+
+def add_quantized_columns(conn: psycopg.Connection, dimension: int) -> None:
+    """
+    Add the generated halfvec and binary columns to the scratch table.
+
+    Args:
+        conn (psycopg.Connection): The database connection
+        dimension (int): Dimension of the embeddings
+    """
+    with conn.cursor() as cursor:
+        for column, definition in QUANTIZED_COLUMNS.values():
+            cursor.execute(
+                f"ALTER TABLE {BENCH_TABLE_NAME} ADD COLUMN {column} "
+                + definition.format(dimension=dimension)
+            )
+        cursor.execute(f"ANALYZE {BENCH_TABLE_NAME}")
+    conn.commit()
+
+
+def column_bytes_per_row(conn: psycopg.Connection, column: str) -> float:
+    """
+    Average stored size of a column.
+
+    Args:
+        conn (psycopg.Connection): The database connection
+        column (str): Name of the column
+
+    Returns:
+        float: Average size in bytes
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT avg(pg_column_size({column})) FROM {BENCH_TABLE_NAME}")
+        size = cursor.fetchone()[0]
+    conn.commit()
+    return round(float(size or 0), 1)
+
+
+def build_mode_index(
+    conn: psycopg.Connection, first_stage: Optional[str], index_type: str, num_rows: int
+) -> Dict[str, Any]:
+    """
+    Build the ANN index searched by a storage mode.
+
+    Args:
+        conn (psycopg.Connection): The database connection
+        first_stage (Optional[str]): First stage mode, None for the float32 baseline
+        index_type (str): "ivfflat" or "hnsw"
+        num_rows (int): Number of rows in the scratch table
+
+    Returns:
+        Dict[str, Any]: Build time and index size
+    """
+    column, _, opclass = ANN_INDEXES[first_stage]
+    if index_type == "hnsw":
+        options = f"m = {int(settings.HNSW_M)}, ef_construction = {int(settings.HNSW_EF_CONSTRUCTION)}"
+    else:
+        options = f"lists = {derive_ivfflat_lists(num_rows)}"
+
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP INDEX IF EXISTS {BENCH_INDEX_NAME}")
+        cursor.execute(
+            "SELECT set_config('maintenance_work_mem', %s, false)",
+            (settings.INDEX_BUILD_MAINTENANCE_WORK_MEM,),
+        )
+        conn.commit()
+
+        start = time.perf_counter()
+        cursor.execute(
+            f"CREATE INDEX {BENCH_INDEX_NAME} ON {BENCH_TABLE_NAME} "
+            f"USING {index_type} ({column} {opclass}) WITH ({options})"
+        )
+        conn.commit()
+        build_time = time.perf_counter() - start
+
+        cursor.execute("SELECT pg_relation_size(%s::regclass)", (BENCH_INDEX_NAME,))
+        index_size = cursor.fetchone()[0]
+    conn.commit()
+
+    return {"build_time_s": round(build_time, 3), "index_size_bytes": int(index_size)}
+
+
+def run_mode_queries(
+    conn: psycopg.Connection,
+    queries: np.ndarray,
+    top_k: int,
+    first_stage: Optional[str],
+    index_type: str,
+    num_candidates: int,
+) -> tuple[List[List[int]], List[float]]:
+    """
+    Run the queries of a storage mode one by one and time them.
+
+    Args:
+        conn (psycopg.Connection): The database connection
+        queries (np.ndarray): The query vectors
+        top_k (int): Number of neighbours per query
+        first_stage (Optional[str]): First stage mode, None for the float32 baseline
+        index_type (str): "ivfflat" or "hnsw"
+        num_candidates (int): Candidates fetched by the first stage before rescoring
+
+    Returns:
+        tuple[List[List[int]], List[float]]: Ids returned per query and latencies in seconds
+    """
+    if first_stage is None:
+        sql = (
+            f"SELECT id FROM {BENCH_TABLE_NAME} "
+            "ORDER BY embedding <=> %(embedding)s LIMIT %(top_k)s"
+        )
+        depth = top_k
+    else:
+        distance = FIRST_STAGE_DISTANCES[first_stage].format(
+            embedding="%(embedding)s", short_embedding=None, dimension=queries.shape[1]
+        )
+        sql = f"""
+            SELECT id FROM (
+                SELECT id, embedding FROM {BENCH_TABLE_NAME}
+                ORDER BY {distance}
+                LIMIT %(num_candidates)s
+            ) AS candidates
+            ORDER BY embedding <=> %(embedding)s
+            LIMIT %(top_k)s
+        """
+        depth = num_candidates
+
+    retrieved, latencies = [], []
+    with conn.cursor() as cursor:
+        if index_type == "hnsw":
+            cursor.execute(
+                "SELECT set_config('hnsw.ef_search', %s, false)",
+                (str(max(settings.HNSW_EF_SEARCH, depth)),),
+            )
+        else:
+            cursor.execute(
+                "SELECT set_config('ivfflat.probes', %s, false)", (str(settings.IVFFLAT_PROBES),)
+            )
+        conn.commit()
+
+        params = {"top_k": top_k, "num_candidates": num_candidates}
+        for query in queries:
+            start = time.perf_counter()
+            cursor.execute(sql, {**params, "embedding": query}, prepare=True)
+            rows = cursor.fetchall()
+            latencies.append(time.perf_counter() - start)
+            retrieved.append([row[0] for row in rows])
+    conn.commit()
+
+    return retrieved, latencies
+
+
+def run_benchmark(
+    conn: psycopg.Connection,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    top_k: int,
+    index_type: str,
+    candidates: List[int],
+    warmup: int = 10,
+) -> Dict[str, Any]:
+    """
+    Benchmark every storage mode on the loaded scratch table.
+
+    Args:
+        conn (psycopg.Connection): The database connection, with the scratch table loaded
+        vectors (np.ndarray): The loaded vectors
+        queries (np.ndarray): The query vectors
+        top_k (int): Number of neighbours per query
+        index_type (str): "ivfflat" or "hnsw"
+        candidates (List[int]): Numbers of first stage candidates to sweep
+        warmup (int): Untimed queries run before each measurement
+
+    Returns:
+        Dict[str, Any]: Column sizes and one result per storage mode and number of candidates
+    """
+    ground_truth = exact_top_k(vectors, queries, top_k)
+    column_sizes = {
+        column: column_bytes_per_row(conn, column)
+        for column in ["embedding"] + [c for c, _ in QUANTIZED_COLUMNS.values()]
+    }
+
+    results = []
+    for storage_mode, first_stage in STORAGE_MODES.items():
+        build = build_mode_index(conn, first_stage, index_type, len(vectors))
+        column = ANN_INDEXES[first_stage][0]
+
+        for num_candidates in ([top_k] if first_stage is None else candidates):
+            run_mode_queries(conn, queries[:warmup], top_k, first_stage, index_type, num_candidates)
+            retrieved, latencies = run_mode_queries(
+                conn, queries, top_k, first_stage, index_type, num_candidates
+            )
+            result = {
+                "storage_mode": storage_mode,
+                "index_type": index_type,
+                "indexed_column": column,
+                "indexed_column_bytes_per_row": column_sizes[column],
+                **build,
+                "num_candidates": num_candidates if first_stage else None,
+                f"recall@{top_k}": round(recall_at_k(retrieved, ground_truth), 4),
+                **summarize(latencies),
+            }
+            results.append(result)
+            print(json.dumps(result), file=sys.stderr)
+
+    return {"column_bytes_per_row": column_sizes, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", choices=("synthetic", "sample"), default="synthetic")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dimension", type=int, default=settings.EMBEDDING_DIMENSION)
+    parser.add_argument("--clusters", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--index-type", choices=("ivfflat", "hnsw"), default=settings.VECTOR_INDEX_TYPE)
+    parser.add_argument(
+        "--candidates", default="100,200,400",
+        help="Comma-separated numbers of first stage candidates rescored exactly",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Path of the JSON report, printed to stdout if omitted")
+    parser.add_argument("--keep-table", action="store_true", help="Keep the scratch table afterwards")
+    args = parser.parse_args()
+
+    conn = psycopg.connect(**get_connection_params())
+    try:
+        conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        conn.commit()
+        register_vector_types(conn)
+
+        if args.source == "sample":
+            vectors = sample_product_vectors(conn, args.rows)
+        else:
+            vectors = generate_synthetic_vectors(args.rows, args.dimension, args.clusters, args.seed)
+        queries = make_queries(vectors, args.queries, seed=args.seed + 1)
+
+        load_vectors(conn, vectors)
+        add_quantized_columns(conn, vectors.shape[1])
+
+        report = {
+            "source": args.source,
+            "rows": int(len(vectors)),
+            "dimension": int(vectors.shape[1]),
+            "queries": int(len(queries)),
+            "top_k": args.top_k,
+            **run_benchmark(
+                conn, vectors, queries, args.top_k, args.index_type,
+                [int(c) for c in args.candidates.split(",")], args.warmup,
+            ),
+        }
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+        else:
+            print(json.dumps(report, indent=2))
+    finally:
+        if not args.keep_table:
+            conn.rollback()
+            conn.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE_NAME}")
+            conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark the LLM reranking of both stock tables with a stubbed LLM, no OpenAI calls are made.
+
+Compares:
+    - per_table: one rerank call per stock table, both awaited concurrently
+    - combined: one rerank call with both candidate sets (RERANK_MODE="combined")
+
+The stub answers after a simulated latency of base + input tokens * input cost + output tokens
+* output cost, tokens being estimated at 4 characters each. Reports the wall time per search, the
+LLM calls, the input and output tokens and the estimated cost per 1000 searches.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_rerank_modes --iterations 5 --products 10
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.ai_utils import llm_reranker
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def make_products(num_products: int, first_id: int) -> list[dict]:
+    return [
+        {
+            "id": product_id,
+            "title": f"Women's Linen Button Down Shirt {product_id}",
+            "average_rating": 4.4,
+            "rating_number": 1834,
+            "price": 32.99,
+            "thumbnail": f"https://m.media-amazon.com/images/I/{product_id}.jpg",
+            "feature_summary": "100% Linen | Relaxed fit with a curved hem and chest pocket",
+            "similarity": 0.83,
+        }
+        for product_id in range(first_id, first_id + num_products)
+    ]
+
+
+def make_reranked_items(prompt_section: str) -> list[dict]:
+    ids = re.findall(r"^([a-z]\d+)\t", prompt_section, re.MULTILINE)
+    return [
+        {
+            "id": product_id,
+            "rank": rank,
+            "rerank_score": round(1 - rank / 20, 2),
+            "reason": "Lightweight linen that stays cool, with strong reviews for fit and comfort.",
+        }
+        for rank, product_id in enumerate(reversed(ids), start=1)
+    ]
+
+
+class StubLLM:
+    """Async OpenAI client double answering in the format of the prompt after a simulated latency"""
+
+    def __init__(self, base_ms: float, input_ms_per_token: float, output_ms_per_token: float):
+        self.base_ms = base_ms
+        self.input_ms_per_token = input_ms_per_token
+        self.output_ms_per_token = output_ms_per_token
+        self.responses = SimpleNamespace(create=self.create)
+        self.reset()
+
+    def reset(self) -> None:
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    async def create(self, model: str, input: str, **kwargs):
+        if 'output key "' in input:
+            output = {
+                re.search(r'output key "(\w+)"', section).group(1): make_reranked_items(section)
+                for section in input.split("## TASK")[0].split("### ")[1:]
+            }
+        else:
+            output = {"reranked_results": make_reranked_items(input.split("## TASK")[0])}
+        output_text = json.dumps(output)
+
+        input_tokens, output_tokens = estimate_tokens(input), estimate_tokens(output_text)
+        self.calls += 1
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        await asyncio.sleep(
+            (
+                self.base_ms
+                + input_tokens * self.input_ms_per_token
+                + output_tokens * self.output_ms_per_token
+            ) / 1000
+        )
+        if kwargs.get("stream"):
+            return self.stream(output_text)
+        return SimpleNamespace(output_text=output_text)
+
+    @staticmethod
+    async def stream(output_text: str):
+        # The latency is already spent, the deltas are sent at once
+        for i in range(0, len(output_text), 16):
+            yield SimpleNamespace(type="response.output_text.delta", delta=output_text[i:i + 16])
+        yield SimpleNamespace(type="response.completed", response=SimpleNamespace(usage=None))
+
+
+async def run_mode(mode: str, llm: StubLLM, num_products: int, iterations: int, args) -> dict:
+    llm_reranker.settings.RERANK_MODE = mode
+    llm.reset()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        in_stock, out_of_stock = await llm_reranker.rerank_stock_tables_async(
+            make_products(num_products, 1), make_products(num_products, 1001), "linen shirt"
+        )
+        latencies.append(time.perf_counter() - start)
+        assert len(in_stock) == len(out_of_stock) == num_products
+
+    latencies_ms = np.asarray(latencies) * 1000
+    cost = (
+        llm.input_tokens * args.input_price + llm.output_tokens * args.output_price
+    ) / 1_000_000 / iterations * 1000
+    return {
+        "mean_ms": round(float(latencies_ms.mean()), 1),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 1),
+        "llm_calls_per_search": llm.calls / iterations,
+        "input_tokens_per_search": llm.input_tokens // iterations,
+        "output_tokens_per_search": llm.output_tokens // iterations,
+        "cost_per_1000_searches_usd": round(cost, 4),
+    }
+
+
+async def run(args) -> dict:
+    llm = StubLLM(args.base_ms, args.input_ms_per_token, args.output_ms_per_token)
+    llm_reranker.get_async_openai_client = lambda: llm
+    llm_reranker.settings.RERANK_CACHE_ENABLED = False
+    return {
+        mode: await run_mode(mode, llm, args.products, args.iterations, args)
+        for mode in ("per_table", "combined")
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--products", type=int, default=10, help="Candidates per stock table")
+    parser.add_argument("--base-ms", type=float, default=300.0, help="Simulated latency of a call")
+    parser.add_argument("--input-ms-per-token", type=float, default=0.05)
+    parser.add_argument("--output-ms-per-token", type=float, default=5.0)
+    parser.add_argument("--input-price", type=float, default=0.40, help="USD per 1M input tokens")
+    parser.add_argument("--output-price", type=float, default=1.60, help="USD per 1M output tokens")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
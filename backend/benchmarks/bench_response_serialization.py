@@ -0,0 +1,150 @@
+"""
+Benchmark the serialization of /search responses, no database or OpenAI calls needed.
+
+Compares:
+    - legacy: full product rows (features, description, images, details) returned as a plain dict,
+      run through jsonable_encoder and the stdlib json like FastAPI's default JSONResponse
+    - typed: search cards validated by SearchResponse (pydantic-core) and rendered by ORJSONResponse,
+      the path FastAPI takes for the /search response_model
+
+Reports the serialization time per response and the response bytes, raw and gzipped at the
+RESPONSE_COMPRESSION_LEVEL of the compression middleware.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_response_serialization --iterations 2000 --products 10
+"""
+import argparse
+import gzip
+import json
+import time
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.config.settings import Settings
+from app.schemas import SearchResponse
+
+settings = Settings()
+
+
+def make_full_product(product_id: int, stock_status: str) -> dict:
+    """Product row as returned by the searches before the search cards"""
+    return {
+        "id": product_id,
+        "title": f"Women's Linen Button Down Shirt {product_id}",
+        "average_rating": 4.4,
+        "rating_number": 1834,
+        "features": [
+            "100% Linen",
+            "Imported",
+            "Button closure",
+            "Machine Wash",
+            "Relaxed fit with a curved hem and chest pocket, breathable for summer days",
+        ],
+        "description": "A breathable linen shirt for warm days, easy to dress up or down. " * 4,
+        "price": 32.99 if stock_status == "in_stock" else None,
+        "images": [
+            {
+                "thumb": f"https://m.media-amazon.com/images/I/{product_id}_SR38,50_.jpg",
+                "large": f"https://m.media-amazon.com/images/I/{product_id}.jpg",
+                "variant": variant,
+                "hi_res": f"https://m.media-amazon.com/images/I/{product_id}_SL1500_.jpg",
+            }
+            for variant in ("MAIN", "PT01", "PT02", "PT03")
+        ],
+        "store": "Amazon Essentials",
+        "categories": '["Clothing", "Women", "Tops"]',
+        "details": {
+            "Department": "womens",
+            "Date First Available": "March 1, 2021",
+            "Manufacturer": "Amazon Essentials",
+            "Package Dimensions": "10 x 8 x 1 inches; 6 Ounces",
+        },
+        "similarity": 0.83,
+        "stock_status": stock_status,
+        "reason": "Lightweight linen that stays cool, with strong reviews for fit and comfort.",
+        "rank": product_id,
+        "rerank_score": 0.91,
+    }
+
+
+def make_search_card(product: dict) -> dict:
+    """Search card of a product, as returned by the searches"""
+    return {
+        "id": product["id"],
+        "title": product["title"],
+        "average_rating": product["average_rating"],
+        "rating_number": product["rating_number"],
+        "price": product["price"],
+        "thumbnail": product["images"][0]["large"],
+        "feature_summary": " | ".join(product["features"][:2]),
+        "similarity": product["similarity"],
+        "fusion_score": 0.032,
+        "stock_status": product["stock_status"],
+        "reason": product["reason"],
+        "rank": product["rank"],
+        "rerank_score": product["rerank_score"],
+    }
+
+
+def make_response(num_products: int, full: bool) -> dict:
+    in_stock = [make_full_product(i, "in_stock") for i in range(1, num_products + 1)]
+    out_of_stock = [make_full_product(i, "out_of_stock") for i in range(1, num_products + 1)]
+    if not full:
+        in_stock = [make_search_card(p) for p in in_stock]
+        out_of_stock = [make_search_card(p) for p in out_of_stock]
+    return {
+        "status": "success",
+        "recommended_in_stock_products": in_stock,
+        "recommended_out_of_stock_products": out_of_stock,
+        "latency_ms": {"embedding": 80.1, "vector_search": 9.7, "rerank": 1210.4},
+    }
+
+
+def render_legacy(response: dict) -> bytes:
+    return JSONResponse(content=jsonable_encoder(response)).body
+
+
+def render_typed(response: dict) -> bytes:
+    model = SearchResponse.model_validate(response)
+    return ORJSONResponse(content=model.model_dump(mode="json")).body
+
+
+def run(render, response: dict, iterations: int) -> dict:
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        body = render(response)
+        latencies.append(time.perf_counter() - start)
+
+    latencies_us = np.asarray(latencies) * 1_000_000
+    return {
+        "mean_us": round(float(latencies_us.mean()), 1),
+        "p50_us": round(float(np.percentile(latencies_us, 50)), 1),
+        "p99_us": round(float(np.percentile(latencies_us, 99)), 1),
+        "bytes": len(body),
+        "gzip_bytes": len(gzip.compress(body, compresslevel=settings.RESPONSE_COMPRESSION_LEVEL)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--products", type=int, default=10, help="Products per stock table")
+    args = parser.parse_args()
+
+    results = {
+        "legacy": run(render_legacy, make_response(args.products, full=True), args.iterations),
+        "typed": run(render_typed, make_response(args.products, full=False), args.iterations),
+        "typed_full_serializer_only": run(
+            lambda response: ORJSONResponse(content=response).body,
+            make_response(args.products, full=True),
+            args.iterations,
+        ),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
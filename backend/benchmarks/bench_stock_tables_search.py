@@ -0,0 +1,116 @@
+"""
+Benchmark the stock tables search against a live Postgres + pgvector database.
+
+Compares:
+    - legacy: one query per table with the embedding interpolated as an ARRAY[...] text literal
+    - single_round_trip: one prepared UNION ALL query with the embedding sent once as a binary parameter
+
+Query vectors are sampled from the stored product embeddings, so no OpenAI calls are made.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_stock_tables_search --iterations 200 --top-k 10
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.config.settings import Settings
+from app.database.vector_db import VectorDatabase, build_search_query
+from app.deps.db import get_connection_params
+
+settings = Settings()
+
+
+def sample_query_embeddings(db: VectorDatabase, num_queries: int) -> list[list[float]]:
+    """
+    Sample stored product embeddings to use as query vectors.
+    Falls back to random unit vectors if the table is empty.
+    """
+    cursor = db.conn.cursor()
+    cursor.execute(
+        f"SELECT embedding FROM {settings.IN_STOCK_PRODUCTS_TABLE_NAME} ORDER BY random() LIMIT %s",
+        (num_queries,),
+    )
+    embeddings = [np.asarray(row[0], dtype=np.float32).tolist() for row in cursor.fetchall()]
+    cursor.close()
+
+    rng = np.random.default_rng(0)
+    while len(embeddings) < num_queries:
+        vector = rng.standard_normal(settings.EMBEDDING_DIMENSION).astype(np.float32)
+        embeddings.append((vector / np.linalg.norm(vector)).tolist())
+
+    return embeddings
+
+
+def summarize(latencies: list[float]) -> dict:
+    """Latency summary in milliseconds"""
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "mean_ms": round(float(latencies_ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+    }
+
+
+def run_legacy(db: VectorDatabase, embeddings: list[list[float]], top_k: int) -> dict:
+    latencies = []
+    for embedding in embeddings:
+        start = time.perf_counter()
+        db.search_products(embedding, settings.IN_STOCK_PRODUCTS_TABLE_NAME, top_k)
+        db.search_products(embedding, settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME, top_k)
+        latencies.append(time.perf_counter() - start)
+
+    sql_bytes = sum(
+        len(build_search_query(embeddings[0], table, top_k, settings.EMBEDDING_DIMENSION).encode())
+        for table in (settings.IN_STOCK_PRODUCTS_TABLE_NAME, settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME)
+    )
+    return {**summarize(latencies), "round_trips": 2, "sql_text_bytes": sql_bytes}
+
+
+def run_single_round_trip(db: VectorDatabase, embeddings: list[list[float]], top_k: int) -> dict:
+    latencies = []
+    for embedding in embeddings:
+        start = time.perf_counter()
+        db.search_stock_tables(embedding, top_k)
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        **summarize(latencies),
+        "round_trips": 1,
+        # Prepared once per connection, afterwards only the binary parameters are sent
+        "vector_param_bytes": 4 + 4 * settings.EMBEDDING_DIMENSION,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    db = VectorDatabase(get_connection_params())
+    db.connect()
+    try:
+        embeddings = sample_query_embeddings(db, args.iterations)
+
+        # Warm up caches and the prepared statement
+        run_legacy(db, embeddings[: args.warmup], args.top_k)
+        run_single_round_trip(db, embeddings[: args.warmup], args.top_k)
+
+        report = {
+            "iterations": args.iterations,
+            "top_k": args.top_k,
+            "legacy": run_legacy(db, embeddings, args.top_k),
+            "single_round_trip": run_single_round_trip(db, embeddings, args.top_k),
+        }
+        print(json.dumps(report, indent=2))
+    finally:
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,7 @@ os.environ["DB_USER"] = "postgres"
 os.environ["DB_PASSWORD"] = "postgres"
 os.environ["DB_NAME"] = "fashion_ecommerce_test"
 os.environ["EMBEDDING_DIMENSION"] = "1536"  # Set to match production dimension
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
 
 
 # Load environment variables for testing
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from benchmarks.bench_ann_recall import (
+    exact_top_k,
+    generate_synthetic_vectors,
+    make_queries,
+    parse_config,
+    recall_at_k,
+)
+
+
+def test_exact_top_k_matches_full_sort():
+    vectors = generate_synthetic_vectors(2000, 32, num_clusters=10)
+    queries = make_queries(vectors, 50)
+
+    result = exact_top_k(vectors, queries, top_k=10, chunk_size=16)
+
+    expected = np.argsort(-(queries @ vectors.T), axis=1)[:, :10]
+    assert np.array_equal(result, expected)
+
+
+def test_recall_at_k():
+    ground_truth = np.array([[1, 2, 3, 4], [5, 6, 7, 8]])
+    assert recall_at_k([[1, 2, 3, 4], [5, 6, 0, 0]], ground_truth) == pytest.approx(0.75)
+
+
+def test_parse_config():
+    assert parse_config("exact")["search_values"] == [None]
+
+    config = parse_config("hnsw:m=16,ef_construction=64:ef_search=20,40")
+    assert config["build_params"] == {"m": "16", "ef_construction": "64"}
+    assert config["search_values"] == [20, 40]
+
+    with pytest.raises(ValueError):
+        parse_config("ivfflat:lists=100:ef_search=40")
@@ -0,0 +1,195 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from app import main
+from app.database import pool
+from app.database.async_vector_db import AsyncVectorDatabase
+from app.database.vector_db import VectorDatabase
+from app.database.vector_store import AsyncVectorStore
+from app.deps import db as db_deps
+
+
+class FakePool:
+    """Sync pool double counting the borrowed and returned connections"""
+
+    def __init__(self, name):
+        self.name = name
+        self.opened = False
+        self.closed = False
+        self.borrowed = 0
+        self.returned = 0
+
+    def open(self, wait=True):
+        self.opened = True
+        self.open_wait = wait
+
+    def close(self):
+        self.closed = True
+
+    def getconn(self):
+        self.borrowed += 1
+        return Mock(name="conn")
+
+    def putconn(self, conn):
+        self.returned += 1
+
+    def get_stats(self):
+        return {"pool_size": 1}
+
+
+class FakeAsyncPool(FakePool):
+    """Async pool double, its connection context returns the connection on exit"""
+
+    async def open(self, wait=True):
+        super().open(wait)
+
+    async def close(self):
+        super().close()
+
+    @asynccontextmanager
+    async def connection(self):
+        self.borrowed += 1
+        try:
+            yield Mock(name="conn")
+        finally:
+            self.returned += 1
+
+
+@pytest.fixture
+def fake_pools():
+    sync_pool, async_pool = FakePool("sync"), FakeAsyncPool("async")
+    with patch.object(pool, "create_pool", return_value=sync_pool) as create_pool, \
+            patch.object(pool, "create_async_pool", return_value=async_pool):
+        yield sync_pool, async_pool, create_pool
+    asyncio.run(pool.close_pools())
+
+
+def test_open_pools_opens_both_pools_once(fake_pools):
+    sync_pool, async_pool, create_pool = fake_pools
+
+    asyncio.run(pool.open_pools({"host": "db"}))
+    asyncio.run(pool.open_pools({"host": "db"}))
+
+    create_pool.assert_called_once_with({"host": "db"})
+    assert sync_pool.opened and async_pool.opened
+    # Startup does not wait for the database
+    assert sync_pool.open_wait is False and async_pool.open_wait is False
+    assert pool.get_pool() is sync_pool
+    assert pool.get_async_pool() is async_pool
+    assert pool.get_pool_stats() == {"sync": {"pool_size": 1}, "async": {"pool_size": 1}}
+
+
+def test_close_pools_closes_and_forgets_both_pools(fake_pools):
+    sync_pool, async_pool, _ = fake_pools
+    asyncio.run(pool.open_pools({}))
+
+    asyncio.run(pool.close_pools())
+
+    assert sync_pool.closed and async_pool.closed
+    assert pool.get_pool_stats() == {}
+    with pytest.raises(RuntimeError):
+        pool.get_pool()
+    with pytest.raises(RuntimeError):
+        pool.get_async_pool()
+
+
+def test_lifespan_opens_and_closes_the_pools():
+    listener_stopped = []
+
+    async def listen_forever(connection_params):
+        try:
+            await asyncio.sleep(3600)
+        finally:
+            listener_stopped.append(close_pools.await_count)
+
+    async def run():
+        async with main.lifespan(main.app):
+            open_pools.assert_awaited_once()
+            close_pools.assert_not_awaited()
+            await asyncio.sleep(0)  # Let the listener start
+        close_pools.assert_awaited_once()
+        # The listener has stopped before the pools are closed
+        assert listener_stopped == [0]
+
+    with patch.object(main.settings, "VECTOR_STORE_BACKEND", "postgres"), \
+            patch("app.main.open_pools", new=AsyncMock()) as open_pools, \
+            patch("app.main.close_pools", new=AsyncMock()) as close_pools, \
+            patch("app.main.listen_catalog_changes", side_effect=listen_forever):
+        asyncio.run(run())
+
+
+def test_lifespan_skips_the_pools_for_the_numpy_backend():
+    async def run():
+        async with main.lifespan(main.app):
+            pass
+
+    with patch.object(main.settings, "VECTOR_STORE_BACKEND", "numpy"), \
+            patch("app.main.open_pools", new=AsyncMock()) as open_pools:
+        asyncio.run(run())
+
+    open_pools.assert_not_awaited()
+
+
+async def first_dependency(dependency):
+    generator = dependency()
+    db = await generator.__anext__()
+    await generator.aclose()
+    return db
+
+
+def test_async_db_uses_the_async_pool(fake_pools):
+    _, async_pool, _ = fake_pools
+    asyncio.run(pool.open_pools({}))
+
+    with patch.object(db_deps.settings, "VECTOR_STORE_BACKEND", "postgres"):
+        db = asyncio.run(first_dependency(db_deps.get_async_db))
+
+    assert isinstance(db, AsyncVectorDatabase)
+    assert db.pool is async_pool
+
+
+def test_async_db_uses_the_numpy_store_without_pools():
+    with patch.object(db_deps.settings, "VECTOR_STORE_BACKEND", "numpy"), \
+            patch.object(db_deps, "get_numpy_vector_store", return_value=Mock()):
+        db = asyncio.run(first_dependency(db_deps.get_async_db))
+
+    assert isinstance(db, AsyncVectorStore)
+
+
+def test_sync_db_returns_its_connection_on_error(fake_pools):
+    sync_pool, _, _ = fake_pools
+    asyncio.run(pool.open_pools({}))
+
+    dependency = db_deps.get_db()
+    next(dependency)
+    with pytest.raises(ValueError):
+        dependency.throw(ValueError("request failed"))
+
+    assert sync_pool.borrowed == sync_pool.returned == 1
+
+
+def test_async_connection_is_returned_on_error():
+    async_pool = FakeAsyncPool("async")
+    db = AsyncVectorDatabase({}, pool=async_pool)
+
+    async def run():
+        async with db.connection():
+            raise ValueError("query failed")
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+
+    assert async_pool.borrowed == async_pool.returned == 1
+
+
+def test_async_store_passes_the_filters_to_the_postgres_store():
+    store = VectorDatabase({})
+    filters = {"stores": ["nike"]}
+
+    with patch.object(store, "search_products", autospec=True, return_value=[]) as search:
+        asyncio.run(AsyncVectorStore(store).search_products([0.1], "in_stock_products", 5, filters=filters))
+
+    search.assert_called_once_with([0.1], "in_stock_products", top_k=5, filters=filters)
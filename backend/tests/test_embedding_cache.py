@@ -0,0 +1,152 @@
+import asyncio
+
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.ai_utils.embedding_cache import EmbeddingCache, normalize_query
+from app.utils.cache import LRUCache
+
+MODEL = "text-embedding-3-small"
+EMBEDDING = [0.25] * 1536
+
+
+class FakeClock:
+    """Manually advanced clock for TTL tests"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_query():
+    """Case and whitespace differences share a key"""
+    assert normalize_query("  Summer   BEACH dress ") == "summer beach dress"
+    assert EmbeddingCache.make_key("Summer beach dress", MODEL) == EmbeddingCache.make_key(
+        "summer  beach dress", MODEL
+    )
+    assert EmbeddingCache.make_key("summer beach dress", MODEL) != EmbeddingCache.make_key(
+        "summer beach dress", "text-embedding-3-large"
+    )
+
+
+def test_lru_eviction():
+    """The least recently used entry is evicted first"""
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_ttl_expiry():
+    """Entries older than the TTL are treated as misses"""
+    clock = FakeClock()
+    cache = LRUCache(max_size=10, ttl_seconds=5, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 4
+    assert cache.get("a") == 1
+    clock.now = 6
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["expirations"] == 1
+
+
+def test_memory_tier_roundtrip():
+    """Embeddings are returned as float lists after being stored as float32"""
+    cache = EmbeddingCache(max_size=10, ttl_seconds=None)
+    assert cache.get("summer beach dress", MODEL) is None
+
+    cache.set("summer beach dress", MODEL, EMBEDDING)
+
+    assert cache.get("Summer Beach Dress", MODEL) == EMBEDDING
+    assert cache.stats()["memory"]["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_disk_tier_shared_between_instances(tmp_path):
+    """A second cache instance (another worker) reads entries written by the first"""
+    path = str(tmp_path / "embeddings.sqlite")
+    writer = EmbeddingCache(max_size=10, ttl_seconds=3600, disk_path=path)
+    reader = EmbeddingCache(max_size=10, ttl_seconds=3600, disk_path=path)
+
+    writer.set("red leather boots", MODEL, EMBEDDING)
+
+    assert reader.get("red leather boots", MODEL) == EMBEDDING
+    assert reader.stats()["disk"]["hits"] == 1
+
+    # The entry is promoted to memory, so the disk is not read again
+    assert reader.get("red leather boots", MODEL) == EMBEDDING
+    assert reader.stats()["disk"]["hits"] == 1
+
+
+def test_promoted_entry_keeps_its_remaining_lifetime(tmp_path):
+    """An embedding read from the file expires from memory when it expires on disk"""
+    path = str(tmp_path / "embeddings.sqlite")
+    writer = EmbeddingCache(max_size=10, ttl_seconds=3600, disk_path=path)
+    reader = EmbeddingCache(max_size=10, ttl_seconds=3600, disk_path=path)
+    clock = FakeClock()
+    reader.memory = LRUCache(max_size=10, ttl_seconds=3600, clock=clock)
+
+    with patch("app.ai_utils.embedding_cache.time.time", return_value=1000.0):
+        writer.set("red leather boots", MODEL, EMBEDDING)
+    with patch("app.ai_utils.embedding_cache.time.time", return_value=4000.0):
+        assert reader.get("red leather boots", MODEL) == EMBEDDING
+
+    clock.now = 599
+    assert reader.memory.get(EmbeddingCache.make_key("red leather boots", MODEL)) is not None
+    clock.now = 601
+    assert reader.memory.get(EmbeddingCache.make_key("red leather boots", MODEL)) is None
+
+
+def test_async_access_reads_and_writes_the_file_off_the_event_loop(tmp_path):
+    """The coroutines hand the SQLite calls to a worker thread, the memory tier stays inline"""
+    path = str(tmp_path / "embeddings.sqlite")
+    writer = EmbeddingCache(max_size=10, ttl_seconds=3600, disk_path=path)
+    reader = EmbeddingCache(max_size=10, ttl_seconds=3600, disk_path=path)
+    to_thread = AsyncMock(side_effect=lambda function, *args: function(*args))
+
+    async def run():
+        await writer.set_async("red leather boots", MODEL, EMBEDDING)
+        first = await reader.get_async("red leather boots", MODEL)
+        second = await reader.get_async("red leather boots", MODEL)
+        return first, second
+
+    with patch("app.ai_utils.embedding_cache.asyncio.to_thread", to_thread):
+        assert asyncio.run(run()) == (EMBEDDING, EMBEDDING)
+
+    # One write and one read, the second read is served from memory
+    assert [call.args[0].__name__ for call in to_thread.await_args_list] == ["_disk_set", "_disk_get"]
+    assert reader.stats()["disk"]["hits"] == 1
+
+    memory_only = EmbeddingCache(max_size=10, ttl_seconds=None)
+    with patch("app.ai_utils.embedding_cache.asyncio.to_thread") as unused_to_thread:
+        asyncio.run(memory_only.set_async("linen shirt", MODEL, EMBEDDING))
+        assert asyncio.run(memory_only.get_async("linen shirt", MODEL)) == EMBEDDING
+    unused_to_thread.assert_not_called()
+
+
+def test_get_embedding_async_uses_cache():
+    """A repeated query does not call the embeddings API again"""
+    from app.ai_utils import embeddings
+
+    response = Mock()
+    response.data = [Mock(embedding=EMBEDDING)]
+    create = AsyncMock(return_value=response)
+
+    embeddings.embedding_cache.clear()
+    with patch.object(embeddings.async_client.embeddings, "create", create):
+        first = asyncio.run(embeddings.get_embedding_async("linen shirt"))
+        second = asyncio.run(embeddings.get_embedding_async("Linen  shirt"))
+
+    assert first == second == EMBEDDING
+    create.assert_awaited_once()
@@ -0,0 +1,60 @@
+from app.ai_utils.fallback_ranker import RankerStats, rank_products
+
+
+def make_product(product_id, similarity, average_rating, rating_number):
+    return {
+        "id": product_id,
+        "title": f"Product {product_id}",
+        "similarity": similarity,
+        "average_rating": average_rating,
+        "rating_number": rating_number,
+    }
+
+
+def test_well_reviewed_products_beat_few_perfect_ratings():
+    """The Bayesian-smoothed rating discounts a 5.0 from 2 reviews"""
+    products = [make_product(1, 0.80, 5.0, 2), make_product(2, 0.78, 4.6, 2000)]
+
+    ranked = rank_products(products)
+
+    assert [p["id"] for p in ranked] == [2, 1]
+    assert [p["rank"] for p in ranked] == [1, 2]
+    assert ranked[0]["rerank_score"] > ranked[1]["rerank_score"]
+
+
+def test_weights_are_configurable():
+    products = [make_product(1, 0.80, 5.0, 2), make_product(2, 0.78, 4.6, 2000)]
+
+    ranked = rank_products(products, similarity_weight=1.0, rating_weight=0.0, reviews_weight=0.0)
+
+    assert [p["id"] for p in ranked] == [1, 2]
+
+
+def test_missing_values_and_ties_are_deterministic():
+    """Full-text only hits and products without ratings are ranked, ties keep the search order"""
+    products = [
+        make_product(1, None, None, None),
+        make_product(2, 0.5, None, None),
+        make_product(3, 0.5, None, None),
+    ]
+
+    ranked = rank_products(products)
+
+    assert [p["id"] for p in ranked] == [1, 2, 3]
+    assert products[0].get("rank") is None
+    assert rank_products([]) == []
+
+
+def test_ranker_stats():
+    stats = RankerStats()
+    stats.record_llm()
+    stats.record_fallback("timeout")
+    stats.record_fallback("timeout")
+    stats.record_fallback("error")
+
+    assert stats.stats() == {
+        "llm": 1,
+        "fallback": 3,
+        "fallback_ratio": 0.75,
+        "fallback_reasons": {"timeout": 2, "error": 1},
+    }
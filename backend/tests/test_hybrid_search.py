@@ -0,0 +1,86 @@
+import pytest
+from pydantic import ValidationError
+
+from app.database.vector_db import (
+    MAX_LEXICAL_TERMS,
+    build_lexical_search_params,
+    build_lexical_search_query,
+    build_filter_predicates,
+    split_lexical_rows,
+    split_lexical_terms,
+    settings,
+)
+from app.schemas import QueryValidationBase
+from app.utils.fusion import reciprocal_rank_fusion
+
+
+def test_rrf_ranks_products_found_by_both_retrievers_first():
+    vector_results = [{"id": 1, "similarity": 0.9}, {"id": 2, "similarity": 0.8}, {"id": 3, "similarity": 0.7}]
+    lexical_results = [{"id": 3, "similarity": None, "lexical_score": 0.6}, {"id": 4, "similarity": None, "lexical_score": 0.2}]
+
+    fused = reciprocal_rank_fusion([vector_results, lexical_results], [1.0, 1.0], k=60)
+
+    assert [p["id"] for p in fused] == [3, 1, 2, 4]
+    assert fused[0]["fusion_score"] == pytest.approx(1 / 63 + 1 / 61)
+    # The merged product keeps the vector similarity and gains the lexical score
+    assert fused[0]["similarity"] == 0.7
+    assert fused[0]["lexical_score"] == 0.6
+
+
+def test_rrf_weights_and_top_k():
+    vector_results = [{"id": 1}, {"id": 2}]
+    lexical_results = [{"id": 2}, {"id": 1}]
+
+    assert [p["id"] for p in reciprocal_rank_fusion([vector_results, lexical_results], [1.0, 3.0])] == [2, 1]
+    assert [p["id"] for p in reciprocal_rank_fusion([vector_results, lexical_results], [1.0, 0.0], top_k=1)] == [1]
+    with pytest.raises(ValueError):
+        reciprocal_rank_fusion([vector_results], [1.0, 1.0])
+
+
+def test_lexical_query_searches_both_tables_with_filters():
+    predicates, _ = build_filter_predicates({"min_price": 10.0})
+    params = build_lexical_search_params("nike air max", top_k=30, filters={"min_price": 10.0})
+    num_terms = len(split_lexical_terms("nike air max"))
+    sql = build_lexical_search_query(
+        "in_stock_products", "out_of_stock_products", predicates, num_terms
+    ).as_string(None)
+
+    assert sql.count("search_tsv @@ lexical_query AND price >= %(filter_min_price)s") == 2
+    assert "UNION ALL" in sql
+    assert '"in_stock_products"' in sql and "'out_of_stock' AS stock_status" in sql
+    # Any word may match: one tsquery per word, ORed
+    assert sql.count(
+        "plainto_tsquery(%(ts_config)s::regconfig, %(query_term_0)s) || "
+        "plainto_tsquery(%(ts_config)s::regconfig, %(query_term_1)s) || "
+        "plainto_tsquery(%(ts_config)s::regconfig, %(query_term_2)s) AS lexical_query"
+    ) == 2
+    assert [params[f"query_term_{i}"] for i in range(num_terms)] == ["nike", "air", "max"]
+    assert params["ts_config"] == settings.FULL_TEXT_SEARCH_CONFIG
+    assert params["filter_min_price"] == 10.0
+
+
+def test_lexical_terms_are_bounded():
+    assert split_lexical_terms("  ") == [""]
+    assert len(split_lexical_terms("word " * 100)) == MAX_LEXICAL_TERMS
+
+
+def test_lexical_rows_are_split_by_stock_status():
+    rows = [("out_of_stock", 3, 0.1), ("in_stock", 1, 0.2), ("in_stock", 2, 0.4)]
+
+    in_stock, out_of_stock = split_lexical_rows(rows)
+
+    assert [p["id"] for p in in_stock] == [2, 1]
+    assert [p["id"] for p in out_of_stock] == [3]
+    assert in_stock[0]["lexical_score"] == 0.4
+    assert in_stock[0]["similarity"] is None
+
+
+def test_fusion_weights_are_validated():
+    query = QueryValidationBase(query="nike air max", fusion={"lexical": 2})
+    assert query.fusion.lexical == 2
+    assert query.fusion.vector is None
+
+    with pytest.raises(ValidationError):
+        QueryValidationBase(query="nike air max", fusion={"vector": -1})
+    with pytest.raises(ValidationError):
+        QueryValidationBase(query="nike air max", fusion={"vector": 0, "lexical": 0})
@@ -0,0 +1,458 @@
+import asyncio
+import json
+
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.ai_utils import llm_reranker
+from app.ai_utils import rerank_cascade as cascade
+from app.database import catalog_events
+
+MOCK_PRODUCTS = [
+    {
+        "id": product_id,
+        "title": f"Product {product_id}",
+        "average_rating": 4.0,
+        "rating_number": 10 * product_id,
+        "features": ["cotton"],
+        "details": {},
+        "price": 19.99,
+        "similarity": 0.9 - 0.1 * product_id,
+    }
+    for product_id in (1, 2, 3)
+]
+
+# The prompt refers to the candidates by alias: i1 is the first in-stock candidate
+LLM_OUTPUT = json.dumps({
+    "reranked_results": [
+        {"id": "i3", "rank": 1, "rerank_score": 0.9, "reason": "Best match"},
+        {"id": "i1", "rank": 2, "rerank_score": 0.8, "reason": "Good match"},
+        {"id": "i2", "rank": 3, "rerank_score": 0.5, "reason": "Fair match"},
+    ],
+    "query_understanding": "cotton shirt",
+})
+
+
+async def stream_output(output_text, chunk_size=7, delay=0.0):
+    """Events of a streamed response, the output text is sent in small deltas"""
+    for i in range(0, len(output_text), chunk_size):
+        await asyncio.sleep(delay)
+        yield Mock(type="response.output_text.delta", delta=output_text[i:i + chunk_size])
+    yield Mock(type="response.completed", response=Mock(usage=None))
+
+
+@pytest.fixture
+def llm():
+    """Patch the async OpenAI client used by the reranker, it streams create.output_text"""
+    create = AsyncMock(side_effect=lambda **kwargs: stream_output(
+        create.output_by_model.get(kwargs["model"], create.output_text)
+    ))
+    create.output_text = LLM_OUTPUT
+    create.output_by_model = {}
+    client = Mock()
+    client.responses.create = create
+    llm_reranker.rerank_cache.clear()
+    with patch.object(llm_reranker, "get_async_openai_client", return_value=client):
+        yield create
+
+
+def rerank(query="cotton shirt", products=MOCK_PRODUCTS):
+    return asyncio.run(
+        llm_reranker.rerank_search_results_async(
+            products_search_results=[dict(p) for p in products],
+            stock_status="in_stock",
+            query=query,
+        )
+    )
+
+
+def test_rerank_orders_by_llm_rank(llm):
+    """Products are returned in the order chosen by the LLM"""
+    results = rerank()
+
+    assert [p["id"] for p in results] == [3, 1, 2]
+    assert results[0]["reason"] == "Best match"
+
+
+def test_warm_query_skips_llm(llm):
+    """The same query and candidate ids reuse the cached ranking"""
+    rerank()
+    results = rerank(query="Cotton  Shirt")
+
+    assert [p["id"] for p in results] == [3, 1, 2]
+    llm.assert_awaited_once()
+    assert llm_reranker.rerank_cache.stats()["hits"] == 1
+
+
+def test_different_candidates_call_llm(llm):
+    """Another candidate set is a different cache key"""
+    rerank()
+    rerank(products=MOCK_PRODUCTS[:2])
+
+    assert llm.await_count == 2
+
+
+def test_changed_product_invalidates_ranking(llm):
+    """A catalog change of a candidate drops the cached ranking"""
+    rerank()
+    catalog_events.publish_products_changed("in_stock_products", [2])
+    rerank()
+
+    assert llm.await_count == 2
+    assert llm_reranker.rerank_cache.stats()["invalidations"] == 1
+
+
+def test_table_reload_invalidates_its_rankings_only(llm):
+    """A change without product ids drops the rankings of that table, ids may have been reused"""
+    rerank()
+    invalidations = llm_reranker.rerank_cache.stats()["invalidations"]
+    catalog_events.publish_products_changed("out_of_stock_products")
+    assert len(llm_reranker.rerank_cache.entries) == 1
+
+    catalog_events.publish_products_changed("in_stock_products")
+    rerank()
+
+    assert llm.await_count == 2
+    assert llm_reranker.rerank_cache.stats()["invalidations"] == invalidations + 1
+
+
+def test_invalid_llm_output_falls_back_to_local_ranker(llm):
+    """Unparseable output is replaced by the local ranker and is not cached"""
+    llm.output_text = "not json"
+    fallbacks = llm_reranker.get_ranker_stats().fallback_reasons["invalid_output"]
+
+    results = rerank()
+
+    assert [p["id"] for p in results] == [1, 2, 3]
+    assert [p["rank"] for p in results] == [1, 2, 3]
+    assert {p["ranker"] for p in results} == {"fallback"}
+    assert len(llm_reranker.rerank_cache.entries) == 0
+    assert llm_reranker.get_ranker_stats().fallback_reasons["invalid_output"] == fallbacks + 1
+
+
+def test_llm_missing_its_deadline_falls_back_to_local_ranker(llm):
+    """A slow LLM call is abandoned at RERANK_TIMEOUT_SECONDS"""
+    async def slow_llm(**kwargs):
+        await asyncio.sleep(1)
+        return stream_output(LLM_OUTPUT)
+
+    llm.side_effect = slow_llm
+    timeouts = llm_reranker.get_ranker_stats().fallback_reasons["timeout"]
+
+    with patch.object(llm_reranker.settings, "RERANK_TIMEOUT_SECONDS", 0.05):
+        results = rerank()
+        in_stock, out_of_stock = rerank_both()
+
+    assert {p["ranker"] for p in results + in_stock + out_of_stock} == {"fallback"}
+    assert llm_reranker.get_ranker_stats().fallback_reasons["timeout"] == timeouts + 3
+
+
+def test_rerank_requests_schema_constrained_stream(llm):
+    rerank()
+
+    kwargs = llm.await_args.kwargs
+    assert kwargs["stream"] is True
+    assert kwargs["text"]["format"]["type"] == "json_schema"
+    assert kwargs["text"]["format"]["schema"]["required"] == ["reranked_results"]
+
+
+def test_ranked_items_are_sent_before_the_stream_completes(llm):
+    """on_item receives each ranked product as soon as its item is parsed"""
+    received = []
+
+    def on_item(product):
+        received.append((product["id"], llm_reranker.get_ranker_stats().llm))
+
+    llm_calls = llm_reranker.get_ranker_stats().llm
+    results = asyncio.run(
+        llm_reranker.rerank_search_results_async(
+            [dict(p) for p in MOCK_PRODUCTS], "in_stock", "cotton shirt", on_item=on_item
+        )
+    )
+
+    assert [p["id"] for p in results] == [3, 1, 2]
+    # All items arrived before the ranked list was complete
+    assert received == [(3, llm_calls), (1, llm_calls), (2, llm_calls)]
+
+
+def test_deadline_keeps_the_items_streamed_in_time(llm):
+    """Items parsed before the deadline are kept, the rest are ranked locally and nothing is cached"""
+    first_item_end = LLM_OUTPUT.index("}") + 1
+    llm.side_effect = lambda **kwargs: stream_output(LLM_OUTPUT, chunk_size=first_item_end, delay=0.05)
+    partial_timeouts = llm_reranker.get_ranker_stats().fallback_reasons["partial_timeout"]
+
+    with patch.object(llm_reranker.settings, "RERANK_TIMEOUT_SECONDS", 0.08):
+        results = rerank()
+
+    assert [p["id"] for p in results] == [3, 1, 2]
+    assert [p["rank"] for p in results] == [1, 2, 3]
+    assert [p["ranker"] for p in results] == ["llm", "fallback", "fallback"]
+    assert len(llm_reranker.rerank_cache.entries) == 0
+    assert llm_reranker.get_ranker_stats().fallback_reasons["partial_timeout"] == partial_timeouts + 1
+
+
+def test_sync_parser_keeps_the_items_before_a_malformed_tail():
+    output_text = LLM_OUTPUT[:LLM_OUTPUT.index("}, {") + 1] + ", // trailing comment"
+
+    assert [item["id"] for item in llm_reranker.parse_reranked_items(output_text)] == ["i3"]
+    assert llm_reranker.parse_reranked_items("not json") is None
+
+
+COMBINED_LLM_OUTPUT = json.dumps({
+    "in_stock": [
+        {"id": "i3", "rank": 1, "rerank_score": 0.9, "reason": "Best match"},
+        {"id": "i1", "rank": 2, "rerank_score": 0.8, "reason": "Good match"},
+        {"id": "i2", "rank": 3, "rerank_score": 0.5, "reason": "Fair match"},
+        {"id": "o1", "rank": 4, "rerank_score": 0.4, "reason": "Wrong section"},
+    ],
+    "out_of_stock": [
+        {"id": "o2", "rank": 1, "rerank_score": 0.7, "reason": "Restocks soon"},
+        {"id": "o1", "rank": 2, "rerank_score": 0.6, "reason": "Similar style"},
+        {"id": "o99", "rank": 3, "rerank_score": 0.5, "reason": "Hallucinated"},
+    ],
+    "query_understanding": "cotton shirt",
+})
+
+
+def rerank_both(query="cotton shirt"):
+    return asyncio.run(
+        llm_reranker.rerank_stock_tables_async(
+            in_stock_results=[dict(p) for p in MOCK_PRODUCTS],
+            out_of_stock_results=[dict(p) for p in MOCK_PRODUCTS[:2]],
+            query=query,
+        )
+    )
+
+
+def test_combined_rerank_uses_one_call_for_both_tables(llm):
+    """Both tables are reranked by one LLM call, each list is matched to its own table"""
+    llm.output_text = COMBINED_LLM_OUTPUT
+
+    in_stock, out_of_stock = rerank_both()
+
+    llm.assert_awaited_once()
+    prompt = llm.await_args.kwargs["input"]
+    assert "IN-STOCK CANDIDATES" in prompt and "OUT-OF-STOCK CANDIDATES" in prompt
+    assert [p["id"] for p in in_stock] == [3, 1, 2]
+    # Each list only matches its own table's aliases: moved and unknown candidates are dropped
+    assert [p["id"] for p in out_of_stock] == [2, 1]
+    assert out_of_stock[0]["reason"] == "Restocks soon"
+
+
+@patch.object(cascade.settings, "RERANK_CASCADE_ENABLED", False)
+def test_combined_rerank_caches_each_table(llm):
+    """Each table's ranking is cached under the per-table key"""
+    llm.output_text = COMBINED_LLM_OUTPUT
+    rerank_both()
+
+    # The per-table rerank of the same candidates is served from the cache
+    llm.output_text = LLM_OUTPUT
+    assert [p["id"] for p in rerank()] == [3, 1, 2]
+    llm.assert_awaited_once()
+
+    # With one table cached, the other one is reranked alone with the per-table prompt
+    llm_reranker.rerank_cache.clear()
+    rerank()
+    in_stock, out_of_stock = rerank_both()
+    assert llm.await_count == 3
+    assert "IN-STOCK CANDIDATES" not in llm.await_args.kwargs["input"]
+
+
+def test_combined_rerank_missing_list_falls_back_to_local_ranker(llm):
+    """A table missing from the output is ranked locally and is not cached"""
+    llm.output_text = json.dumps({"in_stock": json.loads(COMBINED_LLM_OUTPUT)["in_stock"]})
+
+    in_stock, out_of_stock = rerank_both()
+
+    assert [p["id"] for p in in_stock] == [3, 1, 2]
+    assert [p["id"] for p in out_of_stock] == [1, 2]
+    assert in_stock[0]["ranker"] == "llm"
+    assert out_of_stock[0]["ranker"] == "fallback"
+    assert len(llm_reranker.rerank_cache.entries) == 1
+
+
+@patch.object(cascade.settings, "RERANK_CASCADE_ENABLED", False)
+def test_combined_stream_error_only_completes_the_unfinished_list(llm):
+    """A list closed before the stream failed is a complete ranking, only the other one is partial"""
+    # The stream fails after the first item of the out-of-stock list
+    cut = COMBINED_LLM_OUTPUT.index('{"id": "o1"', COMBINED_LLM_OUTPUT.index('"out_of_stock"'))
+
+    async def failing_stream(**kwargs):
+        yield Mock(type="response.output_text.delta", delta=COMBINED_LLM_OUTPUT[:cut])
+        raise RuntimeError("connection reset")
+
+    llm.side_effect = failing_stream
+    partial_errors = llm_reranker.get_ranker_stats().fallback_reasons["partial_error"]
+
+    in_stock, out_of_stock = rerank_both()
+
+    assert [p["id"] for p in in_stock] == [3, 1, 2]
+    assert {p["ranker"] for p in in_stock} == {"llm"}
+    assert [(p["id"], p["ranker"]) for p in out_of_stock] == [(2, "llm"), (1, "fallback")]
+    assert llm_reranker.get_ranker_stats().fallback_reasons["partial_error"] == partial_errors + 1
+    # Only the complete ranking is cached
+    assert len(llm_reranker.rerank_cache.entries) == 1
+
+
+def test_per_table_mode_calls_llm_for_each_table(llm):
+    with patch.object(llm_reranker.settings, "RERANK_MODE", "per_table"), \
+            patch.object(cascade.settings, "RERANK_CASCADE_ENABLED", False):
+        rerank_both()
+
+    assert llm.await_count == 2
+
+
+def ranking(*scores, prefix="i"):
+    """LLM output ranking the candidates in order with the given scores"""
+    return [
+        {"id": f"{prefix}{i}", "rank": i, "rerank_score": score, "reason": "Match"}
+        for i, score in enumerate(scores, start=1)
+    ]
+
+
+FAST_MODEL = llm_reranker.settings.RERANKER_MODEL_NAME
+LARGE_MODEL = llm_reranker.settings.RERANKER_ESCALATION_MODEL_NAME
+
+
+def called_models(llm):
+    return [call.kwargs["model"] for call in llm.await_args_list]
+
+
+def test_confident_fast_ranking_is_kept(llm):
+    """The fast model's ranking is used and cached when its scores are confident"""
+    fast_calls = llm_reranker.get_cascade_stats().calls[cascade.FAST_TIER]
+
+    assert [p["id"] for p in rerank()] == [3, 1, 2]
+    rerank()
+
+    assert called_models(llm) == [FAST_MODEL]
+    assert llm_reranker.get_cascade_stats().calls[cascade.FAST_TIER] == fast_calls + 1
+
+
+@pytest.mark.parametrize("scores,reason", [
+    ((0.3, 0.2, 0.1), "low_confidence"),
+    ((0.9, 0.89, 0.5), "close_tie"),
+])
+def test_unsure_fast_ranking_is_escalated(llm, scores, reason):
+    """A low or tied fast ranking is redone by the larger model, whose ranking is cached"""
+    llm.output_by_model = {FAST_MODEL: json.dumps({"reranked_results": ranking(*scores)})}
+    escalations = llm_reranker.get_cascade_stats().escalations[reason]
+
+    results = rerank()
+    rerank()
+
+    assert [p["id"] for p in results] == [3, 1, 2]
+    assert called_models(llm) == [FAST_MODEL, LARGE_MODEL]
+    assert llm_reranker.get_cascade_stats().escalations[reason] == escalations + 1
+
+
+def test_each_tier_compacts_the_candidates_with_its_model(llm):
+    llm.output_by_model = {FAST_MODEL: json.dumps({"reranked_results": ranking(0.3, 0.2, 0.1)})}
+
+    with patch.object(llm_reranker, "compact_candidates", wraps=llm_reranker.compact_candidates) as compact:
+        rerank()
+
+    assert [call.kwargs["model"] for call in compact.call_args_list] == [FAST_MODEL, LARGE_MODEL]
+
+
+def test_high_value_traffic_goes_to_the_larger_model(llm):
+    asyncio.run(
+        llm_reranker.rerank_search_results_async(
+            [dict(p) for p in MOCK_PRODUCTS], "in_stock", "cotton shirt", high_value=True
+        )
+    )
+
+    assert called_models(llm) == [LARGE_MODEL]
+
+
+def test_failed_escalation_keeps_the_fast_ranking(llm):
+    """The larger model missing the deadline leaves the fast ranking, which is not cached"""
+    fast_output = json.dumps({"reranked_results": ranking(0.3, 0.2, 0.1)})
+
+    async def slow_large_model(**kwargs):
+        if kwargs["model"] == LARGE_MODEL:
+            await asyncio.sleep(1)
+        return stream_output(fast_output)
+
+    llm.side_effect = slow_large_model
+    failures = llm_reranker.get_cascade_stats().escalation_failures
+
+    with patch.object(llm_reranker.settings, "RERANK_TIMEOUT_SECONDS", 0.1):
+        results = rerank()
+
+    assert [p["id"] for p in results] == [1, 2, 3]
+    assert {p["ranker"] for p in results} == {"llm"}
+    assert len(llm_reranker.rerank_cache.entries) == 0
+    assert llm_reranker.get_cascade_stats().escalation_failures == failures + 1
+
+
+def test_empty_escalation_keeps_the_fast_ranking(llm):
+    """A larger model returning no valid item leaves the fast ranking instead of the local ranker"""
+    llm.output_by_model = {
+        FAST_MODEL: json.dumps({"reranked_results": ranking(0.3, 0.2, 0.1)}),
+        LARGE_MODEL: json.dumps({"reranked_results": ranking(0.9, prefix="x")}),
+    }
+    failures = llm_reranker.get_cascade_stats().escalation_failures
+
+    results = rerank()
+
+    assert called_models(llm) == [FAST_MODEL, LARGE_MODEL]
+    assert [p["id"] for p in results] == [1, 2, 3]
+    assert {p["ranker"] for p in results} == {"llm"}
+    assert len(llm_reranker.rerank_cache.entries) == 0
+    assert llm_reranker.get_cascade_stats().escalation_failures == failures + 1
+
+
+def test_sync_empty_escalation_keeps_the_fast_ranking():
+    outputs = {
+        FAST_MODEL: json.dumps({"reranked_results": ranking(0.3, 0.2, 0.1)}),
+        LARGE_MODEL: "not json",
+    }
+    client = Mock()
+    client.responses.create.side_effect = lambda **kwargs: Mock(output_text=outputs[kwargs["model"]], usage=None)
+    llm_reranker.rerank_cache.clear()
+
+    with patch.object(llm_reranker, "get_openai_client", return_value=client):
+        results = llm_reranker.rerank_search_results([dict(p) for p in MOCK_PRODUCTS], "in_stock", "cotton shirt")
+
+    assert [call.kwargs["model"] for call in client.responses.create.call_args_list] == [FAST_MODEL, LARGE_MODEL]
+    assert [p["id"] for p in results] == [1, 2, 3]
+    assert {p["ranker"] for p in results} == {"llm"}
+
+
+def test_combined_empty_escalation_keeps_the_fast_ranking(llm):
+    llm.output_by_model = {
+        FAST_MODEL: json.dumps({
+            "in_stock": ranking(0.9, 0.7, 0.5),
+            "out_of_stock": ranking(0.2, 0.1, prefix="o"),
+        }),
+        LARGE_MODEL: json.dumps({"out_of_stock": []}),
+    }
+
+    in_stock, out_of_stock = rerank_both()
+
+    assert called_models(llm) == [FAST_MODEL, LARGE_MODEL]
+    assert [p["id"] for p in out_of_stock] == [1, 2]
+    assert {p["ranker"] for p in in_stock + out_of_stock} == {"llm"}
+    # Only the confident fast ranking is cached
+    assert len(llm_reranker.rerank_cache.entries) == 1
+
+
+def test_combined_rerank_escalates_only_the_unsure_table(llm):
+    llm.output_by_model = {FAST_MODEL: json.dumps({
+        "in_stock": ranking(0.9, 0.7, 0.5),
+        "out_of_stock": ranking(0.2, 0.1, prefix="o"),
+    })}
+    llm.output_text = json.dumps({"out_of_stock": [
+        {"id": "o2", "rank": 1, "rerank_score": 0.8, "reason": "Match"},
+        {"id": "o1", "rank": 2, "rerank_score": 0.6, "reason": "Match"},
+    ]})
+
+    in_stock, out_of_stock = rerank_both()
+
+    assert called_models(llm) == [FAST_MODEL, LARGE_MODEL]
+    escalation_prompt = llm.await_args.kwargs["input"]
+    assert "OUT-OF-STOCK CANDIDATES" in escalation_prompt
+    assert "IN-STOCK CANDIDATES" not in escalation_prompt
+    assert [p["id"] for p in in_stock] == [1, 2, 3]
+    assert [p["id"] for p in out_of_stock] == [2, 1]
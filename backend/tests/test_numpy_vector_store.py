@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.database.numpy_vector_store import NumpyVectorStore
+from app.config.settings import Settings
+
+settings = Settings()
+
+DIMENSION = 8
+
+
+def make_products(num_products: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    embeddings = rng.standard_normal((num_products, DIMENSION)).astype(np.float32)
+    return pd.DataFrame({
+        "title": [f"Product {i}" for i in range(num_products)],
+        "average_rating": [4.5] * num_products,
+        "rating_number": [10] * num_products,
+        "features": [["feature"]] * num_products,
+        "description": [f"Description {i}" for i in range(num_products)],
+        "price": [np.nan if i % 2 else 19.99 for i in range(num_products)],
+        "images": [[{"large": "image.jpg"}]] * num_products,
+        "store": ["Store"] * num_products,
+        "categories": ["Fashion"] * num_products,
+        "details": [{"color": "red"}] * num_products,
+        "embedding": list(embeddings),
+        "embedding_short": list(embeddings[:, :4]),
+        "inventory_status": ["in_stock" if i % 2 == 0 else "out_of_stock" for i in range(num_products)],
+    })
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = NumpyVectorStore(str(tmp_path), embedding_dimension=DIMENSION, initial_capacity=4)
+    store.initialize_database()
+    return store
+
+
+def test_search_matches_brute_force(store):
+    df = make_products(50)
+    store.insert_products_information(df)
+
+    in_stock = df[df["inventory_status"] == "in_stock"]
+    vectors = np.stack(in_stock["embedding"].to_list())
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    query = np.random.default_rng(1).standard_normal(DIMENSION)
+
+    results = store.search_products(query.tolist(), settings.IN_STOCK_PRODUCTS_TABLE_NAME, top_k=5)
+
+    expected = np.argsort(-(vectors @ (query / np.linalg.norm(query))))[:5]
+    assert [r["title"] for r in results] == in_stock["title"].iloc[expected].tolist()
+    assert results[0]["similarity"] >= results[-1]["similarity"]
+    assert results[0]["thumbnail"] == "image.jpg"
+    assert results[0]["feature_summary"] == "feature"
+    assert "details" not in results[0]
+
+    product = store.get_product(results[0]["id"], settings.IN_STOCK_PRODUCTS_TABLE_NAME)
+    assert product["title"] == results[0]["title"]
+    assert product["details"] == {"color": "red"}
+    assert store.get_product(1000, settings.IN_STOCK_PRODUCTS_TABLE_NAME) is None
+
+
+def test_duplicates_are_skipped_and_rows_persist(store, tmp_path):
+    df = make_products(10)
+    store.insert_products_information(df)
+    store.insert_products_information(df)
+
+    reopened = NumpyVectorStore(str(tmp_path), embedding_dimension=DIMENSION)
+    results = reopened.search_products(
+        df["embedding"].iloc[1].tolist(), settings.OUT_OF_STOCK_PRODUCTS_TABLE_NAME, top_k=100
+    )
+
+    assert len(results) == 5
+    assert results[0]["title"] == "Product 1"
+    assert results[0]["similarity"] == pytest.approx(1.0, abs=1e-5)
+    assert results[0]["price"] is None
+
+
+def test_batch_search_matches_single_searches(store):
+    store.insert_products_information(make_products(30))
+    queries = np.random.default_rng(2).standard_normal((3, DIMENSION)).tolist()
+
+    batch = store.search_products_batch(queries, settings.IN_STOCK_PRODUCTS_TABLE_NAME, top_k=4)
+
+    for query, results in zip(queries, batch):
+        single = store.search_products(query, settings.IN_STOCK_PRODUCTS_TABLE_NAME, top_k=4)
+        assert [r["id"] for r in results] == [r["id"] for r in single]
+        assert [r["similarity"] for r in results] == pytest.approx([r["similarity"] for r in single])
+
+
+def test_search_empty_table(store):
+    assert store.search_stock_tables([0.1] * DIMENSION, top_k=5) == ([], [])
+
+
+def test_search_applies_filters(store):
+    df = make_products(20)
+    df["store"] = ["Nike" if i % 4 == 0 else "Adidas" for i in range(20)]
+    store.insert_products_information(df)
+
+    results = store.search_products(
+        [0.1] * DIMENSION, settings.IN_STOCK_PRODUCTS_TABLE_NAME, top_k=10,
+        filters={"stores": ["nike"], "min_price": 10.0},
+    )
+
+    assert len(results) == 5
+    assert {r["title"] for r in results} == {f"Product {i}" for i in range(0, 20, 4)}
+    assert store.search_products(
+        [0.1] * DIMENSION, settings.IN_STOCK_PRODUCTS_TABLE_NAME, top_k=10,
+        filters={"details": {"color": "blue"}},
+    ) == []
+
+
+def test_lexical_search_ranks_matching_terms(store):
+    store.insert_products_information(make_products(10))
+
+    in_stock, out_of_stock = store.search_stock_tables_lexical("product 3", top_k=3)
+
+    assert out_of_stock[0]["title"] == "Product 3"
+    assert out_of_stock[0]["lexical_score"] > out_of_stock[1]["lexical_score"]
+    assert len(in_stock) == 3
+    assert store.search_stock_tables_lexical("sneakers", top_k=3) == ([], [])
@@ -0,0 +1,155 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from app.database import catalog_events
+from app.database.async_vector_db import AsyncVectorDatabase
+from app.database.catalog_events import publish_products_changed
+from app.database.product_cache import ProductCache, attach_search_cards, get_product_cache
+from app.utils.cache import LRUCache
+
+
+def make_card(product_id: int) -> dict:
+    return {
+        "id": product_id,
+        "title": f"Product {product_id}",
+        "average_rating": 4.0,
+        "rating_number": 10,
+        "price": 19.99,
+        "thumbnail": f"{product_id}.jpg",
+        "feature_summary": "Cotton",
+    }
+
+
+def test_lru_evicts_above_max_bytes():
+    """Entries are evicted once their total size exceeds the memory budget"""
+    cache = LRUCache(max_size=100, max_bytes=10, sizeof=len)
+    cache.set("a", "xxxx")
+    cache.set("b", "xxxx")
+    cache.set("c", "xxxx")
+
+    assert cache.get("a") is None
+    assert cache.get("c") == "xxxx"
+    assert cache.stats()["bytes"] == 8
+
+    # A value larger than the budget is not cached
+    cache.set("d", "x" * 11)
+    assert cache.get("d") is None
+    assert cache.delete("b") is True
+    assert cache.stats()["bytes"] == 4
+
+
+def test_lookup_store_and_invalidate():
+    cache = ProductCache(max_size=10)
+    cache.store("in_stock_products", [make_card(1), make_card(2)])
+
+    cards, missing_ids = cache.lookup("in_stock_products", [2, 3, 1, 3])
+    assert set(cards) == {1, 2}
+    assert missing_ids == [3]
+    assert cache.lookup("out_of_stock_products", [1]) == ({}, [1])
+
+    cache.invalidate("in_stock_products", [1])
+    assert cache.lookup("in_stock_products", [1, 2])[1] == [1]
+
+    # A bulk change of a table drops every card of that table
+    cache.store("out_of_stock_products", [make_card(1)])
+    cache.invalidate("in_stock_products", None)
+    assert cache.lookup("in_stock_products", [2]) == ({}, [2])
+    assert set(cache.lookup("out_of_stock_products", [1])[0]) == {1}
+    assert cache.stats()["invalidations"] == 2
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+def test_catalog_changes_invalidate_the_process_cache():
+    cache = get_product_cache()
+    cache.clear()
+    cache.store("in_stock_products", [make_card(1)])
+
+    publish_products_changed("in_stock_products", [1])
+
+    assert cache.lookup("in_stock_products", [1]) == ({}, [1])
+
+
+def test_catalog_changes_are_published_after_the_commit():
+    """The process caches are invalidated once the write is committed, not on a rollback"""
+    from app.database.vector_db import VectorDatabase
+
+    events = []
+    db = VectorDatabase({})
+    db.conn = Mock()
+    db.conn.cursor.return_value.fetchone.return_value = (42,)
+    db.conn.commit.side_effect = lambda: events.append("commit")
+    listener = lambda table_name, product_ids: events.append((table_name, product_ids))
+    catalog_events.subscribe(listener)
+    try:
+        assert db.move_product(7, "in_stock_products", "out_of_stock_products") == 42
+        assert events == ["commit", ("in_stock_products", [7]), ("out_of_stock_products", None)]
+
+        events.clear()
+        db.conn.commit.side_effect = RuntimeError("commit failed")
+        with pytest.raises(RuntimeError):
+            db.move_product(7, "in_stock_products", "out_of_stock_products")
+        assert events == []
+        db.conn.rollback.assert_called_once()
+    finally:
+        catalog_events.unsubscribe(listener)
+
+
+def test_database_initialization_invalidates_both_tables():
+    """Dropping and recreating the tables restarts their ids, the caches must forget them"""
+    from app.database import vector_db
+
+    events = []
+    db = vector_db.VectorDatabase({})
+    db.conn = Mock()
+    db.conn.commit.side_effect = lambda: events.append("commit")
+    listener = lambda table_name, product_ids: events.append((table_name, product_ids))
+    catalog_events.subscribe(listener)
+    try:
+        with patch.object(vector_db, "register_vector_types"):
+            db.initialize_database()
+    finally:
+        catalog_events.unsubscribe(listener)
+
+    assert events == ["commit", ("in_stock_products", None), ("out_of_stock_products", None)]
+    notified = [
+        call.args[1][1] for call in db.conn.cursor.return_value.execute.call_args_list
+        if "pg_notify" in call.args[0]
+    ]
+    assert len(notified) == 2
+
+
+def test_attach_search_cards_keeps_hit_order_and_copies():
+    cards = {1: make_card(1), 2: make_card(2)}
+    hits = [{"id": 2, "similarity": 0.9}, {"id": 5, "similarity": 0.8}, {"id": 1, "similarity": 0.7}]
+
+    results = attach_search_cards(hits, cards)
+
+    assert [(r["id"], r["similarity"]) for r in results] == [(2, 0.9), (1, 0.7)]
+    results[0]["reason"] = "Great fit"
+    assert "reason" not in cards[2]
+
+
+def test_cached_cards_skip_the_database():
+    """Only the misses are read, in one query for both tables"""
+    get_product_cache().clear()
+    db = AsyncVectorDatabase({})
+    cursor = Mock()
+    cursor.execute = AsyncMock()
+    cursor.fetchall = AsyncMock(return_value=[
+        ("in_stock_products", *make_card(1).values()),
+        ("out_of_stock_products", *make_card(1).values()),
+    ])
+    ids_by_table = {"in_stock_products": [1], "out_of_stock_products": [1]}
+
+    cards = asyncio.run(db.fetch_search_cards(cursor, ids_by_table))
+    assert cards["in_stock_products"][1]["thumbnail"] == "1.jpg"
+    sql, params = cursor.execute.await_args.args
+    assert sql.count("UNION ALL") == 1
+    assert params == [[1], [1]]
+
+    cursor.execute.reset_mock()
+    cards = asyncio.run(db.fetch_search_cards(cursor, ids_by_table))
+    assert cards["out_of_stock_products"][1]["title"] == "Product 1"
+    cursor.execute.assert_not_awaited()
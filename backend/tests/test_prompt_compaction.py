@@ -0,0 +1,99 @@
+import asyncio
+from unittest.mock import patch
+
+from app import main
+from app.ai_utils import prompt_compaction
+from app.ai_utils.prompt_compaction import (
+    compact_candidates,
+    count_tokens,
+    log_token_usage,
+    resolve_aliases,
+    truncate_to_tokens,
+)
+
+
+def make_product(product_id: int, **fields) -> dict:
+    return {
+        "id": product_id,
+        "title": f"Product {product_id}",
+        "average_rating": 4.5,
+        "rating_number": 1200,
+        "price": 30.0,
+        "feature_summary": "Cotton | Machine wash",
+        "similarity": 0.8512,
+        **fields,
+    }
+
+
+def test_candidates_are_tab_separated_rows_with_aliases():
+    candidates, aliases = compact_candidates([make_product(42), make_product(7)], "out_of_stock")
+
+    rows = candidates.split("\n")
+    assert rows[0] == "o1\t30\t4.5\t1200\t0.85\tProduct 42\tCotton | Machine wash"
+    assert rows[1].startswith("o2\t")
+    assert aliases == {"o1": 42, "o2": 7}
+
+
+def test_verbose_products_fit_the_token_budget():
+    product = make_product(
+        1,
+        title="Women's Ultra Soft Lightweight Breathable Linen Button Down Shirt\twith Pockets " * 5,
+        feature_summary="100% Linen, relaxed fit, curved hem, chest pocket, machine washable " * 10,
+        price=None,
+    )
+
+    candidates, _ = compact_candidates([product], "in_stock", token_budget=40)
+
+    assert count_tokens(candidates) <= 40
+    alias, price, rating, reviews, similarity, title, features = candidates.split("\t")
+    assert price == "-"
+    assert title.startswith("Women's Ultra Soft")
+    assert "\n" not in candidates
+
+
+def test_truncate_keeps_short_texts():
+    assert truncate_to_tokens("linen shirt", 10) == "linen shirt"
+    assert truncate_to_tokens("linen shirt", 0) == ""
+    assert count_tokens(truncate_to_tokens("word " * 100, 5)) <= 5
+
+
+def test_resolve_aliases_drops_unknown_refs():
+    reranked = resolve_aliases(
+        [{"id": "I2", "rank": 1}, {"id": "o1", "rank": 2}, {"id": 1, "rank": 3}],
+        {"i1": 42, "i2": 7},
+    )
+
+    assert reranked == [{"id": 7, "rank": 1}]
+
+
+def test_tokens_are_counted_with_the_reranker_model_by_default():
+    with patch.object(prompt_compaction, "get_encoding", return_value=None) as get_encoding:
+        assert count_tokens("12345678") == 2
+        truncate_to_tokens("12345678", 1)
+        log_token_usage(None, "prompt", "output", 0.5, "in_stock", model="escalation-model")
+
+    models = [call.args[0] for call in get_encoding.call_args_list]
+    assert models == [prompt_compaction.settings.RERANKER_MODEL_NAME] * 2 + ["escalation-model"] * 2
+
+
+def test_lifespan_loads_the_reranker_tokenizers_off_the_event_loop():
+    async def run():
+        async with main.lifespan(main.app):
+            pass
+
+    to_thread_calls = []
+
+    async def to_thread(function, *args):
+        to_thread_calls.append((function, *args))
+        return function(*args)
+
+    with patch.object(main.settings, "VECTOR_STORE_BACKEND", "numpy"), \
+            patch("app.main.asyncio.to_thread", side_effect=to_thread), \
+            patch("app.main.get_encoding") as get_encoding:
+        asyncio.run(run())
+
+    models = {main.settings.RERANKER_MODEL_NAME, main.settings.RERANKER_ESCALATION_MODEL_NAME}
+    assert {call.args[0] for call in get_encoding.call_args_list} == models
+    # Every tokenizer was loaded in a worker thread
+    assert {model for _, model in to_thread_calls} == models
+    assert len(to_thread_calls) == get_encoding.call_count
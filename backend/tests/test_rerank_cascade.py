@@ -0,0 +1,55 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.ai_utils import rerank_cascade as cascade
+
+
+def items(*scores):
+    return [
+        {"id": i, "rank": i, "rerank_score": score}
+        for i, score in enumerate(scores, start=1)
+    ]
+
+
+@pytest.mark.parametrize("reranked_items,reason", [
+    (items(0.9, 0.7, 0.5), None),
+    ([], "invalid_output"),
+    (items(0.4, 0.3), "low_confidence"),
+    (items(0.9, 0.89, 0.5), "close_tie"),
+    (items(0.9, 0.7, 0.69), "close_tie"),
+    # Ties below the top scores do not matter
+    (items(0.9, 0.7, 0.5, 0.49), None),
+    (items(0.9), None),
+])
+def test_escalation_reason(reranked_items, reason):
+    assert cascade.get_escalation_reason(reranked_items) == reason
+
+
+def test_escalation_reason_follows_the_ranks():
+    """The confidence is read from the rank 1 item, whatever the output order"""
+    assert cascade.get_escalation_reason(items(0.9, 0.8)[::-1]) is None
+
+
+def test_tiers():
+    assert [tier for tier, _ in cascade.get_cascade_tiers()] == [cascade.FAST_TIER, cascade.LARGE_TIER]
+    assert [tier for tier, _ in cascade.get_cascade_tiers(high_value=True)] == [cascade.LARGE_TIER]
+    with patch.object(cascade.settings, "RERANK_CASCADE_ENABLED", False):
+        assert [tier for tier, _ in cascade.get_cascade_tiers()] == [cascade.LARGE_TIER]
+
+
+def test_stats_report_calls_and_latency_percentiles_per_tier():
+    stats = cascade.CascadeStats(max_samples=3)
+    for latency in (0.1, 0.2, 0.3, 0.4):
+        stats.record_call(cascade.FAST_TIER, latency)
+    stats.record_call(cascade.LARGE_TIER, 1.0)
+    stats.record_escalation("close_tie")
+
+    report = stats.stats()
+
+    assert report["tiers"][cascade.FAST_TIER]["calls"] == 4
+    assert report["tiers"][cascade.FAST_TIER]["share"] == 0.8
+    # Only the last 3 latencies are kept
+    assert report["tiers"][cascade.FAST_TIER]["latency_ms"]["p50"] == 300.0
+    assert report["tiers"][cascade.LARGE_TIER]["latency_ms"]["p99"] == 1000.0
+    assert report["escalation_reasons"] == {"close_tie": 1}
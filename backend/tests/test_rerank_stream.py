@@ -0,0 +1,86 @@
+import json
+
+from app.ai_utils.rerank_stream import IncrementalRerankParser, build_rerank_output_format
+
+OUTPUT = json.dumps({
+    "in_stock": [
+        {"id": "i2", "rank": 1, "rerank_score": 0.9, "reason": "Soft {brushed} \"cotton\", runs true to size"},
+        {"id": "i1", "rank": 2, "rerank_score": 0.7, "reason": "Great value [2-pack]"},
+    ],
+    "out_of_stock": [
+        {"id": "o1", "rank": 1, "rerank_score": 0.8, "reason": "Restocks soon"},
+    ],
+})
+
+
+def feed_in_chunks(parser, text, chunk_size):
+    completed = []
+    for i in range(0, len(text), chunk_size):
+        completed.extend(parser.feed(text[i:i + chunk_size]))
+    return completed
+
+
+def test_items_are_completed_whatever_the_chunking():
+    for chunk_size in (1, 3, 17, len(OUTPUT)):
+        parser = IncrementalRerankParser(["in_stock", "out_of_stock"])
+
+        completed = feed_in_chunks(parser, OUTPUT, chunk_size)
+
+        assert [(key, item["id"]) for key, item in completed] == [
+            ("in_stock", "i2"), ("in_stock", "i1"), ("out_of_stock", "o1")
+        ]
+        assert parser.items["in_stock"][0]["reason"] == 'Soft {brushed} "cotton", runs true to size'
+        assert parser.text == OUTPUT
+
+
+def test_an_item_is_completed_by_its_closing_brace():
+    parser = IncrementalRerankParser(["in_stock"])
+    first_item_end = OUTPUT.index("}, {") + 1
+
+    assert parser.feed(OUTPUT[:first_item_end - 1]) == []
+    assert [item["id"] for _, item in parser.feed("}")] == ["i2"]
+
+
+def test_a_list_is_completed_by_its_closing_bracket():
+    parser = IncrementalRerankParser(["in_stock", "out_of_stock"])
+    in_stock_end = OUTPUT.index("]") + 1
+
+    parser.feed(OUTPUT[:in_stock_end - 1])
+    assert parser.completed_lists == []
+    parser.feed(OUTPUT[in_stock_end - 1:-3])
+    assert parser.completed_lists == ["in_stock"]
+    parser.feed(OUTPUT[-3:])
+    assert parser.completed_lists == ["in_stock", "out_of_stock"]
+
+
+def test_invalid_items_are_skipped():
+    parser = IncrementalRerankParser(["reranked_results"])
+    output = json.dumps({"reranked_results": [
+        {"id": "i1", "rank": "first", "rerank_score": 0.9},
+        {"id": "i2", "rank": 2, "rerank_score": 0.7},
+    ]})
+
+    completed = parser.feed(output)
+
+    assert [item["id"] for _, item in completed] == ["i2"]
+    assert completed[0][1]["reason"] == ""
+    assert parser.invalid_items == 1
+
+
+def test_unknown_keys_are_ignored():
+    parser = IncrementalRerankParser(["reranked_results"])
+
+    parser.feed(json.dumps({
+        "notes": [{"id": "x", "rank": 1, "rerank_score": 1.0}],
+        "reranked_results": [{"id": "i1", "rank": 1, "rerank_score": 0.9, "reason": ""}],
+    }))
+
+    assert parser.num_items == 1
+
+
+def test_output_format_requires_every_list():
+    output_format = build_rerank_output_format(["in_stock", "out_of_stock"])
+
+    assert output_format["strict"] is True
+    assert output_format["schema"]["required"] == ["in_stock", "out_of_stock"]
+    assert output_format["schema"]["additionalProperties"] is False
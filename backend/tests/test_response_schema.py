@@ -0,0 +1,88 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from fastapi.testclient import TestClient
+
+from app.schemas import SearchProduct, SearchResponse
+from app.utils.compression import ResponseCompressionMiddleware
+
+
+def make_card(product_id: int, **fields) -> dict:
+    return {
+        "id": product_id,
+        "title": f"Product {product_id}",
+        "average_rating": 4.5,
+        "rating_number": 100,
+        "price": 29.99,
+        "thumbnail": "image1.jpg",
+        "feature_summary": "feature1",
+        "similarity": 0.85,
+        **fields,
+    }
+
+
+def test_malformed_reranker_fields_do_not_fail_the_response():
+    product = SearchProduct.model_validate(make_card(1, rank="2", rerank_score="high", reason="Fits"))
+
+    assert product.rank == 2
+    assert product.rerank_score is None
+    assert product.reason == "Fits"
+
+
+def test_response_drops_fields_outside_the_search_card():
+    response = SearchResponse.model_validate({
+        "recommended_in_stock_products": [make_card(1, description="x" * 1000, table_name="in_stock_products")],
+        "recommended_out_of_stock_products": [],
+    })
+
+    dumped = response.model_dump(mode="json", exclude_none=True)
+    assert dumped["status"] == "success"
+    assert "description" not in dumped["recommended_in_stock_products"][0]
+    assert "table_name" not in dumped["recommended_in_stock_products"][0]
+
+
+def make_compressed_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ResponseCompressionMiddleware, minimum_size=500, excluded_paths=["/stream"])
+
+    @app.get("/search", response_model=SearchResponse, response_class=ORJSONResponse)
+    async def search(products: int = 20):
+        return {
+            "recommended_in_stock_products": [make_card(i) for i in range(products)],
+            "recommended_out_of_stock_products": [],
+        }
+
+    @app.get("/stream")
+    async def stream():
+        return PlainTextResponse("x" * 2000)
+
+    return app
+
+
+def test_large_responses_are_gzipped():
+    client = TestClient(make_compressed_app())
+
+    response = client.get("/search", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["recommended_in_stock_products"]) == 20
+
+    small = client.get("/search", params={"products": 1}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+def test_excluded_paths_are_not_compressed():
+    client = TestClient(make_compressed_app())
+
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.text == "x" * 2000
+
+
+def test_gzip_shrinks_the_search_cards():
+    body = ORJSONResponse(content=SearchResponse.model_validate({
+        "recommended_in_stock_products": [make_card(i) for i in range(20)],
+        "recommended_out_of_stock_products": [make_card(i) for i in range(20)],
+    }).model_dump(mode="json")).body
+
+    assert len(gzip.compress(body)) < len(body) / 3
@@ -0,0 +1,95 @@
+from unittest.mock import patch
+
+import pytest
+from pydantic import ValidationError
+
+from app.database.vector_db import (
+    build_filter_count_query,
+    build_filter_predicates,
+    build_search_params,
+    build_search_settings,
+    build_stock_tables_search_query,
+    select_exact_tables,
+    settings,
+)
+from app.schemas import QueryValidationBase, SearchFilters
+
+
+def test_filter_predicates_bind_every_value():
+    predicates, params = build_filter_predicates({
+        "min_price": 10.0,
+        "max_price": 50.0,
+        "min_average_rating": 4.0,
+        "stores": ["Nike", "ADIDAS"],
+        "categories": ["Shoes"],
+        "details": {"color": "red"},
+    })
+
+    assert predicates.split(" AND ") == [
+        "price >= %(filter_min_price)s",
+        "price <= %(filter_max_price)s",
+        "average_rating >= %(filter_min_average_rating)s",
+        "lower(store) = ANY(%(filter_stores)s)",
+        "(CASE WHEN left(categories, 1) = '[' THEN categories::jsonb END) ?| %(filter_categories)s",
+        "details @> %(filter_details)s",
+    ]
+    assert params["filter_stores"] == ["nike", "adidas"]
+    assert params["filter_details"].obj == {"color": "red"}
+    assert build_filter_predicates(None) == ("", {})
+
+
+def test_filtered_query_applies_predicates_inside_each_branch():
+    predicates, _ = build_filter_predicates({"min_price": 10.0})
+    sql = build_stock_tables_search_query("in_stock_products", "out_of_stock_products", predicates)
+    params = build_search_params([0.1] * settings.EMBEDDING_DIMENSION, top_k=10, filters={"min_price": 10.0})
+
+    assert sql.count("WHERE\n            price >= %(filter_min_price)s") == 2
+    assert params["filter_min_price"] == 10.0
+
+    # Two-stage: the filters apply to the ANN candidates
+    with patch.object(settings, "TWO_STAGE_SEARCH_ENABLED", True):
+        sql = build_stock_tables_search_query("in_stock_products", "out_of_stock_products", predicates)
+    assert sql.count("WHERE price >= %(filter_min_price)s\n            ORDER BY embedding_short") == 2
+
+
+def test_selective_tables_use_an_exact_scan():
+    predicates, _ = build_filter_predicates({"stores": ["Nike"]})
+    with patch.object(settings, "FILTERED_SEARCH_EXACT_THRESHOLD", 100), \
+            patch.object(settings, "TWO_STAGE_SEARCH_ENABLED", True):
+        exact_tables = select_exact_tables(["in_stock_products", "out_of_stock_products"], (101, 12))
+        sql = build_stock_tables_search_query(
+            "in_stock_products", "out_of_stock_products", predicates, exact_tables
+        )
+
+    assert exact_tables == ("out_of_stock_products",)
+    in_stock_sql, out_of_stock_sql = sql.split("UNION ALL")
+    assert "embedding_short" in in_stock_sql
+    assert "embedding_short" not in out_of_stock_sql
+    assert "(embedding <=> %(embedding)s) + 0" in out_of_stock_sql
+    assert build_filter_count_query(["in_stock_products"], predicates).count("LIMIT %(filter_count_limit)s") == 1
+
+
+def test_filtered_search_settings_enable_iterative_scan_or_overfetch():
+    with patch.object(settings, "VECTOR_INDEX_TYPE", "hnsw"), \
+            patch.object(settings, "FILTERED_SEARCH_ITERATIVE_SCAN", "strict_order"):
+        statements = build_search_settings(top_k=10, ef_search=40, filtered=True)
+    assert statements[1] == ("SELECT set_config('hnsw.iterative_scan', %s, true)", ("strict_order",))
+
+    with patch.object(settings, "VECTOR_INDEX_TYPE", "ivfflat"), \
+            patch.object(settings, "FILTERED_SEARCH_ITERATIVE_SCAN", "off"), \
+            patch.object(settings, "FILTERED_SEARCH_OVERFETCH_FACTOR", 4):
+        assert build_search_settings(top_k=10, probes=10, filtered=True) == [
+            ("SELECT set_config('ivfflat.probes', %s, true)", ("40",))
+        ]
+
+
+def test_search_filters_validation():
+    query = QueryValidationBase(query="red dress", filters={"stores": [" Nike ", ""], "max_price": 20})
+    assert query.filters.stores == ["Nike"]
+
+    with pytest.raises(ValidationError):
+        SearchFilters(min_price=50, max_price=10)
+    with pytest.raises(ValidationError):
+        SearchFilters(min_average_rating=6)
+    with pytest.raises(ValidationError):
+        SearchFilters(min_rating_number=-1)
@@ -0,0 +1,122 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, patch
+
+from app.main import app
+from app.deps import get_async_db
+from app.ai_utils.semantic_cache import get_semantic_cache
+from app.ai_utils.page_cache import SearchPageCache, decode_cursor, encode_cursor, get_search_page_cache
+from app.database.catalog_events import publish_products_changed
+
+
+def make_hits(count: int, first_id: int = 1) -> list[dict]:
+    return [
+        {"id": i, "title": f"Product {i}", "feature_summary": "", "similarity": 1 - i / 100}
+        for i in range(first_id, first_id + count)
+    ]
+
+
+def test_cursor_round_trip_and_malformed_cursors():
+    assert decode_cursor(encode_cursor("abc", 20)) == ("abc", 20)
+
+    for cursor in ["not base64 !", encode_cursor("abc", -1), "eyJiIjoxfQ"]:
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+
+def test_pages_are_sliced_from_the_buffer():
+    cache = SearchPageCache(max_size=10)
+    cursor = cache.store(make_hits(7), make_hits(4, first_id=100), page_size=3)
+
+    in_stock, out_of_stock, cursor = cache.get_page(cursor)
+    assert [p["id"] for p in in_stock] == [4, 5, 6]
+    assert [p["id"] for p in out_of_stock] == [103]
+
+    in_stock, out_of_stock, cursor = cache.get_page(cursor)
+    assert [p["id"] for p in in_stock] == [7]
+    assert out_of_stock == []
+    assert cursor is None
+
+    # A search whose results fit in the first page has no next page
+    assert cache.store(make_hits(3), [], page_size=3) is None
+
+
+def test_changed_products_drop_their_buffers():
+    cache = SearchPageCache(max_size=10)
+    cursor = cache.store(make_hits(5), [], page_size=2)
+    other_cursor = cache.store(make_hits(5, first_id=50), [], page_size=2)
+
+    cache.invalidate("in_stock_products", [3])
+    assert cache.get_page(cursor) is None
+    assert cache.get_page(other_cursor) is not None
+
+    # Every buffered search covers both stock tables, other tables leave them alone
+    cache.invalidate("archived_products", None)
+    assert cache.get_page(other_cursor) is not None
+    cache.invalidate("out_of_stock_products", None)
+    assert cache.get_page(other_cursor) is None
+    assert cache.stats()["invalidations"] == 2
+
+
+@pytest.fixture
+def client():
+    db = AsyncMock()
+    db.search_stock_tables.return_value = (make_hits(25), make_hits(12, first_id=100))
+    db.search_stock_tables_lexical.return_value = ([], [])
+    embedding = AsyncMock(return_value=[0.1] * 1536)
+    rerank = AsyncMock(side_effect=lambda in_stock_results, out_of_stock_results, query, high_value=False: (
+        in_stock_results, out_of_stock_results
+    ))
+
+    get_search_page_cache().clear()
+    get_semantic_cache().clear()
+    app.dependency_overrides[get_async_db] = lambda: db
+    with patch("app.main.get_embedding_async", embedding), patch(
+        "app.main.rerank_stock_tables_async", rerank
+    ):
+        yield TestClient(app), db, embedding, rerank
+    app.dependency_overrides.clear()
+
+
+def test_later_pages_skip_embedding_search_and_rerank(client):
+    test_client, db, embedding, rerank = client
+
+    first = test_client.post(
+        "/search", json={"query": "linen shirt", "top_k": 10, "paginate": True}
+    ).json()
+    assert [p["id"] for p in first["recommended_in_stock_products"]] == list(range(1, 11))
+    assert db.search_stock_tables.await_args.kwargs["top_k"] >= 25
+    # Only the first page is sent to the reranker
+    assert len(rerank.await_args.kwargs["in_stock_results"]) == 10
+
+    second = test_client.post("/search/page", json={"cursor": first["next_cursor"]}).json()
+    assert [p["id"] for p in second["recommended_in_stock_products"]] == list(range(11, 21))
+    assert [p["id"] for p in second["recommended_out_of_stock_products"]] == [110, 111]
+    assert second["recommended_in_stock_products"][0]["stock_status"] == "in_stock"
+
+    third = test_client.post("/search/page", json={"cursor": second["next_cursor"]}).json()
+    assert [p["id"] for p in third["recommended_in_stock_products"]] == list(range(21, 26))
+    assert third["next_cursor"] is None
+
+    assert embedding.await_count == 1
+    assert db.search_stock_tables.await_count == 1
+    assert rerank.await_count == 1
+
+
+def test_expired_and_invalid_cursors(client):
+    test_client, db, embedding, rerank = client
+
+    first = test_client.post("/search", json={"query": "linen shirt", "paginate": True}).json()
+    publish_products_changed("in_stock_products", [15])
+
+    assert test_client.post("/search/page", json={"cursor": first["next_cursor"]}).status_code == 410
+    assert test_client.post("/search/page", json={"cursor": "garbage"}).status_code == 422
+
+
+def test_unpaginated_search_has_no_cursor(client):
+    test_client, db, embedding, rerank = client
+
+    response = test_client.post("/search", json={"query": "linen shirt"}).json()
+    assert response["next_cursor"] is None
+    assert len(response["recommended_in_stock_products"]) == 10
+    assert get_search_page_cache().stats()["size"] == 0
@@ -0,0 +1,262 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, patch
+
+from app import main
+from app.main import app
+from app.deps import get_async_db
+from app.ai_utils.semantic_cache import get_semantic_cache
+from app.utils.single_flight import get_search_single_flight
+
+# Simulated latency of a single database query and a single LLM call
+DB_DELAY = 0.2
+LLM_DELAY = 0.3
+
+MOCK_PRODUCT = {
+    "id": 1,
+    "title": "Test Product",
+    "average_rating": 4.5,
+    "rating_number": 100,
+    "price": 29.99,
+    "thumbnail": "image1.jpg",
+    "feature_summary": "feature1",
+    "similarity": 0.85,
+}
+
+
+class SlowAsyncDatabase:
+    """Async database double whose searches take DB_DELAY seconds"""
+
+    def __init__(self):
+        self.calls = []
+        self.lexical_calls = []
+
+    async def search_products(self, query_embedding, table_name, top_k=10, filters=None):
+        self.calls.append(table_name)
+        await asyncio.sleep(DB_DELAY)
+        return [dict(MOCK_PRODUCT)]
+
+    async def search_stock_tables_batch(self, query_embeddings, top_k=10):
+        self.calls.append(("batch", len(query_embeddings)))
+        await asyncio.sleep(DB_DELAY)
+        return (
+            [[dict(MOCK_PRODUCT)] for _ in query_embeddings],
+            [[dict(MOCK_PRODUCT)] for _ in query_embeddings],
+        )
+
+    async def search_stock_tables(self, query_embedding, top_k=10, filters=None):
+        return await asyncio.gather(
+            self.search_products(query_embedding, "in_stock_products", top_k, filters),
+            self.search_products(query_embedding, "out_of_stock_products", top_k, filters),
+        )
+
+    async def get_product(self, product_id, table_name):
+        if product_id != MOCK_PRODUCT["id"]:
+            return None
+        return {**MOCK_PRODUCT, "features": ["feature1"], "details": {"size": "M"}}
+
+    async def search_stock_tables_lexical(self, query_text, top_k=10, filters=None):
+        self.lexical_calls.append(query_text)
+        await asyncio.sleep(DB_DELAY)
+        lexical_product = {**MOCK_PRODUCT, "id": 2, "similarity": None, "lexical_score": 0.5}
+        return [dict(lexical_product)], [dict(lexical_product)]
+
+
+async def slow_embedding(text):
+    return [0.1] * 1536
+
+
+async def slow_rerank(products_search_results, stock_status, query, on_item=None, high_value=False):
+    await asyncio.sleep(LLM_DELAY)
+    for product in products_search_results:
+        if on_item is not None:
+            on_item(product)
+    return products_search_results
+
+
+async def slow_combined_rerank(in_stock_results, out_of_stock_results, query, high_value=False):
+    await asyncio.sleep(LLM_DELAY)
+    return in_stock_results, out_of_stock_results
+
+
+@pytest.fixture
+def client():
+    db = SlowAsyncDatabase()
+    get_semantic_cache().clear()
+    app.dependency_overrides[get_async_db] = lambda: db
+    with patch.object(main.settings, "HYBRID_SEARCH_ENABLED", True), patch(
+        "app.main.get_embedding_async", side_effect=slow_embedding
+    ), patch(
+        "app.main.rerank_search_results_async", side_effect=slow_rerank
+    ), patch("app.main.rerank_stock_tables_async", side_effect=slow_combined_rerank):
+        yield TestClient(app), db
+    app.dependency_overrides.clear()
+
+
+def test_search_runs_tables_and_reranks_concurrently(client):
+    """Both table searches overlap and both tables are reranked by one call"""
+    test_client, db = client
+
+    start = time.perf_counter()
+    response = test_client.post("/search", json={"query": "summer beach dress"})
+    elapsed = time.perf_counter() - start
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["recommended_in_stock_products"][0]["stock_status"] == "in_stock"
+    assert data["recommended_out_of_stock_products"][0]["stock_status"] == "out_of_stock"
+    assert sorted(db.calls) == ["in_stock_products", "out_of_stock_products"]
+
+    # Sequential execution would take 2 * DB_DELAY + 2 * LLM_DELAY, plus DB_DELAY for the full-text search
+    assert elapsed < 2 * DB_DELAY + 2 * LLM_DELAY - 0.1
+    assert db.lexical_calls == ["summer beach dress"]
+
+
+def test_hybrid_search_fuses_both_retrievers_and_reports_latency(client):
+    """Vector and full-text hits are fused per table, each stage reports its latency"""
+    test_client, db = client
+
+    response = test_client.post("/search", json={"query": "nike air max 90"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert {p["id"] for p in data["recommended_in_stock_products"]} == {1, 2}
+    assert all("fusion_score" in p for p in data["recommended_in_stock_products"])
+    assert set(data["latency_ms"]) == {"embedding", "vector_search", "lexical_search", "fusion", "rerank"}
+    # Each retriever is timed on its own
+    assert data["latency_ms"]["vector_search"] >= DB_DELAY * 1000
+    assert data["latency_ms"]["lexical_search"] >= DB_DELAY * 1000
+
+
+def test_high_priority_search_is_reranked_by_the_larger_model(client):
+    """A high-priority request skips the fast reranker tier and its response is cached apart"""
+    test_client, db = client
+
+    with patch("app.main.rerank_stock_tables_async", side_effect=slow_combined_rerank) as rerank:
+        test_client.post("/search", json={"query": "linen shirt"})
+        test_client.post("/search", json={"query": "linen shirt", "priority": "high"})
+
+    assert [call.kwargs["high_value"] for call in rerank.call_args_list] == [False, True]
+    assert test_client.post("/search", json={"query": "linen shirt", "priority": "urgent"}).status_code == 422
+
+
+def test_identical_concurrent_searches_are_coalesced(client):
+    """Duplicates of an in-flight search share its embedding, retrieval and rerank"""
+    _, db = client
+    coalesced = get_search_single_flight().stats()["coalesced"]
+    requests = [{"query": "Linen  Shirt"}, {"query": "linen shirt"}, {"query": "linen shirt"},
+                {"query": "linen shirt", "top_k": 5}]
+
+    async def search_concurrently():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http_client:
+            return await asyncio.gather(*[http_client.post("/search", json=r) for r in requests])
+
+    with patch("app.main.get_embedding_async", side_effect=slow_embedding) as embedding:
+        responses = asyncio.run(search_concurrently())
+
+    assert [response.status_code for response in responses] == [200] * 4
+    assert responses[0].json() == responses[1].json() == responses[2].json()
+    # The other top_k is a different search
+    assert embedding.call_count == 2
+    assert sorted(db.calls) == ["in_stock_products"] * 2 + ["out_of_stock_products"] * 2
+    assert get_search_single_flight().stats()["coalesced"] == coalesced + 2
+
+
+def test_zero_fusion_weight_skips_its_retriever(client):
+    """A request weighting the full-text search at 0 only runs the vector search"""
+    test_client, db = client
+
+    response = test_client.post(
+        "/search", json={"query": "linen shirt", "fusion": {"vector": 1, "lexical": 0}}
+    )
+
+    assert response.status_code == 200
+    assert db.lexical_calls == []
+    assert [p["id"] for p in response.json()["recommended_in_stock_products"]] == [1]
+    assert "lexical_search" not in response.json()["latency_ms"]
+
+
+@pytest.mark.parametrize("fusion", [None, {"vector": 0, "lexical": 1}])
+def test_failed_full_text_search_falls_back_to_the_vector_search(client, fusion):
+    """A table without the search_tsv column degrades the hybrid search to the vector results"""
+    test_client, db = client
+    body = {"query": "linen shirt"} if fusion is None else {"query": "linen shirt", "fusion": fusion}
+
+    with patch.object(db, "search_stock_tables_lexical", side_effect=RuntimeError("no search_tsv")):
+        response = test_client.post("/search", json=body)
+
+    assert response.status_code == 200
+    assert [p["id"] for p in response.json()["recommended_in_stock_products"]] == [1]
+    assert "fusion" not in response.json()["latency_ms"]
+
+
+def test_search_is_vector_only_unless_hybrid_is_enabled(client):
+    test_client, db = client
+
+    with patch.object(main.settings, "HYBRID_SEARCH_ENABLED", False):
+        response = test_client.post("/search", json={"query": "linen shirt"})
+
+    assert response.status_code == 200
+    assert db.lexical_calls == []
+    assert set(response.json()["latency_ms"]) == {"embedding", "vector_search", "rerank"}
+
+
+def test_search_stream_emits_hits_before_reranks(client):
+    """Raw hits are streamed first, then each table's ranked products and reranked list"""
+    test_client, db = client
+
+    with test_client.stream("POST", "/search/stream", json={"query": "linen shirt"}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        events = [json.loads(line) for line in response.iter_lines() if line]
+
+    assert events[0]["event"] == "search_results"
+    assert events[-1]["event"] == "done"
+    assert events[0]["recommended_in_stock_products"][0]["stock_status"] == "in_stock"
+    for stock_status in ("in_stock", "out_of_stock"):
+        table_events = [e["event"] for e in events[1:-1] if e["stock_status"] == stock_status]
+        # Each ranked product is streamed before its table's complete list
+        num_products = len(events[0][f"recommended_{stock_status}_products"])
+        assert table_events == ["ranked_item"] * num_products + ["reranked"]
+
+
+def test_batch_search_isolates_invalid_queries(client):
+    """All valid queries are embedded and searched together, invalid ones fail alone"""
+    test_client, db = client
+    queries = ["linen shirt", "", "red boots", "12345"]
+
+    with patch("app.main.batch_embedding_async", new=AsyncMock(
+        side_effect=lambda texts: [[0.1] * 1536 for _ in texts]
+    )) as batch_embedding:
+        response = test_client.post(
+            "/search/batch", json={"queries": queries, "rerank": True, "max_concurrency": 2}
+        )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["query"] for r in results] == queries
+    assert [r["status"] for r in results] == ["success", "error", "success", "error"]
+    assert results[0]["recommended_in_stock_products"][0]["stock_status"] == "in_stock"
+
+    batch_embedding.assert_awaited_once_with(["linen shirt", "red boots"])
+    assert db.calls == [("batch", 2)]
+
+
+def test_product_details_are_served_on_demand(client):
+    """Search results are search cards, full details come from /products"""
+    test_client, db = client
+
+    response = test_client.get("/products/in_stock/1")
+    assert response.status_code == 200
+    product = response.json()["product"]
+    assert product["details"] == {"size": "M"}
+    assert product["stock_status"] == "in_stock"
+
+    assert test_client.get("/products/in_stock/99").status_code == 404
+    assert test_client.get("/products/discontinued/1").status_code == 422
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from app.ai_utils.semantic_cache import SemanticCache, build_search_scope
+from app.database import catalog_events
+
+DIMENSION = 8
+SCOPE = build_search_scope(top_k=10)
+
+
+def unit_vector(index: int, noise: float = 0.0) -> list[float]:
+    """Unit vector along an axis, optionally tilted towards the next axis"""
+    vector = np.zeros(DIMENSION, dtype=np.float32)
+    vector[index] = 1.0
+    vector[(index + 1) % DIMENSION] = noise
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+@pytest.fixture
+def cache():
+    return SemanticCache(dimension=DIMENSION, max_size=2, threshold=0.95)
+
+
+def test_near_duplicate_query_hits(cache):
+    """A slightly different query embedding is served the cached response"""
+    cache.store(unit_vector(0), SCOPE, {"status": "success"})
+
+    assert cache.lookup(unit_vector(0, noise=0.1), SCOPE) == {"status": "success"}
+    assert cache.lookup(unit_vector(1), SCOPE) is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["mean_hit_similarity"] > 0.95
+
+
+def test_scope_must_match(cache):
+    """Responses for another top_k are not reused"""
+    cache.store(unit_vector(0), SCOPE, {"status": "success"})
+
+    assert cache.lookup(unit_vector(0), build_search_scope(top_k=5)) is None
+
+
+def test_least_recently_used_is_evicted(cache):
+    """The cache keeps at most max_size responses"""
+    cache.store(unit_vector(0), SCOPE, "first")
+    cache.store(unit_vector(1), SCOPE, "second")
+    cache.lookup(unit_vector(0), SCOPE)
+    cache.store(unit_vector(2), SCOPE, "third")
+
+    assert cache.lookup(unit_vector(0), SCOPE) == "first"
+    assert cache.lookup(unit_vector(1), SCOPE) is None
+    assert cache.lookup(unit_vector(2), SCOPE) == "third"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidation_by_product_ids(cache):
+    """Only responses containing a changed product are dropped"""
+    cache.store(unit_vector(0), SCOPE, "first", product_ids={"in_stock_products": [1, 2]})
+    cache.store(unit_vector(1), SCOPE, "second", product_ids={"in_stock_products": [3]})
+
+    cache.invalidate("in_stock_products", [2])
+
+    assert cache.lookup(unit_vector(0), SCOPE) is None
+    assert cache.lookup(unit_vector(1), SCOPE) == "second"
+
+
+def test_catalog_events_invalidate_whole_table(cache):
+    """New products in a table invalidate every cached response searching that table"""
+    catalog_events.subscribe(cache.invalidate)
+    try:
+        # The table was searched without a hit, new products could still match
+        cache.store(
+            unit_vector(0), SCOPE, "first",
+            product_ids={"in_stock_products": [1], "out_of_stock_products": []},
+        )
+        cache.store(unit_vector(1), SCOPE, "second", product_ids={"in_stock_products": [2]})
+        catalog_events.publish_products_changed("out_of_stock_products")
+    finally:
+        catalog_events.unsubscribe(cache.invalidate)
+
+    assert cache.lookup(unit_vector(0), SCOPE) is None
+    assert cache.lookup(unit_vector(1), SCOPE) == "second"
+    assert cache.stats()["invalidations"] == 1
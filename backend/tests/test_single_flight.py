@@ -0,0 +1,188 @@
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+class Computation:
+    """Slow computation counting its runs"""
+
+    def __init__(self, result="result", delay=0.05, error=None):
+        self.result = result
+        self.delay = delay
+        self.error = error
+        self.runs = 0
+
+    async def __call__(self):
+        self.runs += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight()
+    compute = Computation()
+
+    async def run():
+        return await asyncio.gather(*[flight.do("key", compute) for _ in range(5)])
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert compute.runs == 1
+    assert flight.stats()["coalesced"] == 4
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_different_keys_and_later_calls_run_again():
+    flight = SingleFlight()
+    compute = Computation()
+
+    async def run():
+        await asyncio.gather(flight.do("a", compute), flight.do("b", compute))
+        await flight.do("a", compute)
+
+    asyncio.run(run())
+
+    assert compute.runs == 3
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_errors_are_shared_and_not_remembered():
+    flight = SingleFlight()
+    compute = Computation(error=ValueError("boom"))
+
+    async def run():
+        return await asyncio.gather(
+            *[flight.do("key", compute) for _ in range(3)], return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert compute.runs == 1
+    compute.error = None
+    assert asyncio.run(flight.do("key", compute)) == "result"
+
+
+def test_cancelled_leader_does_not_cancel_the_waiting_callers():
+    flight = SingleFlight()
+    compute = Computation()
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do("key", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == "result"
+    assert compute.runs == 1
+
+
+@pytest.fixture
+def shared_path(tmp_path):
+    return str(tmp_path / "flights.sqlite")
+
+
+def test_workers_share_a_result_through_the_file(shared_path):
+    """A second worker waits for the first worker's flight instead of computing"""
+    worker_a, worker_b = SingleFlight(shared_path), SingleFlight(shared_path, poll_seconds=0.005)
+    compute_a, compute_b = Computation({"products": [1, 2]}), Computation({"products": []})
+
+    async def run():
+        first = asyncio.ensure_future(worker_a.do("key", compute_a))
+        await asyncio.sleep(0.01)
+        return await asyncio.gather(first, worker_b.do("key", compute_b))
+
+    assert asyncio.run(run()) == [{"products": [1, 2]}, {"products": [1, 2]}]
+    assert compute_b.runs == 0
+    assert worker_b.stats()["shared"]["coalesced"] == 1
+
+
+def test_worker_computes_when_the_other_flight_fails(shared_path):
+    worker_a, worker_b = SingleFlight(shared_path), SingleFlight(shared_path, poll_seconds=0.005)
+    compute_a, compute_b = Computation(error=ValueError("boom")), Computation()
+
+    async def run():
+        first = asyncio.ensure_future(worker_a.do("key", compute_a))
+        await asyncio.sleep(0.01)
+        return await asyncio.gather(first, worker_b.do("key", compute_b), return_exceptions=True)
+
+    first, second = asyncio.run(run())
+
+    assert isinstance(first, ValueError)
+    assert second == "result"
+    assert worker_b.stats()["shared"]["abandoned"] == 1
+
+
+def test_expired_lease_is_abandoned(shared_path):
+    """A worker stuck past its lease no longer holds the other workers"""
+    worker_a = SingleFlight(shared_path, lease_seconds=0.02)
+    worker_b = SingleFlight(shared_path, poll_seconds=0.005)
+    compute_a, compute_b = Computation(delay=0.5), Computation(delay=0.0)
+
+    async def run():
+        first = asyncio.ensure_future(worker_a.do("key", compute_a))
+        await asyncio.sleep(0.01)
+        second = await worker_b.do("key", compute_b)
+        first.cancel()
+        return second
+
+    assert asyncio.run(run()) == "result"
+    assert compute_b.runs == 1
+
+
+def test_crashed_worker_lease_is_abandoned_at_expiry(shared_path):
+    """A worker that died holding a lease only delays the others until the lease expires"""
+    crashed = SingleFlight(shared_path, lease_seconds=0.05)
+    assert crashed._acquire_lease("key", "crashed-flight") == "crashed-flight"
+    worker = SingleFlight(shared_path, poll_seconds=0.005)
+    compute = Computation(delay=0.0)
+
+    assert asyncio.run(worker.do("key", compute)) == "result"
+    assert compute.runs == 1
+    assert worker.stats()["shared"]["abandoned"] == 1
+    assert worker.stats()["shared"]["coalesced"] == 0
+
+
+def test_cancelled_leader_releases_its_lease(shared_path):
+    """The waiting worker computes as soon as the leader's flight is cancelled"""
+    worker_a, worker_b = SingleFlight(shared_path), SingleFlight(shared_path, poll_seconds=0.005)
+    compute_a, compute_b = Computation(delay=5.0), Computation(delay=0.0)
+
+    async def run():
+        first = asyncio.ensure_future(worker_a.do("key", compute_a))
+        await asyncio.sleep(0.02)
+        second = asyncio.ensure_future(worker_b.do("key", compute_b))
+        await asyncio.sleep(0.02)
+        worker_a._inflight["key"].cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        return await asyncio.wait_for(second, timeout=1.0)
+
+    assert asyncio.run(run()) == "result"
+    assert compute_b.runs == 1
+    assert worker_b.stats()["shared"]["abandoned"] == 1
+
+
+def test_shared_file_is_used_off_the_event_loop(shared_path, monkeypatch):
+    """Every SQLite call of a flight runs in a worker thread"""
+    offloaded = []
+    to_thread = asyncio.to_thread
+
+    async def recording_to_thread(function, *args):
+        offloaded.append(function.__name__)
+        return await to_thread(function, *args)
+
+    monkeypatch.setattr("app.utils.single_flight.asyncio.to_thread", recording_to_thread)
+    worker_a, worker_b = SingleFlight(shared_path), SingleFlight(shared_path, poll_seconds=0.005)
+
+    async def run():
+        first = asyncio.ensure_future(worker_a.do("key", Computation()))
+        await asyncio.sleep(0.01)
+        return await asyncio.gather(first, worker_b.do("key", Computation("other")))
+
+    assert asyncio.run(run()) == ["result", "result"]
+    assert set(offloaded) == {"_acquire_lease", "_read_result", "_publish_result", "_release_lease"}
@@ -4,6 +4,7 @@ import json
 import pandas as pd
 from unittest.mock import Mock, patch
 from app.database.vector_db import VectorDatabase
+from app.database.product_cache import get_product_cache
 from app.config.settings import (
     IN_STOCK_PRODUCTS_TABLE_NAME,
     OUT_OF_STOCK_PRODUCTS_TABLE_NAME,
@@ -95,22 +96,22 @@ def test_search_products(vector_db):
     vector_db.conn.cursor.return_value = mock_cursor
 
     # Mock search results
-    mock_results = [
+    # Mock search hits, then the search cards read for the product cache misses
+    mock_hits = [(1, 0.8)]  # Mock id and similarity score
+    mock_cards = [
         (
+            IN_STOCK_PRODUCTS_TABLE_NAME,
+            1,
             MOCK_PRODUCT_DATA["title"],
             MOCK_PRODUCT_DATA["average_rating"],
             MOCK_PRODUCT_DATA["rating_number"],
-            MOCK_PRODUCT_DATA["features"],
-            MOCK_PRODUCT_DATA["description"],
             MOCK_PRODUCT_DATA["price"],
-            MOCK_PRODUCT_DATA["images"],
-            MOCK_PRODUCT_DATA["store"],
-            MOCK_PRODUCT_DATA["categories"],
-            json.dumps(MOCK_PRODUCT_DATA["details"]),
-            0.8,  # Mock similarity score
+            "test.jpg",  # Mock thumbnail
+            "feature1 | feature2",  # Mock feature summary
         )
     ]
-    mock_cursor.fetchall.return_value = mock_results
+    mock_cursor.fetchall.side_effect = [mock_hits, mock_cards]
+    get_product_cache().clear()
 
     # Test search with 1536-dimensional vector
     query_embedding = [0.1] * 1536
@@ -0,0 +1,185 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.database.vector_db import (
+    build_batch_search_params,
+    build_batch_search_query,
+    build_lexical_search_query,
+    build_search_cards_query,
+    build_search_params,
+    build_search_query,
+    build_search_settings,
+    build_stock_tables_search_query,
+    derive_ivfflat_lists,
+    derive_num_candidates,
+    parse_product_row,
+    parse_search_card_row,
+    parse_search_row,
+    settings,
+    split_stock_tables_rows,
+)
+from app.utils.vectors import shorten_embedding, shorten_embeddings
+
+
+def test_derive_ivfflat_lists_scales_with_row_count():
+    assert derive_ivfflat_lists(0) == 1
+    assert derive_ivfflat_lists(250_000) == 250
+    assert derive_ivfflat_lists(4_000_000) == 2000
+
+
+def test_ivfflat_search_settings_use_probes():
+    with patch.object(settings, "VECTOR_INDEX_TYPE", "ivfflat"):
+        assert build_search_settings(top_k=10, probes=25) == [
+            ("SELECT set_config('ivfflat.probes', %s, true)", ("25",))
+        ]
+        assert build_search_settings(top_k=10)[0][1] == (str(settings.IVFFLAT_PROBES),)
+
+
+def test_hnsw_ef_search_is_at_least_top_k():
+    with patch.object(settings, "VECTOR_INDEX_TYPE", "hnsw"):
+        sql, params = build_search_settings(top_k=100, ef_search=40)[0]
+        assert "hnsw.ef_search" in sql
+        assert params == ("100",)
+
+
+def test_shorten_embedding_is_renormalized():
+    short = shorten_embedding([3.0, 4.0, 12.0], 2)
+    assert short == pytest.approx([0.6, 0.8])
+    assert shorten_embeddings([[3.0, 4.0, 12.0], [0.0, 0.0, 1.0]], 2) == [
+        pytest.approx([0.6, 0.8]),
+        [0.0, 0.0],
+    ]
+
+
+def test_two_stage_search_rescores_short_vector_candidates():
+    with patch.object(settings, "TWO_STAGE_SEARCH_ENABLED", True):
+        sql = build_stock_tables_search_query("in_stock_products", "out_of_stock_products")
+        params = build_search_params([0.1] * settings.EMBEDDING_DIMENSION, top_k=10)
+
+        # hnsw must return every candidate of the first stage
+        with patch.object(settings, "VECTOR_INDEX_TYPE", "hnsw"):
+            _, ef_search = build_search_settings(top_k=10, ef_search=40)[0]
+
+    assert sql.count("ORDER BY embedding_short <=> %(short_embedding)s") == 2
+    assert sql.count("ORDER BY\n            embedding <=> %(embedding)s") == 2
+    assert params["short_embedding"].shape == (settings.SHORT_EMBEDDING_DIMENSION,)
+    assert params["num_candidates"] == derive_num_candidates(10) >= 100
+    assert ef_search == (str(params["num_candidates"]),)
+
+
+def test_batch_params_interleave_short_embeddings():
+    embeddings = [[0.1] * settings.EMBEDDING_DIMENSION] * 3
+    assert len(build_batch_search_params(embeddings, top_k=5)) == 4
+
+    with patch.object(settings, "TWO_STAGE_SEARCH_ENABLED", True):
+        sql = build_batch_search_query("in_stock_products", 3)
+        params = build_batch_search_params(embeddings, top_k=5)
+
+    assert sql.count("%s") == len(params) == 8
+    assert params[-1] == 5
+
+
+def test_binary_quantization_ranks_candidates_by_hamming_distance():
+    with patch.object(settings, "VECTOR_QUANTIZATION", "binary"), \
+            patch.object(settings, "TWO_STAGE_SEARCH_ENABLED", True):
+        sql = build_stock_tables_search_query("in_stock_products", "out_of_stock_products")
+        params = build_search_params([0.1] * settings.EMBEDDING_DIMENSION, top_k=10)
+
+    assert sql.count(
+        f"ORDER BY embedding_bit <~> binary_quantize(%(embedding)s)::bit({settings.EMBEDDING_DIMENSION})"
+    ) == 2
+    # The quantized column takes precedence, the short embedding is not sent
+    assert "short_embedding" not in params
+    assert params["num_candidates"] == derive_num_candidates(10)
+
+
+def test_unknown_quantization_is_rejected():
+    with patch.object(settings, "VECTOR_QUANTIZATION", "int4"):
+        with pytest.raises(ValueError):
+            build_search_params([0.1] * settings.EMBEDDING_DIMENSION, top_k=10)
+
+
+def test_searches_only_return_ids_and_scores():
+    queries = [
+        build_stock_tables_search_query("in_stock_products", "out_of_stock_products"),
+        build_lexical_search_query("in_stock_products", "out_of_stock_products").as_string(None),
+        build_batch_search_query("in_stock_products", 2),
+    ]
+    for sql in queries:
+        for column in ("title", "thumbnail", "features", "description", "images", "details"):
+            assert column not in sql
+
+    # The search cards are read by id, the TOASTed columns are left out
+    sql = build_search_cards_query(["in_stock_products", "out_of_stock_products"])
+    assert sql.count("id = ANY(%s::bigint[])") == 2
+    assert "thumbnail" in sql and "feature_summary" in sql
+    for toasted_column in ("features", "description", "images", "details"):
+        assert toasted_column not in sql
+
+
+def test_search_hit_card_and_product_rows():
+    assert parse_search_row((7, 0.8)) == {"id": 7, "similarity": 0.8}
+
+    card = parse_search_card_row((7, "Linen shirt", 4.5, 12, 39.9, "shirt.jpg", None))
+    assert card == {
+        "id": 7,
+        "title": "Linen shirt",
+        "average_rating": 4.5,
+        "rating_number": 12,
+        "price": 39.9,
+        "thumbnail": "shirt.jpg",
+        "feature_summary": "",
+    }
+
+    product = parse_product_row(
+        (7, "Linen shirt", 4.5, 12, ["Linen"], "Summer shirt", 39.9, [], "Store", "[]", '{"color": "white"}')
+    )
+    assert product["details"] == {"color": "white"}
+    assert product["features"] == ["Linen"]
+
+
+def test_stock_tables_query_tags_one_branch_per_table():
+    sql = build_stock_tables_search_query("in_stock_products", "out_of_stock_products")
+
+    in_stock_sql, out_of_stock_sql = sql.split("UNION ALL")
+    assert "'in_stock' AS stock_status" in in_stock_sql and "FROM\n            in_stock_products" in in_stock_sql
+    assert "'out_of_stock' AS stock_status" in out_of_stock_sql
+    assert "FROM\n            out_of_stock_products" in out_of_stock_sql
+    # Each branch is parenthesized so that it keeps its own ORDER BY and LIMIT
+    for branch_sql in (in_stock_sql, out_of_stock_sql):
+        assert branch_sql.strip().startswith("(") and branch_sql.strip().endswith(")")
+        assert "LIMIT\n            %(top_k)s" in branch_sql
+
+
+def test_table_query_binds_the_embedding():
+    """The single-table search sends the vector as a parameter instead of an inlined array"""
+    sql = build_search_query("in_stock_products")
+
+    assert "ARRAY" not in sql
+    assert "embedding <=> %(embedding)s" in sql
+    assert "LIMIT\n            %(top_k)s" in sql
+    assert "stock_status" not in sql
+
+
+def test_stock_tables_rows_are_split_by_table_in_similarity_order():
+    rows = [
+        ("out_of_stock", 5, 0.7),
+        ("in_stock", 1, 0.9),
+        ("out_of_stock", 6, 0.8),
+        ("in_stock", 2, 0.6),
+    ]
+
+    in_stock, out_of_stock = split_stock_tables_rows(rows)
+
+    assert [p["id"] for p in in_stock] == [1, 2]
+    assert [p["id"] for p in out_of_stock] == [6, 5]
+    assert out_of_stock[0] == {"id": 6, "similarity": 0.8}
+
+
+def test_stock_tables_rows_with_an_empty_table():
+    in_stock, out_of_stock = split_stock_tables_rows([("in_stock", 1, 0.9), ("in_stock", 2, 0.8)])
+
+    assert [p["id"] for p in in_stock] == [1, 2]
+    assert out_of_stock == []
+    assert split_stock_tables_rows([]) == ([], [])
@@ -11,7 +11,10 @@ interface ProductCardProps {
 export function ProductCard({ product, children }: ProductCardProps) {
   return (
     <div className="flex-none w-80 bg-white rounded-lg shadow-md overflow-hidden flex flex-col">
-      <ProductCarousel images={product.images} />
+      {/* Search results are search cards with a single thumbnail, full images come from /products */}
+      <ProductCarousel
+        images={product.images ?? (product.thumbnail ? { main: product.thumbnail } : {})}
+      />
       <div className="p-4 flex flex-col flex-1">
         <h3 className="text-lg font-semibold mb-2">{product.title}</h3>
         {children}
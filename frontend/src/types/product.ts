@@ -3,7 +3,10 @@ export interface Product {
   title: string;
   price: number;
   currency: string;
-  images: Record<string, string | ImageVariant>;
+  images?: Record<string, string | ImageVariant>;
+  thumbnail?: string | null;
+  feature_summary?: string;
+  stock_status?: "in_stock" | "out_of_stock";
   average_rating?: number;
   rating_number?: number;
   reason?: string;